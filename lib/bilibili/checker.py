@@ -1,12 +1,10 @@
-import sys
 import os
-from pathlib import Path
 
 from PySide6.QtWidgets import QDialog, QVBoxLayout, QLabel, QPushButton, QFileDialog, QMessageBox, QLineEdit, QHBoxLayout
 
 
 def check_bbdown_path(window):
-    """检查BBDown路径是否存在"""
+    """检查BBDown路径是否存在，未找到时弹窗选择，用户取消时返回False"""
     if not window.command_builder.BBDown_PATH:
         # 创建弹窗
         dialog = QDialog(window)
@@ -70,9 +68,8 @@ def check_bbdown_path(window):
         
         dialog.exec()
         
-        # 如果用户取消了文件选择，退出程序
-        if not window.command_builder.BBDown_PATH:
-            sys.exit(1)
+    # 如果用户取消了文件选择，由调用方退出程序
+    return bool(window.command_builder.BBDown_PATH)
 
 
 def setup_system_paths():
@@ -100,9 +97,10 @@ def setup_system_paths():
         path_list = current_path.split(":") if current_path else []
 
         # 添加不在当前PATH中的常见路径
+        # 不解析符号链接，每个目录只检查一次是否存在
         for path in common_paths:
-            p = str(Path(path).expanduser().resolve())
-            if p not in path_list and os.path.exists(p):
+            p = os.path.expanduser(path)
+            if p not in path_list and os.path.isdir(p):
                 path_list.append(p)
 
         # 更新PATH环境变量
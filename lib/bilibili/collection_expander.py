@@ -0,0 +1,310 @@
+import hashlib
+import json
+import math
+import re
+import time
+from collections import deque
+from urllib.parse import urlencode
+from PySide6.QtCore import QObject, QTimer, QUrl, Signal
+from PySide6.QtNetwork import QNetworkReply
+from lib.libs.url_classifier import classify_url, canonical_video_key
+from lib.bilibili.metadata_fetcher import bilibili_request
+
+_MID_PATTERN = re.compile(r"space\.bilibili\.com/(\d+)")
+
+# WBI签名使用的密钥重排表
+_MIXIN_KEY_ENC_TAB = [
+    46, 47, 18, 2, 53, 8, 23, 32, 15, 50, 10, 31, 58, 3, 45, 35, 27, 43, 5, 49,
+    33, 9, 42, 19, 29, 28, 14, 39, 12, 38, 41, 13, 37, 48, 7, 16, 24, 55, 40,
+    61, 26, 17, 0, 1, 60, 51, 30, 4, 22, 25, 54, 21, 56, 59, 6, 63, 57, 62, 11,
+    36, 20, 34, 44, 52,
+]
+
+
+def wbi_mixin_key(img_key, sub_key):
+    """由导航接口返回的 img_key 和 sub_key 生成WBI签名密钥"""
+    raw = img_key + sub_key
+    return "".join(raw[index] for index in _MIXIN_KEY_ENC_TAB)[:32]
+
+
+def wbi_sign(params, mixin_key, timestamp=None):
+    """为请求参数添加WBI签名（wts和w_rid），返回查询字符串"""
+    params = dict(params)
+    params["wts"] = int(timestamp if timestamp is not None else time.time())
+    # 按键名排序，并去掉值中的 !'()* 字符
+    params = {key: "".join(char for char in str(value) if char not in "!'()*")
+              for key, value in sorted(params.items())}
+    query = urlencode(params)
+    w_rid = hashlib.md5((query + mixin_key).encode()).hexdigest()
+    return f"{query}&w_rid={w_rid}"
+
+
+def _video_url(item):
+    bvid = item.get("bvid") or item.get("bv_id")
+    return f"https://www.bilibili.com/video/{bvid}" if bvid else None
+
+
+class _Listing:
+    """一种列表接口：每页的请求地址和响应解析方式"""
+
+    def __init__(self, page_size, build_url, parse, needs_wbi=False):
+        self.page_size = page_size
+        # (编号参数, 页码) -> 地址（需要签名时为参数字典）
+        self.build_url = build_url
+        # 响应JSON -> (视频地址列表, 总数)
+        self.parse = parse
+        self.needs_wbi = needs_wbi
+
+
+def _parse_archives(data):
+    archives = data.get("archives") or []
+    return [_video_url(item) for item in archives], (data.get("page") or {}).get("total", 0)
+
+
+def _parse_favorites(data):
+    medias = data.get("medias") or []
+    return [_video_url(item) for item in medias], (data.get("info") or {}).get("media_count", 0)
+
+
+def _parse_space(data):
+    vlist = (data.get("list") or {}).get("vlist") or []
+    return [_video_url(item) for item in vlist], (data.get("page") or {}).get("count", 0)
+
+
+def _parse_bangumi(data):
+    episodes = data.get("episodes") or []
+    urls = [item.get("link") or f"https://www.bilibili.com/bangumi/play/ep{item.get('id')}" for item in episodes]
+    return urls, len(urls)
+
+
+_API = "https://api.bilibili.com"
+
+LISTINGS = {
+    # 合集
+    "season": _Listing(
+        30, lambda ids, page: f"{_API}/x/polymer/web-space/seasons_archives_list"
+                              f"?mid={ids[0]}&season_id={ids[1]}&page_num={page}&page_size=30",
+        _parse_archives),
+    # 系列（旧版视频列表）
+    "series": _Listing(
+        30, lambda ids, page: f"{_API}/x/series/archives?mid={ids[0]}&series_id={ids[1]}&pn={page}&ps=30",
+        _parse_archives),
+    # 收藏夹
+    "favorites": _Listing(
+        20, lambda ids, page: f"{_API}/x/v3/fav/resource/list?media_id={ids[1]}&pn={page}&ps=20&platform=web",
+        _parse_favorites),
+    # 个人空间的全部投稿，需要WBI签名
+    "space": _Listing(
+        30, lambda ids, page: {"mid": ids[0], "pn": page, "ps": 30, "order": "pubdate"},
+        _parse_space, needs_wbi=True),
+    # 番剧/影视的全部剧集，一次返回
+    "bangumi": _Listing(
+        0, lambda ids, page: f"{_API}/pgc/view/web/season?season_id={ids[1]}",
+        _parse_bangumi),
+}
+
+
+class _Expansion:
+    """一次展开的状态"""
+
+    def __init__(self, url, listing, ids, stop_at=None):
+        self.url = url
+        self.listing = listing
+        self.ids = ids
+        # 已见过的视频编号，指定时按顺序逐页请求，遇到其中的视频即停止
+        self.stop_at = set(stop_at) if stop_at is not None else None
+        self.pages = None
+        self.pages_done = 0
+        self.count = 0
+        self.failed = False
+
+
+class CollectionExpander(QObject):
+    """将合集、系列、收藏夹、个人空间和番剧展开为单个视频的地址
+
+    第一页返回总数后并发请求其余页面，所有请求共用一个限速队列
+    （同时进行的请求数和两次请求之间的最小间隔），避免触发接口风控。
+    增量同步时（指定stop_at）逐页请求，遇到已见过的视频即停止。
+    """
+
+    # 同时进行的请求数
+    MAX_CONCURRENT = 3
+    # 两次请求之间的最小间隔（秒）
+    REQUEST_INTERVAL = 0.3
+    # 最多展开的页数
+    MAX_PAGES = 200
+    WBI_KEY_TTL = 3600
+
+    # (原地址, 本页的视频地址列表)，每页返回后立即发出
+    items_found = Signal(str, list)
+    # (原地址, 视频总数)
+    finished = Signal(str, int)
+    # (原地址, 错误信息)
+    failed = Signal(str, str)
+
+    def __init__(self, net_manager, parent=None, api_base=_API):
+        super().__init__(parent)
+        self.net_manager = net_manager
+        # 可指向本地测试服务器
+        self.api_base = api_base.rstrip("/")
+        self._waiting = deque()
+        self._in_flight = 0
+        self._last_request = 0.0
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._dispatch)
+        self._expansions = {}
+        self._wbi_key = None
+        self._wbi_key_time = 0.0
+        # 等待WBI密钥的请求
+        self._wbi_waiting = []
+
+    @staticmethod
+    def listing_for(url):
+        """返回地址对应的列表类型和参数 (类型, (mid, 编号))，不是可展开的地址时返回None"""
+        match = classify_url(url)
+        if match is None or match.site != "bilibili":
+            return None
+        mid_match = _MID_PATTERN.search(match.url)
+        mid = mid_match.group(1) if mid_match else None
+        if match.kind == "collection":
+            kind = "series" if "seriesdetail" in match.url or "type=series" in match.url else "season"
+            return kind, (mid, match.id)
+        if match.kind == "favorites":
+            return "favorites", (mid, match.id)
+        if match.kind == "space":
+            return "space", (match.id, None)
+        if match.kind == "season" and match.id.startswith("ss"):
+            return "bangumi", (None, match.id[2:])
+        return None
+
+    @property
+    def pending(self):
+        """是否还有未完成的展开"""
+        return bool(self._expansions)
+
+    def expand(self, url, stop_at=None):
+        """开始展开，地址不可展开时返回False
+
+        stop_at 为已见过的视频的规范编号（canonical_video_key），
+        列表需按发布时间从新到旧排列，只返回比它们更新的视频；
+        为空集合时同样逐页按顺序返回全部视频
+        """
+        listing = self.listing_for(url)
+        if listing is None:
+            return False
+        if url in self._expansions:
+            return True
+        kind, ids = listing
+        expansion = self._expansions[url] = _Expansion(url, LISTINGS[kind], ids, stop_at)
+        self._request_page(expansion, 1)
+        return True
+
+    def _request_page(self, expansion, page):
+        target = expansion.listing.build_url(expansion.ids, page)
+        if expansion.listing.needs_wbi:
+            self._with_wbi_key(lambda key: self._enqueue_request(
+                f"{self.api_base}/x/space/wbi/arc/search?{wbi_sign(target, key)}",
+                lambda data, error: self._on_page(expansion, page, data, error)))
+        else:
+            self._enqueue_request(target.replace(_API, self.api_base, 1),
+                                  lambda data, error: self._on_page(expansion, page, data, error))
+
+    def _on_page(self, expansion, page, data, error):
+        if expansion.failed:
+            return
+        if error is not None:
+            expansion.failed = True
+            self._expansions.pop(expansion.url, None)
+            self.failed.emit(expansion.url, error)
+            return
+        urls, total = expansion.listing.parse(data)
+        urls = [url for url in urls if url]
+        reached = False
+        if expansion.stop_at is not None:
+            for index, url in enumerate(urls):
+                if canonical_video_key(url) in expansion.stop_at:
+                    urls = urls[:index]
+                    reached = True
+                    break
+        if expansion.pages is None:
+            page_size = expansion.listing.page_size
+            expansion.pages = min(self.MAX_PAGES, math.ceil(total / page_size)) if page_size and total else 1
+            if expansion.stop_at is None:
+                # 第一页返回总数后同时请求其余页面
+                for next_page in range(2, expansion.pages + 1):
+                    self._request_page(expansion, next_page)
+        expansion.pages_done += 1
+        expansion.count += len(urls)
+        if urls:
+            self.items_found.emit(expansion.url, urls)
+        if expansion.stop_at is not None and not reached and page < expansion.pages:
+            # 增量同步：还没遇到已见过的视频，继续请求下一页
+            self._request_page(expansion, page + 1)
+            return
+        if reached or expansion.pages_done >= expansion.pages:
+            self._expansions.pop(expansion.url, None)
+            self.finished.emit(expansion.url, expansion.count)
+
+    def _with_wbi_key(self, callback):
+        """获取WBI签名密钥（缓存一小时）后调用 callback(key)"""
+        if self._wbi_key and time.monotonic() - self._wbi_key_time < self.WBI_KEY_TTL:
+            callback(self._wbi_key)
+            return
+        self._wbi_waiting.append(callback)
+        if len(self._wbi_waiting) == 1:
+            # 未登录时导航接口返回 -101，但仍包含密钥
+            self._enqueue_request(f"{self.api_base}/x/web-interface/nav", self._on_nav, accept_codes=(0, -101))
+
+    def _on_nav(self, data, error):
+        waiting, self._wbi_waiting = self._wbi_waiting, []
+        wbi_img = (data or {}).get("wbi_img") or {}
+        img_key = wbi_img.get("img_url", "").rsplit("/", 1)[-1].split(".")[0]
+        sub_key = wbi_img.get("sub_url", "").rsplit("/", 1)[-1].split(".")[0]
+        if error is not None or not img_key or not sub_key:
+            for expansion in list(self._expansions.values()):
+                if expansion.listing.needs_wbi:
+                    self._on_page(expansion, 0, None, error or "获取WBI密钥失败")
+            return
+        self._wbi_key = wbi_mixin_key(img_key, sub_key)
+        self._wbi_key_time = time.monotonic()
+        for callback in waiting:
+            callback(self._wbi_key)
+
+    def _enqueue_request(self, url, callback, accept_codes=(0,)):
+        self._waiting.append((url, callback, accept_codes))
+        self._dispatch()
+
+    def _dispatch(self):
+        """在并发数和请求间隔的限制内发出等待中的请求"""
+        while self._waiting and self._in_flight < self.MAX_CONCURRENT:
+            wait = self._last_request + self.REQUEST_INTERVAL - time.monotonic()
+            if wait > 0:
+                if not self._timer.isActive():
+                    self._timer.start(int(wait * 1000) + 1)
+                return
+            url, callback, accept_codes = self._waiting.popleft()
+            self._in_flight += 1
+            self._last_request = time.monotonic()
+            reply = self.net_manager.get(bilibili_request(QUrl(url)))
+            reply.finished.connect(lambda reply=reply, callback=callback, accept_codes=accept_codes:
+                                   self._on_reply(reply, callback, accept_codes))
+
+    def _on_reply(self, reply, callback, accept_codes):
+        self._in_flight -= 1
+        try:
+            if reply.error() != QNetworkReply.NetworkError.NoError:
+                callback(None, reply.errorString())
+                return
+            try:
+                response = json.loads(reply.readAll().data())
+            except ValueError as e:
+                callback(None, f"解析响应失败: {e}")
+                return
+            if response.get("code") not in accept_codes:
+                callback(None, response.get("message", "未知错误"))
+                return
+            callback(response.get("data") or response.get("result") or {}, None)
+        finally:
+            reply.deleteLater()
+            self._dispatch()
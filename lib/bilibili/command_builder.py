@@ -1,78 +1,122 @@
-import shutil
 from PySide6.QtWidgets import QMessageBox
+from lib.libs.download_spec import DEFAULT_BILIBILI_FILE_PATTERN
+from lib.libs.url_handler import URLHandler
+from lib.libs.tool_registry import ToolRegistry
 
 
 class CommandBuilder:
-    def __init__(self, parent):
+    def __init__(self, parent=None, tools=None):
+        # parent为None时用于无界面的批量模式
         self.parent = parent
-        self.BBDown_PATH = shutil.which("BBDown")
+        self.tools = tools or ToolRegistry()
+        # 手动选择的BBDown路径
+        self._bbdown_path = None
+        # 配置文件中记录的BBDown路径，PATH中找不到时使用
+        self.fallback_path = None
 
-    def build_command(self, info_only=False):
-        """构建BBDown命令"""
-        url = self.parent.url_input.text().strip()
+    @property
+    def BBDown_PATH(self):
+        """BBDown路径，第一次使用时才从工具注册表中读取"""
+        return self._bbdown_path or self.tools.path("BBDown") or self.fallback_path or None
+
+    @BBDown_PATH.setter
+    def BBDown_PATH(self, path):
+        self._bbdown_path = path or None
+
+    def build_command(self, info_only=False, url=None):
+        """根据界面选项构建BBDown命令，未指定url时读取输入框"""
+        if url is None:
+            url = self.parent.url_input.text().strip()
         if not url:
             QMessageBox.warning(self.parent, "警告", "请输入视频地址或BV号")
             return None
-            
+
+        spec = self.parent.download_options.to_spec(url)
+        return self.build_command_from_spec(spec, info_only)
+
+    def build_command_from_spec(self, spec, info_only=False):
+        """根据下载参数构建BBDown命令"""
         # 转换新版个人空间合集链接为旧版格式
-        converted_url = self.parent.url_handler.convert_space_url(url)
+        converted_url = URLHandler.convert_space_url(spec.url)
 
         command = [self.BBDown_PATH, converted_url]
-        
+
         # 添加API模式参数
-        api_mode = self.parent.download_options.api_combo.currentText()
+        api_mode = spec.api_mode
         if api_mode == "TV端":
             command.append("--use-tv-api")
         elif api_mode == "APP端":
             command.append("--use-app-api")
         elif api_mode == "国际版":
             command.append("--use-intl-api")
-            
+
         # 添加编码和画质优先级
-        encoding = self.parent.download_options.encoding_input.text().strip()
+        encoding = spec.encoding.strip()
         if encoding:
             command.extend(["-e", encoding])
-            
-        dfn = self.parent.download_options.dfn_input.text().strip()
+
+        dfn = spec.dfn.strip()
         if dfn:
             command.extend(["-q", dfn])
-            
+
         # 添加复选框选项
-        if self.parent.download_options.use_aria2.isChecked():
-            command.append("--use-aria2c")
-        if self.parent.download_options.interactive.isChecked():
+        if spec.use_aria2:
+            aria2c_path = self.tools.path("aria2c")
+            if aria2c_path:
+                command.extend(["--use-aria2c", "--aria2c-path", aria2c_path])
+            else:
+                self._notice("未找到aria2c，使用BBDown内置的下载器")
+        if spec.use_mp4box:
+            mp4box_path = self.tools.path("MP4Box")
+            if mp4box_path:
+                command.extend(["--use-mp4box", "--mp4box-path", mp4box_path])
+            else:
+                self._notice("未找到MP4Box，使用ffmpeg混流")
+        if spec.interactive:
             command.append("-ia")
-        if self.parent.download_options.download_danmaku.isChecked():
+        if spec.download_danmaku:
             command.append("-dd")
-        if self.parent.download_options.video_only.isChecked():
+        if spec.video_only:
             command.append("--video-only")
-        if self.parent.download_options.audio_only.isChecked():
+        if spec.audio_only:
             command.append("--audio-only")
-        if self.parent.download_options.skip_subtitle.isChecked():
+        if spec.skip_subtitle:
             command.append("--skip-subtitle")
-        if self.parent.download_options.skip_cover.isChecked():
+        if spec.skip_cover:
             command.append("--skip-cover")
-        if self.parent.download_options.debug.isChecked():
+        if spec.debug:
             command.append("--debug")
-        if self.parent.download_options.show_all.isChecked():
+        if spec.show_all:
             command.append("--show-all")
         if info_only:
             command.append("--only-show-info")
-            
+
         # 添加文件命名模式
-        file_pattern = self.parent.download_options.file_pattern.text().strip()
+        file_pattern = spec.file_pattern.strip()
         if file_pattern:
             command.extend(["-F", file_pattern])
         else:
-            command.extend(["-F", self.parent.default_bilibili_file_pattern])
-            
-        multi_file_pattern = self.parent.download_options.multi_file_pattern.text().strip()
+            command.extend(["-F", DEFAULT_BILIBILI_FILE_PATTERN])
+
+        multi_file_pattern = spec.multi_file_pattern.strip()
         if multi_file_pattern:
             command.extend(["-M", multi_file_pattern])
-            
+
         # 添加工作目录
-        work_dir = self.parent.download_options.work_dir.text().strip()
+        work_dir = spec.work_dir.strip()
         if work_dir:
             command.extend(["--work-dir", work_dir])
-            
-        return command
\ No newline at end of file
+
+        # 使用工具注册表中找到的ffmpeg，BBDown不必再自行查找
+        ffmpeg_path = self.tools.path("ffmpeg")
+        if ffmpeg_path:
+            command.extend(["--ffmpeg-path", ffmpeg_path])
+
+        return command
+
+    def _notice(self, text):
+        """提示信息：界面中写入输出区域（打包后的程序没有控制台），批量模式输出到终端"""
+        if self.parent is not None:
+            self.parent.output_area.append_output(text)
+        else:
+            print(text)
@@ -1,21 +1,23 @@
-import os
-import yaml
 from PySide6.QtWidgets import (
-    QGroupBox, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QLineEdit, QCheckBox, QPushButton, QLayout
+    QGroupBox, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QLineEdit, QCheckBox, QPushButton, QLayout, QSpinBox
 )
 # from PySide6.QtCore import Qt
 from lib.libs.download_dir import downloads_path
 from lib.libs.base import OptionsBase
+from lib.libs.download_spec import BilibiliSpec
 
 class DownloadOptionsArea(OptionsBase):
     def __init__(self, parent):
         self.BBDown_PATH = ""
         self.parent = parent
+        # 配置文件中的 bilibili 段（SettingsSection）
+        self.settings = None
         # 初始化所有需要的控件属性
         self.api_combo = None
         self.encoding_input = None
         self.dfn_input = None
         self.use_aria2 = None
+        self.use_mp4box = None
         self.interactive = None
         self.download_danmaku = None
         self.video_only = None
@@ -28,6 +30,7 @@ class DownloadOptionsArea(OptionsBase):
         self.multi_file_pattern = None
         self.work_dir = None
         self.browse_button = None
+        self.max_workers = None
 
     def create_download_options_area(self, layout):
         """创建下载选项区域"""
@@ -41,6 +44,15 @@ class DownloadOptionsArea(OptionsBase):
         self.api_combo = QComboBox()
         self.api_combo.addItems(["默认", "TV端", "APP端", "国际版"])
         api_layout.addWidget(self.api_combo)
+
+        # 同时运行的BBDown进程数
+        api_layout.addWidget(QLabel("同时下载数:"))
+        self.max_workers = QSpinBox()
+        self.max_workers.setRange(1, 16)
+        self.max_workers.setValue(self.parent.download_queue.limits["bilibili"])
+        self.max_workers.valueChanged.connect(
+            lambda value: self.parent.download_queue.set_limit("bilibili", value))
+        api_layout.addWidget(self.max_workers)
         api_layout.addStretch()
         options_layout.addLayout(api_layout)
         
@@ -76,12 +88,14 @@ class DownloadOptionsArea(OptionsBase):
         # 更多选项复选框
         more_checkboxes_layout = QHBoxLayout()
         
+        self.use_mp4box = QCheckBox("使用MP4Box混流")
         self.skip_subtitle = QCheckBox("跳过字幕下载")
         self.skip_cover = QCheckBox("跳过封面下载")
         self.debug = QCheckBox("输出调试日志")
         self.debug.setChecked(True)
         self.show_all = QCheckBox("显示所有分P")
         
+        more_checkboxes_layout.addWidget(self.use_mp4box)
         more_checkboxes_layout.addWidget(self.skip_subtitle)
         more_checkboxes_layout.addWidget(self.skip_cover)
         more_checkboxes_layout.addWidget(self.debug)
@@ -121,80 +135,62 @@ class DownloadOptionsArea(OptionsBase):
         options_layout.setSizeConstraint(QLayout.SizeConstraint.SetFixedSize)
         layout.addWidget(self.options_group)
 
+        # 外部工具探测完成后，只提供已安装工具的选项
+        self.parent.tools.finished.connect(self.update_tool_options)
+
+    def update_tool_options(self):
+        """根据工具注册表的探测结果启用aria2c和MP4Box选项"""
+        tools = self.parent.tools
+        self.use_aria2.setEnabled(tools.available("aria2c"))
+        self.use_aria2.setToolTip("" if self.use_aria2.isEnabled() else "未找到aria2c")
+        self.use_mp4box.setEnabled(tools.available("MP4Box") and tools.has_feature("BBDown", "mp4box"))
+        self.use_mp4box.setToolTip("" if self.use_mp4box.isEnabled() else "未找到MP4Box，或当前BBDown版本不支持")
             
-    def load_config(self, config_file):
-        """加载配置文件"""
-        if os.path.exists(config_file):
-            try:
-                with open(config_file, 'r', encoding='utf-8') as f:
-                    all_config = yaml.safe_load(f) or {}
-                config = all_config.get('bilibili', {})
-                # 加载URL输入
-                if 'url' in config:
-                    self.parent.url_input.setText(config['url'])
-                
-                # 加载API模式
-                if 'api_mode' in config:
-                    index = self.api_combo.findText(config['api_mode'])
-                    if index >= 0:
-                        self.api_combo.setCurrentIndex(index)
-                
-                # 加载编码优先级
-                if 'encoding' in config:
-                    self.encoding_input.setText(config['encoding'])
-                
-                # 加载画质优先级
-                if 'dfn' in config:
-                    self.dfn_input.setText(config['dfn'])
-                
-                # 加载复选框状态
-                if 'use_aria2' in config:
-                    self.use_aria2.setChecked(config['use_aria2'])
-                if 'interactive' in config:
-                    self.interactive.setChecked(config['interactive'])
-                if 'download_danmaku' in config:
-                    self.download_danmaku.setChecked(config['download_danmaku'])
-                if 'video_only' in config:
-                    self.video_only.setChecked(config['video_only'])
-                if 'audio_only' in config:
-                    self.audio_only.setChecked(config['audio_only'])
-                if 'skip_subtitle' in config:
-                    self.skip_subtitle.setChecked(config['skip_subtitle'])
-                if 'skip_cover' in config:
-                    self.skip_cover.setChecked(config['skip_cover'])
-                if 'debug' in config:
-                    self.debug.setChecked(config['debug'])
-                if 'show_all' in config:
-                    self.show_all.setChecked(config['show_all'])
-                
-                # 加载文件命名模式
-                if 'file_pattern' in config:
-                    self.file_pattern.setText(config['file_pattern'])
-                if 'multi_file_pattern' in config:
-                    self.multi_file_pattern.setText(config['multi_file_pattern'])
-                
-                # 加载工作目录
-                if config.get("work_dir"):
-                    self.work_dir.setText(config['work_dir'])
-                else:
-                    # 添加默认工作目录为当前用户的下载文件夹
-                    self.work_dir.setText(str(downloads_path))
+    def load_config(self, settings):
+        """从配置中加载选项，settings为配置文件中的 bilibili 段"""
+        self.settings = settings
+        # 加载URL输入
+        if 'url' in settings:
+            self.parent.url_input.setText(settings.get('url', ''))
+
+        # 加载API模式
+        index = self.api_combo.findText(settings.get('api_mode', ''))
+        if index >= 0:
+            self.api_combo.setCurrentIndex(index)
+
+        # 加载编码和画质优先级
+        self.encoding_input.setText(settings.get('encoding', self.encoding_input.text()))
+        self.dfn_input.setText(settings.get('dfn', self.dfn_input.text()))
+
+        # 加载复选框状态
+        for key in ('use_aria2', 'use_mp4box', 'interactive', 'download_danmaku', 'video_only', 'audio_only',
+                    'skip_subtitle', 'skip_cover', 'debug', 'show_all'):
+            checkbox = getattr(self, key)
+            checkbox.setChecked(settings.get(key, checkbox.isChecked()))
+        self.max_workers.setValue(settings.get('max_workers', self.max_workers.value()))
+
+        # 加载文件命名模式
+        self.file_pattern.setText(settings.get('file_pattern', self.file_pattern.text()))
+        self.multi_file_pattern.setText(settings.get('multi_file_pattern', self.multi_file_pattern.text()))
 
-                # 程序路径
-                if config.get("BBDown_PATH"):
-                    self.BBDown_PATH = config.get("BBDown_PATH", "")
-                    
-            except Exception as e:
-                print(f"加载配置文件失败: {e}")
+        # 加载工作目录，默认为当前用户的下载文件夹
+        self.work_dir.setText(settings.get('work_dir') or str(downloads_path))
+
+        # 程序路径
+        self.BBDown_PATH = settings.get('BBDown_PATH', "")
+
+        # 选项修改后自动保存
+        self.connect_changes(self.save_config)
     
-    def save_config(self, config_file):
-        """保存配置到文件"""
-        config = {
+    def get_config(self):
+        """读取当前界面选项为配置字典"""
+        return {
             # 'url': self.parent.url_input.text(),
             'api_mode': self.api_combo.currentText(),
             'encoding': self.encoding_input.text(),
             'dfn': self.dfn_input.text(),
             'use_aria2': self.use_aria2.isChecked(),
+            'use_mp4box': self.use_mp4box.isChecked(),
             'interactive': self.interactive.isChecked(),
             'download_danmaku': self.download_danmaku.isChecked(),
             'video_only': self.video_only.isChecked(),
@@ -203,20 +199,22 @@ class DownloadOptionsArea(OptionsBase):
             'skip_cover': self.skip_cover.isChecked(),
             'debug': self.debug.isChecked(),
             'show_all': self.show_all.isChecked(),
+            'max_workers': self.max_workers.value(),
             'file_pattern': self.file_pattern.text(),
             'multi_file_pattern': self.multi_file_pattern.text(),
             'work_dir': self.work_dir.text(),
             'BBDown_PATH': self.BBDown_PATH,
         }
-        
-        try:
-            try:
-                with open(config_file, 'r', encoding='utf-8') as f:
-                    all_config = yaml.safe_load(f) or {}
-            except Exception as e:
-                all_config = {}
-            all_config['bilibili'] = config
-            with open(config_file, 'w', encoding='utf-8') as f:
-                yaml.dump(all_config, f, allow_unicode=True, indent=2)
-        except Exception as e:
-            print(f"保存配置文件失败: {e}")
\ No newline at end of file
+
+    def to_spec(self, url):
+        """根据当前界面选项生成不依赖控件的下载参数"""
+        config = self.get_config()
+        # 未找到工具时选项被禁用，保留勾选状态但不使用
+        config['use_aria2'] = config['use_aria2'] and self.use_aria2.isEnabled()
+        config['use_mp4box'] = config['use_mp4box'] and self.use_mp4box.isEnabled()
+        return BilibiliSpec.from_config(url, config)
+
+    def save_config(self):
+        """保存配置（延迟写入文件）"""
+        if self.settings is not None:
+            self.settings.update(self.get_config())
@@ -0,0 +1,78 @@
+import json
+from PySide6.QtCore import QObject, QUrl, QUrlQuery, Signal
+from PySide6.QtNetwork import QNetworkRequest, QNetworkReply
+from lib.libs.url_classifier import search_url
+
+# 请求B站接口时使用的请求头，缺少时部分接口会拒绝请求
+_USER_AGENT = (
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/126.0 Safari/537.36"
+)
+_REFERER = "https://www.bilibili.com/"
+
+
+def parse_video_id(text):
+    """从地址或编号中提取视频编号，返回 ("bvid", "BV...") 或 ("aid", "123")，无法识别时返回None"""
+    match = search_url(text, "bilibili", "video")
+    if match is None:
+        return None
+    if match.id.startswith("BV"):
+        return "bvid", match.id
+    return "aid", match.id[2:]
+
+
+def bilibili_request(url):
+    """创建带有浏览器请求头的B站接口请求"""
+    request = QNetworkRequest(url)
+    request.setHeader(QNetworkRequest.KnownHeaders.UserAgentHeader, _USER_AGENT)
+    request.setRawHeader(b"Referer", _REFERER.encode())
+    return request
+
+
+class BilibiliMetadataFetcher(QObject):
+    """直接请求视频信息接口（x/web-interface/view），不需要启动BBDown"""
+
+    API_BASE = "https://api.bilibili.com"
+
+    # (视频编号, 接口返回的完整JSON)
+    fetched = Signal(str, object)
+    # (视频编号, 错误信息)
+    failed = Signal(str, str)
+
+    def __init__(self, net_manager, parent=None, api_base=API_BASE):
+        super().__init__(parent)
+        self.net_manager = net_manager
+        # 可指向本地测试服务器
+        self.api_base = api_base.rstrip("/")
+
+    def fetch(self, text):
+        """异步获取视频信息，text无法识别为视频编号时返回False"""
+        video_id = parse_video_id(text)
+        if video_id is None:
+            return False
+        key, value = video_id
+        url = QUrl(f"{self.api_base}/x/web-interface/view")
+        query = QUrlQuery()
+        query.addQueryItem(key, value)
+        url.setQuery(query)
+
+        reply = self.net_manager.get(bilibili_request(url))
+        reply.finished.connect(lambda: self._on_finished(reply, value))
+        return True
+
+    def _on_finished(self, reply, video_id):
+        try:
+            if reply.error() != QNetworkReply.NetworkError.NoError:
+                self.failed.emit(video_id, reply.errorString())
+                return
+            try:
+                response = json.loads(reply.readAll().data())
+            except ValueError as e:
+                self.failed.emit(video_id, f"解析响应失败: {e}")
+                return
+            if response.get("code") != 0:
+                self.failed.emit(video_id, response.get("message", "未知错误"))
+                return
+            self.fetched.emit(video_id, response)
+        finally:
+            reply.deleteLater()
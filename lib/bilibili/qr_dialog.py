@@ -1,17 +1,53 @@
 import os
+import re
 from PySide6.QtWidgets import QDialog, QVBoxLayout, QLabel, QPushButton
-from PySide6.QtCore import QTimer, Qt
-from PySide6.QtGui import QPixmap
+from PySide6.QtCore import QFileSystemWatcher, QTimer, Qt
+from PySide6.QtGui import QImage, QImageReader, QPixmap
+from lib.libs.qr_code import qr_matrix
+
+# BBDown输出中的扫码登录地址（网页端 qrcode_key/oauthKey，TV端 auth_code）
+_LOGIN_URL_PATTERN = re.compile(r"https?://\S+?[?&](?:qrcode_key|oauthKey|auth_code)=[\w-]+")
+
+
+def render_qr_code(text, module_size=8, border=2):
+    """根据文字直接生成二维码图片，不必等待BBDown写入图片，内容过长时返回None"""
+    try:
+        matrix = qr_matrix(text)
+    except ValueError:
+        return None
+    size = len(matrix) + border * 2
+    image = QImage(size, size, QImage.Format.Format_RGB32)
+    image.fill(0xFFFFFFFF)
+    for y, row in enumerate(matrix):
+        for x, dark in enumerate(row):
+            if dark:
+                image.setPixel(x + border, y + border, 0xFF000000)
+    return image.scaled(image.width() * module_size, image.height() * module_size,
+                        Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.FastTransformation)
 
 
 class QRCodeDialog(QDialog):
-    """二维码展示弹窗"""
+    """二维码展示弹窗
+
+    监视BBDown在登录工作目录中写入的 qrcode.png，只有文件的修改时间或大小变化时才重新解码；
+    BBDown输出登录地址时直接生成二维码。
+    """
+
+    QR_SIZE = 300
+    # 文件还没写完导致解码失败时，稍后重试（毫秒）
+    RETRY_DELAY = 100
+    MAX_RETRIES = 20
 
-    def __init__(self, parent=None):
+    def __init__(self, qr_path, parent=None):
         super().__init__(parent)
         self.setWindowTitle("二维码登录")
         self.setModal(False)
         self.resize(400, 400)
+        self.qr_path = str(qr_path)
+        # 上次解码的文件 (修改时间, 大小)
+        self._file_signature = None
+        self._login_url = None
+        self._retries = 0
 
         layout = QVBoxLayout(self)
 
@@ -21,38 +57,80 @@ class QRCodeDialog(QDialog):
         layout.addWidget(self.info_label)
 
         # 二维码图片标签
-        self.qr_label = QLabel()
+        self.qr_label = QLabel("等待生成二维码...")
         self.qr_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.qr_label.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+        self.qr_label.setWordWrap(True)
         layout.addWidget(self.qr_label)
 
         # 刷新按钮
         self.refresh_button = QPushButton("刷新二维码")
-        self.refresh_button.clicked.connect(self.load_qr_code)
+        self.refresh_button.clicked.connect(self.reload_qr_code)
         layout.addWidget(self.refresh_button)
 
-        # 定时器定期检查二维码图片
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.load_qr_code)
-        self.timer.start(2000)  # 每2秒刷新一次
+        # 监视目录（文件创建）和文件本身（文件被重写）
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.addPath(os.path.dirname(self.qr_path))
+        self.watcher.directoryChanged.connect(self.load_qr_code)
+        self.watcher.fileChanged.connect(self.load_qr_code)
+        self.retry_timer = QTimer(self)
+        self.retry_timer.setSingleShot(True)
+        self.retry_timer.setInterval(self.RETRY_DELAY)
+        self.retry_timer.timeout.connect(self.load_qr_code)
 
         # 初始化加载二维码
         self.load_qr_code()
 
+    def reload_qr_code(self):
+        """不论文件是否变化都重新读取"""
+        self._file_signature = None
+        self.load_qr_code()
+
     def load_qr_code(self):
-        """加载并显示二维码图片"""
-        qr_path = os.path.join(os.getcwd(), "qrcode.png")
-        if os.path.exists(qr_path):
-            pixmap = QPixmap(qr_path)
-            if not pixmap.isNull():
-                # 缩放图片以适应窗口
-                pixmap = pixmap.scaled(
-                    300,
-                    300,
-                    Qt.AspectRatioMode.KeepAspectRatio,
-                    Qt.TransformationMode.SmoothTransformation,
-                )
-                self.qr_label.setPixmap(pixmap)
+        """二维码文件变化后重新加载"""
+        try:
+            stat = os.stat(self.qr_path)
+        except OSError:
+            return
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature == self._file_signature or stat.st_size == 0:
+            return
+        # 文件被替换后需要重新监视
+        if self.qr_path not in self.watcher.files():
+            self.watcher.addPath(self.qr_path)
+        image = QImageReader(self.qr_path).read()
+        if image.isNull():
+            # 可能还没写完，稍后重试
+            self._retries += 1
+            if self._retries <= self.MAX_RETRIES:
+                self.retry_timer.start()
             else:
                 self.qr_label.setText("二维码图片加载失败")
-        else:
-            self.qr_label.setText("等待生成二维码...")
\ No newline at end of file
+            return
+        self._retries = 0
+        self._file_signature = signature
+        self._show_image(image)
+
+    def handle_output(self, lines):
+        """从BBDown的输出中读取登录地址，生成二维码"""
+        for line in lines:
+            match = _LOGIN_URL_PATTERN.search(line)
+            if match is None or match.group(0) == self._login_url:
+                continue
+            self._login_url = match.group(0)
+            image = render_qr_code(self._login_url)
+            if image is not None:
+                self._show_image(image)
+            elif self._file_signature is None:
+                # 没有二维码图片时显示地址，可在手机上打开
+                self.qr_label.setText(self._login_url)
+
+    def _show_image(self, image):
+        # 二维码使用最近邻缩放，保持边缘清晰
+        pixmap = QPixmap.fromImage(image).scaled(
+            self.QR_SIZE,
+            self.QR_SIZE,
+            Qt.AspectRatioMode.KeepAspectRatio,
+            Qt.TransformationMode.FastTransformation,
+        )
+        self.qr_label.setPixmap(pixmap)
@@ -0,0 +1,189 @@
+import json
+import os
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from PySide6.QtCore import QObject, QTimer, QUrl, Signal
+from PySide6.QtNetwork import QNetworkRequest
+from lib.libs.app_dirs import cache_path
+from lib.bilibili.metadata_fetcher import bilibili_request
+
+# 跳转后的地址中需要保留的查询参数（其余为分享来源等跟踪参数）
+_KEEP_QUERY = ("p", "t")
+
+
+def clean_target(url):
+    """去掉跳转地址中的跟踪参数"""
+    parts = urlsplit(url)
+    query = urlencode([(key, value) for key, value in parse_qsl(parts.query) if key in _KEEP_QUERY])
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, query, ""))
+
+
+class ShortLinkResolver(QObject):
+    """解析 b23.tv 等短链接的跳转目标
+
+    只发送HEAD请求并手动处理跳转，不下载页面内容；多个短链接同时解析，
+    结果保存在磁盘上，同一短链接只请求一次。
+    """
+
+    # 最多跟随的跳转次数（短链接可能先跳转到另一个短链接）
+    MAX_REDIRECTS = 5
+    # 最多保存的解析结果数
+    MAX_ENTRIES = 5000
+    # 写入缓存文件的延迟（毫秒），合并多次写入
+    SAVE_DELAY = 2000
+
+    # (短链接, 跳转目标)
+    resolved = Signal(str, str)
+    # (短链接, 错误信息)
+    failed = Signal(str, str)
+
+    def __init__(self, net_manager, parent=None, cache_file=cache_path / "short_links.json"):
+        super().__init__(parent)
+        self.net_manager = net_manager
+        self.cache_file = cache_file
+        # 短链接 -> 跳转目标，第一次使用时读取
+        self._cache = None
+        # 正在解析的短链接
+        self._pending = set()
+        self._save_timer = QTimer(self)
+        self._save_timer.setSingleShot(True)
+        self._save_timer.setInterval(self.SAVE_DELAY)
+        self._save_timer.timeout.connect(self.save)
+
+    @staticmethod
+    def _key(url):
+        parts = urlsplit(url.strip())
+        return parts.netloc.lower() + parts.path.rstrip("/")
+
+    def cached(self, url):
+        """返回已解析过的跳转目标，没有时返回None"""
+        if self._cache is None:
+            self._load()
+        return self._cache.get(self._key(url))
+
+    def resolve(self, url):
+        """异步解析短链接，已缓存时立即发出resolved信号"""
+        target = self.cached(url)
+        if target is not None:
+            self.resolved.emit(url, target)
+            return
+        if url in self._pending:
+            return
+        self._pending.add(url)
+        self._request(url, url, 0)
+
+    def _request(self, url, current, redirects):
+        request = bilibili_request(QUrl(current))
+        request.setAttribute(QNetworkRequest.Attribute.RedirectPolicyAttribute,
+                             QNetworkRequest.RedirectPolicy.ManualRedirectPolicy)
+        reply = self.net_manager.head(request)
+        reply.finished.connect(lambda: self._on_finished(reply, url, redirects))
+
+    def _on_finished(self, reply, url, redirects):
+        try:
+            status = reply.attribute(QNetworkRequest.Attribute.HttpStatusCodeAttribute)
+            location = reply.attribute(QNetworkRequest.Attribute.RedirectionTargetAttribute)
+            if status in (301, 302, 303, 307, 308) and location is not None:
+                # Location 可能是相对地址
+                target = reply.url().resolved(location).toString()
+                if self._key(target) != self._key(url) and urlsplit(target).netloc.lower() == urlsplit(url).netloc.lower():
+                    # 跳转到同一站点的另一个短链接，继续跟随
+                    if redirects + 1 >= self.MAX_REDIRECTS:
+                        self._fail(url, "跳转次数过多")
+                    else:
+                        self._request(url, target, redirects + 1)
+                    return
+                self._succeed(url, clean_target(target))
+            elif status is None:
+                self._fail(url, reply.errorString())
+            else:
+                self._fail(url, f"未返回跳转地址 (HTTP {status})")
+        finally:
+            reply.deleteLater()
+
+    def _succeed(self, url, target):
+        self._pending.discard(url)
+        self._cache[self._key(url)] = target
+        while len(self._cache) > self.MAX_ENTRIES:
+            # 删除最早加入的条目
+            del self._cache[next(iter(self._cache))]
+        self._save_timer.start()
+        self.resolved.emit(url, target)
+
+    def _fail(self, url, message):
+        self._pending.discard(url)
+        self.failed.emit(url, message)
+
+    def _load(self):
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                self._cache = json.load(f)
+        except (OSError, ValueError):
+            self._cache = {}
+        if not isinstance(self._cache, dict):
+            self._cache = {}
+
+    def save(self):
+        """写入缓存文件（程序退出前也应调用一次）"""
+        self._save_timer.stop()
+        if not self._cache:
+            return
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            # 先写临时文件再替换，避免写入中断时损坏缓存
+            temp_file = self.cache_file.with_suffix(".tmp")
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(self._cache, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(temp_file, self.cache_file)
+        except OSError as e:
+            print(f"写入短链接缓存失败: {e}")
+
+
+if __name__ == "__main__":
+    # 使用本地跳转服务器测试: python -m lib.bilibili.short_link_resolver
+    import sys
+    import tempfile
+    import threading
+    from pathlib import Path
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from PySide6.QtCore import QCoreApplication
+    from PySide6.QtNetwork import QNetworkAccessManager
+
+    class RedirectHandler(BaseHTTPRequestHandler):
+        """/a -> /b（同站短链接） -> bilibili视频地址；/missing 返回404"""
+
+        def do_HEAD(self):
+            if self.path.startswith("/a"):
+                self.send_response(302)
+                self.send_header("Location", "/b" + self.path[2:])
+            elif self.path.startswith("/b"):
+                self.send_response(302)
+                self.send_header("Location", f"https://www.bilibili.com/video/BV1xx411c7mu?p=2&share_source=copy{self.path[2:]}")
+            else:
+                self.send_response(404)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RedirectHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+
+    app = QCoreApplication(sys.argv)
+    resolver = ShortLinkResolver(QNetworkAccessManager(), cache_file=Path(tempfile.mkdtemp()) / "short_links.json")
+    urls = [f"{base}/a{index}" for index in range(20)] + [f"{base}/missing"]
+    remaining = set(urls)
+
+    def done(url, result):
+        print(f"{url} -> {result}")
+        remaining.discard(url)
+        if not remaining:
+            resolver.save()
+            print(f"缓存: {resolver.cache_file.read_text()[:200]}...")
+            app.quit()
+
+    resolver.resolved.connect(done)
+    resolver.failed.connect(lambda url, message: done(url, f"失败: {message}"))
+    for url in urls:
+        resolver.resolve(url)
+    sys.exit(app.exec())
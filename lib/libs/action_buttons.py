@@ -1,6 +1,9 @@
 from pathlib import Path
 from PySide6.QtWidgets import QHBoxLayout, QPushButton, QMessageBox
-from lib.bilibili.qr_dialog import QRCodeDialog
+from lib.libs.download_queue import JobState
+from lib.libs.progress_parser import format_size
+from lib.libs.url_classifier import classify_url
+from lib.libs.app_dirs import data_path
 from PySide6.QtCore import QProcess
 
 
@@ -12,6 +15,9 @@ class ActionButtons:
         self.info_button = None
         self.login_button = None
         self.qr_dialog = None
+        self._login_prompt_open = False
+        # 已展开出视频的合集地址
+        self._expanded_sources = set()
 
     def create_action_buttons(self, layout):
         """创建执行按钮区域"""
@@ -82,37 +88,115 @@ class ActionButtons:
         layout.addLayout(buttons_layout)
         
     def start_download(self):
-        """开始下载"""
-        # 根据模式选择命令构建器
-        if self.parent.mode == "youtube":
-            command = self.parent.youtube_command_builder.build_command()
-        else:
-            command = self.parent.command_builder.build_command()
-            
-        if command:
-            self.parent.output_area.clear_output()
-            self.parent.output_area.append_output(f"执行命令: {' '.join(command)}")
-            self.parent.process_handler.process.start(command[0], command[1:])
-            self.download_button.setEnabled(False)
-        else:
-            self.download_button.setEnabled(True)
-            
+        """开始下载，输入框中的多个地址会分别加入下载队列"""
+        self._enqueue_urls(info_only=False)
+
     def show_info(self):
         """仅显示信息"""
-        # 根据模式选择命令构建器
-        if self.parent.mode == "youtube":
-            command = self.parent.youtube_command_builder.build_command(info_only=True)
-        else:
-            command = self.parent.command_builder.build_command(info_only=True)
-            
-        if command:
-            self.parent.output_area.clear_output()
-            self.parent.output_area.append_output(f"执行命令: {' '.join(command)}")
-            self.parent.process_handler.process.start(command[0], command[1:])
-            self.info_button.setEnabled(False)
-        else:
-            self.info_button.setEnabled(True)
-            
+        self._enqueue_urls(info_only=True)
+
+    def _enqueue_urls(self, info_only):
+        """为输入框中的每个地址构建命令并加入下载队列"""
+        urls = self.parent.url_input.text().split()
+        if not urls:
+            # 交给当前模式的命令构建器弹出输入提示
+            self._builder(self.parent.mode).build_command(info_only=info_only)
+            return
+
+        # 从缓存或接口先显示第一个视频的信息
+        self.parent.load_video_info(urls[0])
+
+        first_job = None
+        for url in urls:
+            # 下载时将合集、收藏夹等展开为单个视频，分散到多个下载进程
+            if not info_only and self.parent.collection_expander.expand(url):
+                self.parent.output_area.append_output(f"正在获取视频列表: {url}")
+                continue
+            job = self._enqueue_url(url, info_only)
+            if job is False:
+                break
+            first_job = first_job or job
+        # 显示本次添加的第一个任务的输出
+        if first_job:
+            self.parent.output_area.show_channel(first_job.job_id)
+        self.update_queue_status()
+
+    def _builder(self, mode):
+        # YouTube相关对象在第一次使用时才创建，只访问需要的一个
+        if mode == "youtube":
+            return self.parent.youtube_command_builder
+        return self.parent.command_builder
+
+    def _options(self, mode):
+        if mode == "youtube":
+            return self.parent.youtube_options
+        return self.parent.download_options
+
+    def _enqueue_url(self, url, info_only):
+        """构建单个地址的命令并加入队列，返回任务；已下载过时返回None，无法构建命令时返回False"""
+        # 每个地址按自身类型选择命令构建器，无法识别时使用当前模式
+        match = classify_url(url)
+        mode = match.site if match else self.parent.mode
+        # 已下载过的视频不再启动下载进程
+        if not info_only and self.parent.download_history.has_url(url):
+            self.parent.output_area.append_output(f"已下载过，跳过: {url}")
+            return None
+        command = self._builder(mode).build_command(info_only=info_only, url=url)
+        if not command:
+            return False
+        job = self.parent.download_queue.enqueue(
+            url, mode, command, spec=self._options(mode).to_spec(url), info_only=info_only)
+        self.parent.output_area.append_output(f"执行命令: {' '.join(command)}", job.job_id)
+        return job
+
+    def resume_jobs(self):
+        """恢复上次关闭或崩溃时未完成的下载任务"""
+        store = self.parent.job_store
+        store.attach(self.parent.download_queue)
+        resumed = 0
+        for key, mode, url, spec in store.unfinished():
+            # 已下载过的视频不再下载
+            if self.parent.download_history.has_url(url):
+                store.discard(key)
+                continue
+            command = self._builder(mode).build_command_from_spec(spec)
+            # 找不到BBDown/yt-dlp时保留任务，下次启动时再恢复
+            if not command or not command[0]:
+                continue
+            job = self.parent.download_queue.enqueue(url, mode, command, spec=spec, store_key=key)
+            if job.store_key != key:
+                # 相同地址的任务已在队列中
+                store.discard(key)
+                continue
+            self.parent.output_area.append_output(f"执行命令: {' '.join(command)}", job.job_id)
+            resumed += 1
+        if resumed:
+            self.parent.output_area.append_output(f"已恢复上次未完成的 {resumed} 个任务")
+            self.update_queue_status()
+
+    def collection_items_found(self, source, urls):
+        """合集等展开出一页视频后立即加入队列"""
+        self._expanded_sources.add(source)
+        for url in urls:
+            if self._enqueue_url(url, False) is False:
+                break
+        self.update_queue_status()
+
+    def collection_expanded(self, source, count):
+        self._expanded_sources.discard(source)
+        self.parent.output_area.append_output(f"{source} 共 {count} 个视频")
+
+    def collection_expand_failed(self, source, message):
+        """展开失败时，若还没有加入任何视频，则整体交给BBDown下载"""
+        self.parent.output_area.append_output(f"获取视频列表失败 {source}: {message}")
+        if source in self._expanded_sources:
+            self._expanded_sources.discard(source)
+            return
+        job = self._enqueue_url(source, False)
+        if job:
+            self.parent.output_area.show_channel(job.job_id)
+        self.update_queue_status()
+
     def login_account(self):
         """登录账号"""
         # YouTube模式下不需要登录
@@ -120,19 +204,26 @@ class ActionButtons:
             QMessageBox.information(self.parent, "提示", "YouTube模式下无需登录B站账号")
             return
             
-        self.parent.output_area.clear_output()
+        # BBDown将二维码写入工作目录，使用单独的目录，弹窗只监视这一个文件
+        login_dir = data_path / "login"
+        login_dir.mkdir(parents=True, exist_ok=True)
+        qr_path = login_dir / "qrcode.png"
+        # 删除上次登录留下的过期二维码
+        qr_path.unlink(missing_ok=True)
+
         self.parent.output_area.append_output("执行命令: BBDown login")
-        self.parent.process_handler.process.start("BBDown", ["login"])
+        process = self.parent.process_handler.process
+        process.setWorkingDirectory(str(login_dir))
+        process.start(self.parent.command_builder.BBDown_PATH or "BBDown", ["login"])
         self.login_button.setEnabled(False)
         
-        # 显示二维码弹窗
-        self.qr_dialog = QRCodeDialog(self.parent)
+        # 显示二维码弹窗（第一次登录时才导入）
+        from lib.bilibili.qr_dialog import QRCodeDialog
+        self.qr_dialog = QRCodeDialog(qr_path, self.parent)
         self.qr_dialog.show()
         
     def process_finished(self):
-        """进程结束处理"""
-        self.download_button.setEnabled(True)
-        self.info_button.setEnabled(True)
+        """登录进程结束处理"""
         self.login_button.setEnabled(True)
         self.parent.output_area.append_output("操作完成")
         
@@ -140,8 +231,53 @@ class ActionButtons:
         if hasattr(self, 'qr_dialog') and self.qr_dialog:
             self.qr_dialog.close()
             self.qr_dialog = None
-        # 清理 debug 文件
-        self.clean_debug_files()
+
+    def job_finished(self, job):
+        """下载任务结束处理"""
+        result = "完成" if job.state == JobState.DONE else "失败"
+        if job.state == JobState.DONE and not job.info_only:
+            self.parent.download_history.record_job(job)
+        self.parent.output_area.append_output(f"任务{result}", job.job_id)
+        self.parent.output_area.append_output(f"[#{job.job_id}] 任务{result}: {job.url}")
+        self.parent.output_area.set_channel_title(job.job_id, f"#{job.job_id} {result}")
+        self.update_queue_status()
+        # 所有任务结束后清理 debug 文件
+        if self.parent.download_queue.is_idle():
+            self.clean_debug_files()
+
+    def update_queue_status(self):
+        """在状态栏显示下载队列状态"""
+        pending, running = self.parent.download_queue.counts()
+        if pending or running:
+            self.parent.statusBar().showMessage(f"运行中: {running}  排队中: {pending}")
+        else:
+            self.parent.statusBar().showMessage("就绪")
+            self.parent.progress_bar.setVisible(False)
+
+    def update_progress(self, job, event):
+        """根据所有运行中任务的最新进度更新进度条"""
+        downloaded = total = speed = 0
+        percents = []
+        for running_job in self.parent.download_queue.running_jobs():
+            progress = running_job.progress
+            if progress is None:
+                continue
+            if progress.downloaded is not None and progress.total:
+                downloaded += progress.downloaded
+                total += progress.total
+            elif progress.percent is not None:
+                percents.append(progress.percent)
+            speed += progress.speed or 0
+        if total:
+            percent = downloaded * 100 / total
+        elif percents:
+            percent = sum(percents) / len(percents)
+        else:
+            return
+        progress_bar = self.parent.progress_bar
+        progress_bar.setVisible(True)
+        progress_bar.setValue(int(percent))
+        progress_bar.setFormat(f"%p%  {format_size(speed)}/s" if speed else "%p%")
 
     def clean_debug_files(self):
         """清理调试文件"""
@@ -154,19 +290,22 @@ class ActionButtons:
             
     def handle_not_logged_in(self):
         """处理未登录状态"""
+        # 多个任务同时提示未登录时只弹出一次，登录过程中也不再重复询问
+        if self._login_prompt_open or self.parent.process_handler.process.state() != QProcess.ProcessState.NotRunning:
+            return
+        self._login_prompt_open = True
         # 弹出提示框询问用户是否要登录
         reply = QMessageBox.question(self.parent, "未登录提示", 
                                    "检测到您尚未登录B站账号，解析可能受到限制。是否立即登录？", 
                                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        self._login_prompt_open = False
         
         if reply == QMessageBox.StandardButton.Yes:
-            # 中断当前进程
-            if self.parent.process and self.parent.process_handler.state() == QProcess.ProcessState.Running:
-                self.parent.process_handler.kill()
-                self.parent.process_handler.waitForFinished()
+            # 中断当前所有下载任务
+            self.parent.download_queue.stop_all()
             
             # 触发登录操作
             self.login_account()
         else:
             # 用户选择不登录，继续当前操作
-            pass
\ No newline at end of file
+            pass
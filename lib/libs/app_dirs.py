@@ -0,0 +1,5 @@
+from pathlib import Path
+
+# 程序自身的数据目录（缓存、下载记录等），与 ~/.BBDown.yaml 同在用户目录下
+data_path = Path.home() / ".BBDown-UI"
+cache_path = data_path / "cache"
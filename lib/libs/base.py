@@ -1,10 +1,21 @@
-from PySide6.QtWidgets import QFileDialog
+from PySide6.QtWidgets import QFileDialog, QCheckBox, QComboBox, QLineEdit, QSpinBox
 from pathlib import Path
 from PySide6.QtCore import QUrl
 from PySide6.QtGui import QDesktopServices
 from lib.libs.download_dir import downloads_path
 
 class OptionsBase(object):
+    def connect_changes(self, callback):
+        """选项区域内任意控件修改时调用callback()"""
+        for checkbox in self.options_group.findChildren(QCheckBox):
+            checkbox.toggled.connect(lambda *args: callback())
+        for combo in self.options_group.findChildren(QComboBox):
+            combo.currentIndexChanged.connect(lambda *args: callback())
+        for line_edit in self.options_group.findChildren(QLineEdit):
+            line_edit.textChanged.connect(lambda *args: callback())
+        for spin_box in self.options_group.findChildren(QSpinBox):
+            spin_box.valueChanged.connect(lambda *args: callback())
+
     def browse_directory(self):
         """浏览目录选择"""
         current_dir = self.work_dir.text().strip()
@@ -0,0 +1,268 @@
+import sys
+from PySide6.QtCore import QObject, QCoreApplication, QTimer
+from PySide6.QtNetwork import QNetworkAccessManager
+from lib.libs.download_queue import DownloadQueue, JobState
+from lib.libs.download_spec import BilibiliSpec, YouTubeSpec
+from lib.libs.download_history import DownloadHistory
+from lib.libs.settings_store import read_config
+from lib.libs.tool_registry import ToolRegistry
+from lib.libs.job_store import JobStore
+from lib.libs.subscriptions import SubscriptionStore, SubscriptionSync
+from lib.libs.stream_decoder import StreamDecoder
+from lib.libs.progress_parser import ProgressParser, YTDLP_PROGRESS_PREFIX, format_size
+from lib.libs.url_classifier import classify_url, canonical_video_key
+from lib.bilibili.command_builder import CommandBuilder
+from lib.bilibili.collection_expander import CollectionExpander
+from lib.youtube.youtube_command_builder import YouTubeCommandBuilder
+
+
+def read_urls(source):
+    """读取地址列表，source为"-"时读取标准输入；忽略空行和#开头的注释"""
+    if source == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(source, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+    urls = []
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            urls.extend(line.split())
+    return urls
+
+
+def load_config(config_file):
+    """读取配置文件，返回 (bilibili段, youtube段)"""
+    all_config = read_config(config_file)
+    return all_config.get('bilibili') or {}, all_config.get('youtube') or {}
+
+
+class BatchRunner(QObject):
+    """无界面批量下载，复用下载队列和命令构建器"""
+
+    def __init__(self, urls, config_file, parent=None, sync=False):
+        super().__init__(parent)
+        self.urls = urls
+        self.bilibili_config, self.youtube_config = load_config(config_file)
+        self.queue = DownloadQueue(self, {
+            "bilibili": self.bilibili_config.get("max_workers", DownloadQueue.DEFAULT_LIMITS["bilibili"]),
+            "youtube": self.youtube_config.get("youtube_max_workers", DownloadQueue.DEFAULT_LIMITS["youtube"]),
+        })
+        self.queue.job_output.connect(self.handle_job_output)
+        self.queue.job_finished.connect(self.job_finished)
+        self.queue.queue_idle.connect(self._check_finished)
+
+        self.tools = ToolRegistry(parent=self)
+        self.command_builder = CommandBuilder(tools=self.tools)
+        # 与界面一致，PATH中找不到BBDown时使用配置文件中记录的路径
+        self.command_builder.fallback_path = self.bilibili_config.get("BBDown_PATH") or None
+        self.youtube_command_builder = YouTubeCommandBuilder(tools=self.tools)
+        self.history = DownloadHistory()
+        # 任务保存到持久化存储，中断后下次运行时恢复
+        self.store = JobStore(parent=self)
+        self.net_manager = QNetworkAccessManager(self)
+        self.expander = CollectionExpander(self.net_manager, self)
+        self.expander.items_found.connect(self.collection_items_found)
+        self.expander.finished.connect(self.collection_expanded)
+        self.expander.failed.connect(self.collection_expand_failed)
+        # 已展开出视频的合集地址
+        self.expanded_sources = set()
+        # 增量同步订阅
+        self.sync = None
+        if sync:
+            self.sync = SubscriptionSync(SubscriptionStore(), self.net_manager,
+                                         self.youtube_command_builder.YT_DLP_PATH, self)
+            self.sync.new_items.connect(self.subscription_items_found)
+            self.sync.failed.connect(lambda url, message: print(f"同步失败 {url}: {message}", file=sys.stderr))
+            self.sync.finished.connect(self.subscriptions_synced)
+        # 展开后的地址总数
+        self.total = 0
+        # 已加入队列的视频的规范编号（不是单个视频时为地址本身），用于去重
+        self.queued_keys = set()
+        self.failed = 0
+        # 下载失败的视频的规范编号，订阅的标记不会越过这些视频
+        self.failed_keys = set()
+        self.done = False
+        # 每个任务每个输出流一个增量解码器
+        self.decoders = {}
+        # 每个任务一个进度解析器
+        self.parsers = {}
+
+    def start(self):
+        """将所有地址加入队列，合集等先展开为单个视频"""
+        self.store.attach(self.queue)
+        self._resume()
+        for url in self.urls:
+            if self.expander.expand(url):
+                print(f"正在获取视频列表: {url}", flush=True)
+                continue
+            self._enqueue(url)
+        if self.sync is not None:
+            self.sync.start()
+        self._check_finished()
+
+    def _enqueue(self, url):
+        # 同一视频（如地址列表和合集中重复出现）只加入一次
+        key = canonical_video_key(url) or url
+        if key in self.queued_keys:
+            return
+        self.queued_keys.add(key)
+        self.total += 1
+        if self.history.has_url(url):
+            print(f"跳过 {url}: 已下载过", flush=True)
+            return
+        match = classify_url(url)
+        if match is not None and match.site == "youtube":
+            mode = "youtube"
+            spec = YouTubeSpec.from_config(url, self.youtube_config)
+            command = self.youtube_command_builder.build_command_from_spec(spec)
+        else:
+            mode = "bilibili"
+            spec = BilibiliSpec.from_config(url, self.bilibili_config)
+            command = None
+            if self.command_builder.BBDown_PATH:
+                command = self.command_builder.build_command_from_spec(spec)
+        if not command:
+            print(f"跳过 {url}: 未找到{'yt-dlp' if mode == 'youtube' else 'BBDown'}程序", file=sys.stderr)
+            self.failed += 1
+            self.failed_keys.add(canonical_video_key(url))
+            return
+        job = self.queue.enqueue(url, mode, command, spec=spec)
+        print(f"[#{job.job_id}] 执行命令: {' '.join(command)}", flush=True)
+
+    def _resume(self):
+        """先恢复上次中断时未完成的任务"""
+        for key, mode, url, spec in self.store.unfinished():
+            if self.history.has_url(url):
+                self.store.discard(key)
+                continue
+            if mode == "youtube":
+                command = self.youtube_command_builder.build_command_from_spec(spec)
+            else:
+                command = self.command_builder.build_command_from_spec(spec) if self.command_builder.BBDown_PATH else None
+            if not command:
+                # 找不到BBDown/yt-dlp时保留任务，下次运行时再恢复
+                continue
+            job = self.queue.enqueue(url, mode, command, spec=spec, store_key=key)
+            if job.store_key != key:
+                # 同一视频已在队列中，放弃这条记录，避免每次运行都恢复它
+                self.store.discard(key)
+                continue
+            self.queued_keys.add(canonical_video_key(url) or url)
+            self.total += 1
+            print(f"[#{job.job_id}] 恢复任务: {' '.join(command)}", flush=True)
+
+    def collection_items_found(self, source, urls):
+        self.expanded_sources.add(source)
+        for url in urls:
+            self._enqueue(url)
+
+    def collection_expanded(self, source, count):
+        print(f"{source} 共 {count} 个视频", flush=True)
+        self._check_finished()
+
+    def collection_expand_failed(self, source, message):
+        """展开失败且还没有加入任何视频时，整体交给BBDown下载"""
+        print(f"获取视频列表失败 {source}: {message}", file=sys.stderr)
+        if source not in self.expanded_sources:
+            self._enqueue(source)
+        self._check_finished()
+
+    def subscription_items_found(self, source, urls):
+        print(f"{source} 有 {len(urls)} 个新视频", flush=True)
+        for url in urls:
+            self._enqueue(url)
+
+    def subscriptions_synced(self, count):
+        print(f"订阅同步完成，共 {count} 个新视频", flush=True)
+        self._check_finished()
+
+    def _check_finished(self):
+        if self.queue.is_idle() and not self.expander.pending and not (self.sync and self.sync.pending):
+            self.finish()
+
+    def handle_job_output(self, job, data, is_stderr):
+        """输出任务日志到终端"""
+        decoder = self._decoder(job, is_stderr)
+        lines = decoder.feed(data.data())
+        self._print_lines(job, self._parse_progress(job, lines), is_stderr)
+
+    def _parse_progress(self, job, lines):
+        """记录任务进度，返回需要打印的行"""
+        parser = self.parsers.get(job.job_id)
+        if parser is None:
+            parser = self.parsers[job.job_id] = ProgressParser(job.mode)
+        event = None
+        for line in lines:
+            event = parser.parse(line) or event
+        if event is not None:
+            self.queue.report_progress(job, event)
+        if job.mode == "youtube":
+            return [line for line in lines if not line.startswith(YTDLP_PROGRESS_PREFIX)]
+        return lines
+
+    def _decoder(self, job, is_stderr):
+        key = (job.job_id, is_stderr)
+        if key not in self.decoders:
+            self.decoders[key] = StreamDecoder()
+        return self.decoders[key]
+
+    @staticmethod
+    def _print_lines(job, lines, is_stderr):
+        if not lines:
+            return
+        stream = sys.stderr if is_stderr else sys.stdout
+        for line in lines:
+            print(f"[#{job.job_id}] {line}", file=stream)
+        stream.flush()
+
+    def job_finished(self, job):
+        for is_stderr in (False, True):
+            decoder = self.decoders.pop((job.job_id, is_stderr), None)
+            if decoder is not None:
+                self._print_lines(job, self._parse_progress(job, decoder.flush()), is_stderr)
+        self.parsers.pop(job.job_id, None)
+        if job.state == JobState.FAILED:
+            self.failed += 1
+            self.failed_keys.add(canonical_video_key(job.url))
+        else:
+            self.history.record_job(job)
+        result = "完成" if job.state == JobState.DONE else "失败"
+        # 输出下载量和平均速度，便于从日志中发现慢任务
+        speed = job.average_speed()
+        stats = f" ({format_size(job.progress.downloaded)}, 平均 {format_size(speed)}/s)" if speed else ""
+        print(f"[#{job.job_id}] 任务{result}: {job.url}{stats}", flush=True)
+
+    def finish(self):
+        """所有任务结束后退出事件循环，有失败任务时返回码为1"""
+        if self.done:
+            return
+        self.done = True
+        print(f"全部结束，共 {self.total} 个，失败 {self.failed} 个", flush=True)
+        if self.sync is not None:
+            # 下载结束后才更新订阅的标记
+            self.sync.commit(self.failed_keys)
+        self.history.close()
+        self.store.close()
+        QCoreApplication.exit(1 if self.failed else 0)
+
+
+def run_batch(source, config_file, sync=False, resume=False):
+    """批量模式入口，不创建任何窗口控件；sync为True时同时增量同步所有订阅
+
+    每次运行都会先恢复上次中断时未完成的任务，resume为True时允许不指定地址
+    """
+    app = QCoreApplication(sys.argv[:1])
+    app.setApplicationName("BBDown")
+    try:
+        urls = read_urls(source) if source else []
+    except (OSError, UnicodeDecodeError) as e:
+        print(f"读取地址列表失败: {e}", file=sys.stderr)
+        return 1
+    if not urls and not sync and not resume:
+        print("没有需要下载的地址", file=sys.stderr)
+        return 0
+    runner = BatchRunner(urls, config_file, sync=sync)
+    # 等事件循环启动后再开始，保证退出调用生效
+    QTimer.singleShot(0, runner.start)
+    return app.exec()
@@ -0,0 +1,258 @@
+import hashlib
+import math
+import re
+import sqlite3
+import struct
+import time
+from lib.libs.app_dirs import data_path
+from lib.libs.url_classifier import canonical_video_key, find_urls, av_to_bv
+
+# BBDown下载记录中的av号，如 "Aid": 170001 或 "avid":"170001"
+_ARCHIVE_AID_PATTERN = re.compile(r'"a(?:v)?id"\s*:\s*"?(\d+)', re.IGNORECASE)
+
+
+class BloomFilter:
+    """布隆过滤器：不在集合中的元素一定返回False，在集合中的元素可能误判为True"""
+
+    _HEADER = struct.Struct("<QQI")
+
+    def __init__(self, capacity, error_rate=0.001):
+        capacity = max(1, capacity)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        position = int.from_bytes(digest[:8], "little")
+        step = int.from_bytes(digest[8:], "little") | 1
+        for _ in range(self.hash_count):
+            yield position % self.size
+            position += step
+
+    def add(self, key):
+        """添加元素，count由调用方维护（重复添加同一元素不会改变结果）"""
+        bits = self.bits
+        for position in self._positions(key):
+            bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        bits = self.bits
+        for position in self._positions(key):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def to_bytes(self):
+        return self._HEADER.pack(self.count, self.size, self.hash_count) + bytes(self.bits)
+
+    @classmethod
+    def from_bytes(cls, data, capacity, error_rate=0.001):
+        """从 to_bytes 的结果恢复，参数与当前容量不一致时返回None"""
+        bloom = cls(capacity, error_rate)
+        if len(data) < cls._HEADER.size:
+            return None
+        count, size, hash_count = cls._HEADER.unpack_from(data)
+        if size != bloom.size or hash_count != bloom.hash_count or len(data) != cls._HEADER.size + len(bloom.bits):
+            return None
+        bloom.bits = bytearray(data[cls._HEADER.size:])
+        bloom.count = count
+        return bloom
+
+
+class DownloadHistory:
+    """已下载视频的记录
+
+    记录保存在SQLite数据库中（规范编号、画质、保存位置、大小），前面放一个布隆过滤器，
+    绝大多数未下载过的视频不需要查询数据库。数据库在第一次使用时才打开。
+    """
+
+    # 布隆过滤器的最小容量，记录数超过容量时按两倍扩容重建
+    MIN_CAPACITY = 1 << 16
+    ERROR_RATE = 0.001
+
+    def __init__(self, database=data_path / "history.db"):
+        self.database = database
+        self.bloom_file = database.with_suffix(".bloom")
+        self._connection = None
+        self._bloom = None
+        self._count = 0
+
+    def _connect(self):
+        if self._connection is not None:
+            return self._connection
+        self.database.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(self.database)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS downloads ("
+            "key TEXT PRIMARY KEY, quality TEXT, path TEXT, size INTEGER, finished_at REAL"
+            ") WITHOUT ROWID"
+        )
+        self._count = self._connection.execute("SELECT COUNT(*) FROM downloads").fetchone()[0]
+        self._load_bloom()
+        return self._connection
+
+    def _capacity(self):
+        capacity = self.MIN_CAPACITY
+        while capacity < self._count * 2:
+            capacity *= 2
+        return capacity
+
+    def _load_bloom(self):
+        """读取保存的过滤器，记录数不一致（如其他实例写入过）时从数据库重建"""
+        try:
+            bloom = BloomFilter.from_bytes(self.bloom_file.read_bytes(), self._capacity(), self.ERROR_RATE)
+        except OSError:
+            bloom = None
+        if bloom is None or bloom.count != self._count:
+            self._rebuild_bloom()
+        else:
+            self._bloom = bloom
+
+    def _rebuild_bloom(self):
+        self._bloom = BloomFilter(self._capacity(), self.ERROR_RATE)
+        for (key,) in self._connection.execute("SELECT key FROM downloads"):
+            self._bloom.add(key)
+        self._bloom.count = self._count
+
+    def _add_keys(self, keys, added):
+        """将写入数据库的记录加入过滤器，added为其中新增的数量，超过容量时重建"""
+        self._count += added
+        if self._count > self._bloom.capacity:
+            self._rebuild_bloom()
+            return
+        for key in keys:
+            self._bloom.add(key)
+        self._bloom.count = self._count
+
+    def contains(self, key):
+        """规范编号是否已下载"""
+        self._connect()
+        if key not in self._bloom:
+            return False
+        return self._connection.execute("SELECT 1 FROM downloads WHERE key = ?", (key,)).fetchone() is not None
+
+    def has_url(self, url):
+        """地址对应的视频是否已下载，合集等无法确定单个视频的地址返回False"""
+        key = canonical_video_key(url)
+        return key is not None and self.contains(key)
+
+    def get(self, key):
+        """返回 (画质, 保存位置, 大小, 完成时间)，没有记录时返回None"""
+        if not self.contains(key):
+            return None
+        return self._connection.execute(
+            "SELECT quality, path, size, finished_at FROM downloads WHERE key = ?", (key,)).fetchone()
+
+    def add(self, key, quality=None, path=None, size=None):
+        """添加或更新一条记录"""
+        is_new = not self.contains(key)
+        with self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO downloads VALUES (?, ?, ?, ?, ?)",
+                (key, quality, path, size, time.time()))
+        if is_new:
+            self._add_keys([key], 1)
+
+    def record_job(self, job):
+        """记录下载完成的任务"""
+        key = canonical_video_key(job.url)
+        if key is None:
+            return
+        quality = path = None
+        if job.spec is not None:
+            quality = (job.spec.dfn if job.mode == "bilibili" else job.spec.quality) or None
+            path = job.spec.work_dir or None
+        size = None
+        if job.progress is not None:
+            size = job.progress.total or job.progress.downloaded
+        self.add(key, quality, path, size)
+
+    def _import_keys(self, keys):
+        """批量导入，已有的记录保持不变，返回新增的数量"""
+        connection = self._connect()
+        now = time.time()
+        keys = list(dict.fromkeys(keys))
+        before = connection.total_changes
+        with connection:
+            connection.executemany(
+                "INSERT OR IGNORE INTO downloads (key, finished_at) VALUES (?, ?)",
+                ((key, now) for key in keys))
+        added = connection.total_changes - before
+        self._add_keys(keys, added)
+        self.save()
+        return added
+
+    def import_bbdown_archive(self, path):
+        """导入BBDown --save-archives-to-file 保存的下载记录，返回新增的数量"""
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            text = f.read()
+        keys = [canonical_video_key(match.url) for match in find_urls(text)]
+        keys.extend(f"bilibili:{av_to_bv(aid)}" for aid in _ARCHIVE_AID_PATTERN.findall(text))
+        return self._import_keys(key for key in keys if key)
+
+    def import_ytdlp_archive(self, path):
+        """导入yt-dlp --download-archive 文件（每行 "站点 视频ID"），返回新增的数量"""
+        keys = []
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 2:
+                    keys.append(f"{parts[0].lower()}:{parts[1]}")
+        return self._import_keys(keys)
+
+    def import_archive(self, path):
+        """根据文件内容判断格式并导入"""
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            first_line = f.readline().split()
+        if len(first_line) == 2 and not first_line[0].startswith(("[", "{")):
+            return self.import_ytdlp_archive(path)
+        return self.import_bbdown_archive(path)
+
+    def save(self):
+        """保存过滤器，下次启动时无需扫描数据库"""
+        if self._bloom is None:
+            return
+        try:
+            temp_file = self.bloom_file.with_suffix(".tmp")
+            temp_file.write_bytes(self._bloom.to_bytes())
+            temp_file.replace(self.bloom_file)
+        except OSError as e:
+            print(f"保存下载记录索引失败: {e}")
+
+    def close(self):
+        if self._connection is not None:
+            self.save()
+            self._connection.close()
+            self._connection = None
+            self._bloom = None
+
+
+if __name__ == "__main__":
+    # 过滤器性能测试
+    import random
+    import tempfile
+    from pathlib import Path
+
+    history = DownloadHistory(Path(tempfile.mkdtemp()) / "history.db")
+    keys = [f"bilibili:{av_to_bv(aid)}" for aid in random.sample(range(1, 1 << 40), 1_000_000)]
+    start = time.perf_counter()
+    history._import_keys(keys)
+    print(f"导入 {len(keys)} 条 {time.perf_counter() - start:.2f}s")
+
+    history.close()
+    start = time.perf_counter()
+    history._connect()
+    print(f"重新打开 {(time.perf_counter() - start) * 1000:.1f}ms")
+
+    misses = [f"youtube:{index:011d}" for index in range(100_000)]
+    start = time.perf_counter()
+    false_positives = sum(key in history._bloom for key in misses)
+    elapsed = time.perf_counter() - start
+    print(f"过滤器查询 {len(misses)} 次 {elapsed * 1000:.1f}ms, 误判 {false_positives} 次")
+    start = time.perf_counter()
+    hits = sum(history.contains(key) for key in keys[:100_000])
+    print(f"已下载查询 {hits} 次 {(time.perf_counter() - start) * 1000:.1f}ms")
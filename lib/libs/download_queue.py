@@ -0,0 +1,192 @@
+import time
+from collections import deque
+from enum import StrEnum
+from PySide6.QtCore import QObject, QProcess, Signal
+
+
+class JobState(StrEnum):
+    """下载任务状态"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class DownloadJob:
+    """单个下载任务，每个任务对应一个独立的进程"""
+
+    def __init__(self, job_id, url, mode, command, spec=None, info_only=False, store_key=None):
+        self.job_id = job_id
+        self.url = url
+        self.mode = mode  # "bilibili" 或 "youtube"
+        self.command = command
+        # 构建命令时使用的下载参数（BilibiliSpec/YouTubeSpec），用于记录下载历史
+        self.spec = spec
+        # 仅获取视频信息的任务
+        self.info_only = info_only
+        # 持久化存储（JobStore）中的编号，跨越多次运行保持不变
+        self.store_key = store_key
+        self.state = JobState.QUEUED
+        self.process = None
+        self.exit_code = None
+        # 最近一次进度（ProgressEvent），用于显示和统计下载速度
+        self.progress = None
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def finished(self):
+        return self.state in (JobState.DONE, JobState.FAILED)
+
+    def average_speed(self):
+        """按最近一次进度计算的平均下载速度（字节/秒），未知时为None"""
+        if not self.progress or self.progress.downloaded is None or self.started_at is None:
+            return None
+        elapsed = (self.finished_at or time.monotonic()) - self.started_at
+        return self.progress.downloaded / elapsed if elapsed > 0 else None
+
+
+class DownloadQueue(QObject):
+    """下载队列，按模式分别限制并发的QProcess工作进程数量"""
+
+    # 默认并发数：B站和YouTube分开计算
+    DEFAULT_LIMITS = {"bilibili": 3, "youtube": 2}
+
+    job_added = Signal(object)
+    job_started = Signal(object)
+    job_finished = Signal(object)
+    # (job, QByteArray, is_stderr)
+    job_output = Signal(object, object, bool)
+    # (job, ProgressEvent)
+    job_progress = Signal(object, object)
+    # 所有任务都已结束
+    queue_idle = Signal()
+
+    def __init__(self, parent=None, limits=None):
+        super().__init__(parent)
+        self.limits = dict(self.DEFAULT_LIMITS)
+        if limits:
+            self.limits.update(limits)
+        self.jobs = []
+        self._next_id = 1
+        self._pending = {mode: deque() for mode in self.limits}
+        self._running = {mode: set() for mode in self.limits}
+
+    def set_limit(self, mode, limit):
+        """修改某个模式的最大并发数，调大时立即补充启动排队任务"""
+        self.limits[mode] = max(1, int(limit))
+        self._pending.setdefault(mode, deque())
+        self._running.setdefault(mode, set())
+        self._schedule()
+
+    def enqueue(self, url, mode, command, spec=None, info_only=False, store_key=None):
+        """添加任务，若相同地址的任务仍在排队或运行中则直接返回已有任务
+
+        store_key 为恢复上次未完成的任务时，该任务在持久化存储中的编号
+        """
+        for job in self.jobs:
+            if job.url == url and job.mode == mode and job.info_only == info_only and not job.finished:
+                return job
+
+        job = DownloadJob(self._next_id, url, mode, command, spec, info_only, store_key)
+        self._next_id += 1
+        self.jobs.append(job)
+        self._pending.setdefault(mode, deque()).append(job)
+        self._running.setdefault(mode, set())
+        self.job_added.emit(job)
+        self._schedule()
+        return job
+
+    def report_progress(self, job, event):
+        """记录任务的最新进度并发出信号"""
+        job.progress = event
+        self.job_progress.emit(job, event)
+
+    def running_jobs(self):
+        """返回所有运行中的任务"""
+        return [job for running in self._running.values() for job in running]
+
+    def counts(self):
+        """返回 (排队数, 运行数)"""
+        pending = sum(len(q) for q in self._pending.values())
+        running = sum(len(s) for s in self._running.values())
+        return pending, running
+
+    def is_idle(self):
+        return self.counts() == (0, 0)
+
+    # 结束进程时等待进程退出的时间（毫秒）
+    KILL_TIMEOUT = 3000
+
+    def stop_all(self):
+        """清空排队任务并结束所有运行中的进程
+
+        等待进程退出后同步收尾，调用方（如关闭窗口）随后销毁队列时不会留下仍在运行的进程
+        """
+        for mode, pending in self._pending.items():
+            while pending:
+                job = pending.popleft()
+                job.state = JobState.FAILED
+                self.job_finished.emit(job)
+        for running in self._running.values():
+            for job in list(running):
+                process = job.process
+                if process:
+                    # 不再处理该进程的输出和结束信号，由这里直接收尾
+                    process.blockSignals(True)
+                    process.kill()
+                    process.waitForFinished(self.KILL_TIMEOUT)
+                self._finish(job, JobState.FAILED)
+
+    def _schedule(self):
+        """在并发上限内启动排队中的任务"""
+        for mode, pending in self._pending.items():
+            running = self._running[mode]
+            limit = self.limits.get(mode, 1)
+            while pending and len(running) < limit:
+                self._start(pending.popleft())
+
+    def _start(self, job):
+        process = QProcess(self)
+        job.process = process
+        job.state = JobState.RUNNING
+        job.started_at = time.monotonic()
+        self._running[job.mode].add(job)
+
+        process.readyReadStandardOutput.connect(
+            lambda: self.job_output.emit(job, process.readAllStandardOutput(), False))
+        process.readyReadStandardError.connect(
+            lambda: self.job_output.emit(job, process.readAllStandardError(), True))
+        process.finished.connect(lambda code, status: self._on_finished(job, code, status))
+        process.errorOccurred.connect(lambda error: self._on_error(job, error))
+
+        self.job_started.emit(job)
+        process.start(job.command[0], job.command[1:])
+
+    def _on_error(self, job, error):
+        # 启动失败时不会触发finished信号，需要在这里收尾
+        if error == QProcess.ProcessError.FailedToStart:
+            self._finish(job, JobState.FAILED)
+
+    def _on_finished(self, job, exit_code, exit_status):
+        job.exit_code = exit_code
+        ok = exit_status == QProcess.ExitStatus.NormalExit and exit_code == 0
+        self._finish(job, JobState.DONE if ok else JobState.FAILED)
+
+    def _finish(self, job, state):
+        if job not in self._running[job.mode]:
+            return
+        self._running[job.mode].discard(job)
+        job.state = state
+        job.finished_at = time.monotonic()
+        if job.process:
+            try:
+                job.process.deleteLater()
+            except RuntimeError:
+                # 进程对象已随父对象一起销毁
+                pass
+            job.process = None
+        self.job_finished.emit(job)
+        self._schedule()
+        if self.is_idle():
+            self.queue_idle.emit()
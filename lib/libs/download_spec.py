@@ -0,0 +1,83 @@
+from dataclasses import dataclass, asdict
+from lib.libs.download_dir import downloads_path
+
+# 默认文件命名规则
+DEFAULT_BILIBILI_FILE_PATTERN = "<ownerName>/<ownerName>-<videoTitle>-<bvid>"
+DEFAULT_YOUTUBE_FILE_PATTERN = "%(uploader)s/%(title)s [%(id)s].%(ext)s"
+
+
+@dataclass
+class BilibiliSpec:
+    """BBDown下载参数，不依赖任何界面控件，字段与配置文件bilibili段一致"""
+    url: str
+    api_mode: str = "默认"
+    encoding: str = ""
+    dfn: str = ""
+    use_aria2: bool = False
+    use_mp4box: bool = False
+    interactive: bool = False
+    download_danmaku: bool = False
+    video_only: bool = False
+    audio_only: bool = False
+    skip_subtitle: bool = False
+    skip_cover: bool = False
+    debug: bool = True
+    show_all: bool = False
+    file_pattern: str = ""
+    multi_file_pattern: str = ""
+    work_dir: str = ""
+
+    @classmethod
+    def from_config(cls, url, config):
+        """从配置字典（界面选项或配置文件）生成下载参数"""
+        spec = cls(url=url)
+        for name in cls.__dataclass_fields__:
+            if name != "url" and config.get(name) is not None:
+                setattr(spec, name, config[name])
+        if not spec.work_dir:
+            spec.work_dir = str(downloads_path)
+        return spec
+
+
+@dataclass
+class YouTubeSpec:
+    """yt-dlp下载参数，字段对应配置文件youtube段去掉youtube_前缀后的键"""
+    url: str
+    format: str = "默认"
+    quality: str = "最佳"
+    audio_format: str = "最佳"
+    subtitle: bool = False
+    video_only: bool = False
+    audio_only: bool = False
+    debug: bool = False
+    embed_subtitle: bool = False
+    embed_thumbnail: bool = False
+    split_chapters: bool = False
+    file_pattern: str = ""
+    work_dir: str = ""
+
+    @classmethod
+    def from_config(cls, url, config):
+        """从配置字典（界面选项或配置文件）生成下载参数"""
+        spec = cls(url=url)
+        for name in cls.__dataclass_fields__:
+            value = config.get(f"youtube_{name}")
+            if name != "url" and value is not None:
+                setattr(spec, name, value)
+        if not spec.work_dir:
+            spec.work_dir = str(downloads_path)
+        return spec
+
+
+SPEC_TYPES = {"bilibili": BilibiliSpec, "youtube": YouTubeSpec}
+
+
+def spec_to_dict(spec):
+    """下载参数转换为可以保存为JSON的字典"""
+    return asdict(spec)
+
+
+def spec_from_dict(mode, data):
+    """由 spec_to_dict 的结果恢复下载参数，忽略已不存在的字段"""
+    spec_type = SPEC_TYPES[mode]
+    return spec_type(**{name: value for name, value in data.items() if name in spec_type.__dataclass_fields__})
@@ -0,0 +1,71 @@
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, QBuffer, QByteArray, QIODevice, QSize, QRect, Qt, Signal
+from PySide6.QtGui import QImage, QImageReader
+
+
+def decode_image(data, target_size=None):
+    """解码图片数据，指定target_size时直接按该尺寸解码（等比填充后居中裁剪）
+
+    只使用QImage，可以在任意线程中调用。解码失败返回空的QImage。
+    """
+    buffer = QBuffer()
+    buffer.setData(QByteArray(data))
+    buffer.open(QIODevice.OpenModeFlag.ReadOnly)
+    reader = QImageReader(buffer)
+    reader.setAutoTransform(True)
+
+    scaled_on_decode = False
+    if target_size is not None:
+        source_size = reader.size()
+        if source_size.isValid():
+            scaled_on_decode = True
+            # 让解码器直接输出接近目标尺寸的图片（JPEG等格式解码时即可缩小）
+            reader.setScaledSize(source_size.scaled(target_size, Qt.AspectRatioMode.KeepAspectRatioByExpanding))
+
+    image = reader.read()
+    if image.isNull() or target_size is None:
+        return image
+    if not scaled_on_decode:
+        # 无法预先读取尺寸的图片，解码后再缩放
+        image = image.scaled(target_size, Qt.AspectRatioMode.KeepAspectRatioByExpanding,
+                             Qt.TransformationMode.SmoothTransformation)
+    if image.width() > target_size.width() or image.height() > target_size.height():
+        # 居中裁剪
+        x = max(0, (image.width() - target_size.width()) // 2)
+        y = max(0, (image.height() - target_size.height()) // 2)
+        image = image.copy(QRect(x, y, min(image.width(), target_size.width()),
+                                 min(image.height(), target_size.height())))
+    return image
+
+
+class _DecodeTask(QRunnable):
+    def __init__(self, decoder, key, data, target_size):
+        super().__init__()
+        self.decoder = decoder
+        self.key = key
+        self.data = data
+        self.target_size = target_size
+
+    def run(self):
+        image = decode_image(self.data, self.target_size)
+        if image.isNull():
+            self.decoder.failed.emit(self.key)
+        else:
+            self.decoder.decoded.emit(self.key, image)
+
+
+class ImageDecoder(QObject):
+    """在线程池中解码图片，结果通过信号回到界面线程"""
+
+    # (key, QImage)
+    decoded = Signal(str, QImage)
+    failed = Signal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool.globalInstance()
+
+    def decode(self, key, data, target_size=None):
+        """提交解码任务，data为图片的原始字节"""
+        if target_size is not None:
+            target_size = QSize(target_size)
+        self.pool.start(_DecodeTask(self, key, bytes(data), target_size))
@@ -1,16 +1,229 @@
-from PySide6.QtWidgets import QDialog, QVBoxLayout, QScrollArea, QLabel, QPushButton
-from PySide6.QtGui import QPixmap, QShortcut, QKeySequence
-from PySide6.QtCore import Qt
+import math
+from PySide6.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QAbstractScrollArea, QPushButton
+from PySide6.QtGui import QImage, QPixmap, QPainter, QShortcut, QKeySequence
+from PySide6.QtCore import Qt, QPoint, QPointF, QRect, QRectF
 from PySide6.QtWidgets import QApplication
 from .shortcut import ShortcutMixin
+from .pixmap_cache import PixmapCache
+
+
+class TiledImageView(QAbstractScrollArea):
+    """可缩放的图片视图
+
+    只绘制可见区域：按当前缩放比例把图片切成固定大小的图块，图块按需生成并缓存。
+    缩小时从预先缩小的层级（1/2、1/4……，按需生成）取样，避免每次都从原图缩放。
+    """
+
+    # 图块边长（逻辑像素）
+    TILE_SIZE = 256
+    # 图块缓存上限（字节）
+    TILE_CACHE_BYTES = 24 << 20
+    MIN_ZOOM = 0.05
+    MAX_ZOOM = 8.0
+    # 每次缩放的倍数
+    ZOOM_STEP = 1.25
+
+    def __init__(self, image, parent=None):
+        super().__init__(parent)
+        # 缩放层级，第i层为原图的 1/2^i
+        self.levels = [image]
+        self.image_width = image.width()
+        self.image_height = image.height()
+        self.zoom = 1.0
+        # 为True时随窗口大小自动适应
+        self.fit_mode = True
+        self.tile_cache = PixmapCache(self.TILE_CACHE_BYTES)
+        self._drag_pos = None
+        self.viewport().setCursor(Qt.CursorShape.OpenHandCursor)
+
+    def release(self):
+        """释放图片和缓存的图块"""
+        self.levels.clear()
+        self.tile_cache.clear()
+
+    def fit_zoom(self):
+        """完整显示图片所需的缩放比例，不放大"""
+        if not self.image_width or not self.image_height:
+            return 1.0
+        viewport = self.viewport().size()
+        return min(1.0, viewport.width() / self.image_width, viewport.height() / self.image_height)
+
+    def fit_to_window(self):
+        self.fit_mode = True
+        self.set_zoom(self.fit_zoom())
+
+    def actual_size(self):
+        self.fit_mode = False
+        self.set_zoom(1.0)
+
+    def zoom_in(self):
+        self.fit_mode = False
+        self.set_zoom(self.zoom * self.ZOOM_STEP)
+
+    def zoom_out(self):
+        self.fit_mode = False
+        self.set_zoom(self.zoom / self.ZOOM_STEP)
+
+    def set_zoom(self, zoom, anchor=None):
+        """设置缩放比例，anchor（视口坐标）下的图片位置保持不动，默认为视口中心"""
+        zoom = max(self.MIN_ZOOM, min(self.MAX_ZOOM, zoom))
+        if anchor is None:
+            anchor = self.viewport().rect().center()
+        # 锚点对应的原图坐标
+        offset = self._content_offset()
+        image_x = (anchor.x() + self.horizontalScrollBar().value() - offset.x()) / self.zoom
+        image_y = (anchor.y() + self.verticalScrollBar().value() - offset.y()) / self.zoom
+
+        self.zoom = zoom
+        self._update_scrollbars()
+        offset = self._content_offset()
+        self.horizontalScrollBar().setValue(round(image_x * zoom - anchor.x() + offset.x()))
+        self.verticalScrollBar().setValue(round(image_y * zoom - anchor.y() + offset.y()))
+        self.viewport().update()
+
+    def _content_size(self):
+        return math.ceil(self.image_width * self.zoom), math.ceil(self.image_height * self.zoom)
+
+    def _content_offset(self):
+        """图片小于视口时居中显示的偏移量"""
+        width, height = self._content_size()
+        viewport = self.viewport().size()
+        return QPoint(max(0, (viewport.width() - width) // 2), max(0, (viewport.height() - height) // 2))
+
+    def _update_scrollbars(self):
+        width, height = self._content_size()
+        viewport = self.viewport().size()
+        self.horizontalScrollBar().setRange(0, max(0, width - viewport.width()))
+        self.horizontalScrollBar().setPageStep(viewport.width())
+        self.verticalScrollBar().setRange(0, max(0, height - viewport.height()))
+        self.verticalScrollBar().setPageStep(viewport.height())
+
+    def _level(self):
+        """返回不小于当前缩放比例的最小层级及其缩放比例"""
+        index = max(0, int(math.floor(math.log2(1 / self.zoom)))) if self.zoom < 1 else 0
+        while len(self.levels) <= index:
+            previous = self.levels[-1]
+            if previous.width() <= 1 or previous.height() <= 1:
+                index = len(self.levels) - 1
+                break
+            self.levels.append(previous.scaled(
+                max(1, previous.width() // 2), max(1, previous.height() // 2),
+                Qt.AspectRatioMode.IgnoreAspectRatio, Qt.TransformationMode.SmoothTransformation,
+            ))
+        return self.levels[index], self.levels[index].width() / self.image_width
+
+    def _tile(self, column, row, ratio):
+        """生成（或从缓存读取）当前缩放比例下第row行第column列的图块"""
+        key = (self.zoom, ratio, column, row)
+        pixmap = self.tile_cache.get(key)
+        if pixmap is not None:
+            return pixmap
+
+        width, height = self._content_size()
+        rect = QRect(column * self.TILE_SIZE, row * self.TILE_SIZE, self.TILE_SIZE, self.TILE_SIZE)
+        rect = rect.intersected(QRect(0, 0, width, height))
+        level, level_scale = self._level()
+        factor = level_scale / self.zoom
+        source = QRectF(rect.x() * factor, rect.y() * factor, rect.width() * factor, rect.height() * factor)
+
+        tile = QImage(max(1, round(rect.width() * ratio)), max(1, round(rect.height() * ratio)),
+                      QImage.Format.Format_ARGB32_Premultiplied)
+        tile.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(tile)
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        painter.drawImage(QRectF(0, 0, tile.width(), tile.height()), level, source)
+        painter.end()
+
+        pixmap = QPixmap.fromImage(tile)
+        pixmap.setDevicePixelRatio(ratio)
+        self.tile_cache.put(key, pixmap)
+        return pixmap
+
+    def paintEvent(self, event):
+        if not self.levels:
+            return
+        painter = QPainter(self.viewport())
+        offset = self._content_offset()
+        scroll_x = self.horizontalScrollBar().value()
+        scroll_y = self.verticalScrollBar().value()
+        width, height = self._content_size()
+        ratio = self.devicePixelRatioF()
+
+        # 与重绘区域相交的图块范围（内容坐标）
+        visible = event.rect().translated(scroll_x - offset.x(), scroll_y - offset.y())
+        visible = visible.intersected(QRect(0, 0, width, height))
+        if visible.isEmpty():
+            return
+        first_column = visible.left() // self.TILE_SIZE
+        last_column = visible.right() // self.TILE_SIZE
+        first_row = visible.top() // self.TILE_SIZE
+        last_row = visible.bottom() // self.TILE_SIZE
+        for row in range(first_row, last_row + 1):
+            for column in range(first_column, last_column + 1):
+                painter.drawPixmap(
+                    QPointF(column * self.TILE_SIZE - scroll_x + offset.x(),
+                            row * self.TILE_SIZE - scroll_y + offset.y()),
+                    self._tile(column, row, ratio),
+                )
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if self.fit_mode:
+            self.zoom = self.fit_zoom()
+        self._update_scrollbars()
+
+    def scrollContentsBy(self, dx, dy):
+        self.viewport().update()
+
+    def wheelEvent(self, event):
+        """按住Ctrl滚动滚轮缩放，否则滚动图片"""
+        if event.modifiers() & Qt.KeyboardModifier.ControlModifier:
+            steps = event.angleDelta().y() / 120
+            if steps:
+                self.fit_mode = False
+                self.set_zoom(self.zoom * self.ZOOM_STEP ** steps, event.position().toPoint())
+            event.accept()
+            return
+        super().wheelEvent(event)
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.MouseButton.LeftButton:
+            self._drag_pos = event.position().toPoint()
+            self.viewport().setCursor(Qt.CursorShape.ClosedHandCursor)
+
+    def mouseMoveEvent(self, event):
+        """拖动平移图片"""
+        if self._drag_pos is None:
+            return
+        pos = event.position().toPoint()
+        delta = pos - self._drag_pos
+        self._drag_pos = pos
+        self.horizontalScrollBar().setValue(self.horizontalScrollBar().value() - delta.x())
+        self.verticalScrollBar().setValue(self.verticalScrollBar().value() - delta.y())
+
+    def mouseReleaseEvent(self, event):
+        self._drag_pos = None
+        self.viewport().setCursor(Qt.CursorShape.OpenHandCursor)
+
+    def mouseDoubleClickEvent(self, event):
+        """双击在适应窗口和原始大小之间切换"""
+        if self.fit_mode:
+            self.fit_mode = False
+            self.set_zoom(1.0, event.position().toPoint())
+        else:
+            self.fit_to_window()
+
 
 class ImageViewerDialog(QDialog, ShortcutMixin):
-    """图片查看对话框，用于显示原始分辨率的图片"""
+    """图片查看对话框，用于显示原始分辨率的图片，关闭时释放图片"""
 
-    def __init__(self, pixmap, parent=None):
+    def __init__(self, image, parent=None):
         super().__init__(parent)
         self.setWindowTitle("图片查看器")
         self.setModal(False)
+        self.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        if isinstance(image, QPixmap):
+            image = image.toImage()
 
         # 获取屏幕尺寸
         screen = QApplication.primaryScreen()
@@ -18,52 +231,40 @@ class ImageViewerDialog(QDialog, ShortcutMixin):
         screen_width = screen_size.width()
         screen_height = screen_size.height()
 
-        # 获取图片尺寸
-        pixmap_width = pixmap.width()
-        pixmap_height = pixmap.height()
-
         # 创建布局
         layout = QVBoxLayout(self)
 
-        # 创建滚动区域用于显示大图
-        scroll_area = QScrollArea()
-        scroll_area.setWidgetResizable(True)
-        layout.addWidget(scroll_area)
-
-        # 创建标签显示图片
-        self.image_label = QLabel()
-
-        # 如果图片尺寸大于屏幕尺寸，按比例缩放以显示完整图片
-        if pixmap_width > screen_width or pixmap_height > screen_height:
-            # 按比例缩放图片到屏幕大小
-            scaled_pixmap = pixmap.scaled(
-                screen_width - 50,
-                screen_height - 100,
-                Qt.AspectRatioMode.KeepAspectRatio,
-                Qt.TransformationMode.SmoothTransformation,
-            )
-            self.image_label.setPixmap(scaled_pixmap)
-            # 调整窗口大小
-            self.resize(
-                scaled_pixmap.width() + 20,
-                min(scaled_pixmap.height() + 100, screen_height),
-            )
-        else:
-            # 否则显示原始尺寸图片
-            self.image_label.setPixmap(pixmap)
-            # 调整窗口大小
-            self.resize(
-                min(pixmap_width + 50, screen_width),
-                min(pixmap_height + 100, screen_height),
-            )
-
-        self.image_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        scroll_area.setWidget(self.image_label)
-
-        # 添加关闭按钮
+        # 图片视图，默认缩放到适应窗口
+        self.image_view = TiledImageView(image)
+        layout.addWidget(self.image_view)
+
+        # 缩放和关闭按钮
+        button_layout = QHBoxLayout()
+        fit_button = QPushButton("适应窗口")
+        fit_button.clicked.connect(self.image_view.fit_to_window)
+        actual_button = QPushButton("原始大小")
+        actual_button.clicked.connect(self.image_view.actual_size)
         close_button = QPushButton("关闭")
         close_button.clicked.connect(self.close)
-        layout.addWidget(close_button)
+        button_layout.addWidget(fit_button)
+        button_layout.addWidget(actual_button)
+        button_layout.addStretch()
+        button_layout.addWidget(close_button)
+        layout.addLayout(button_layout)
+
+        # 调整窗口大小，不超过屏幕
+        self.resize(
+            min(image.width() + 50, screen_width - 50),
+            min(image.height() + 100, screen_height - 50),
+        )
 
         # 添加快捷键支持 (Command+W on macOS)
         self.setup_shortcuts()
+        zoom_in_shortcut = QShortcut(QKeySequence.StandardKey.ZoomIn, self)
+        zoom_in_shortcut.activated.connect(self.image_view.zoom_in)
+        zoom_out_shortcut = QShortcut(QKeySequence.StandardKey.ZoomOut, self)
+        zoom_out_shortcut.activated.connect(self.image_view.zoom_out)
+
+    def closeEvent(self, event):
+        self.image_view.release()
+        super().closeEvent(event)
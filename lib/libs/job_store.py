@@ -0,0 +1,169 @@
+import json
+import sqlite3
+import time
+import uuid
+from PySide6.QtCore import QObject, QTimer, QLockFile
+from lib.libs.app_dirs import data_path
+from lib.libs.download_queue import JobState
+from lib.libs.download_spec import spec_to_dict, spec_from_dict
+
+# 恢复时放弃的任务
+SKIPPED = "skipped"
+
+
+class JobStore(QObject):
+    """下载队列的持久化存储，程序关闭或崩溃后，下次启动时恢复未完成的任务
+
+    任务（地址、下载参数、状态、尝试次数、保存位置）保存在SQLite数据库中（WAL模式），
+    队列的变化先记录在内存中，每隔 FLUSH_DELAY 毫秒在一个事务中批量写入，
+    数千个任务同时加入队列时也只需要几次写入。
+    同一时间只有一个实例（界面或批量模式）使用数据库，其他实例的任务不保存。
+    """
+
+    # 批量写入的间隔（毫秒）
+    FLUSH_DELAY = 500
+    # 超过该尝试次数的任务不再恢复（避免反复导致崩溃的任务无限重试）
+    MAX_ATTEMPTS = 5
+    # 已结束的任务保留的时间（秒）
+    RETENTION = 30 * 24 * 3600
+
+    def __init__(self, database=data_path / "jobs.db", parent=None):
+        super().__init__(parent)
+        self.database = database
+        self._connection = None
+        self._lock = None
+        self._queue = None
+        # 等待写入的 (SQL, 参数)
+        self._writes = []
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(self.FLUSH_DELAY)
+        self._flush_timer.timeout.connect(self.flush)
+
+    def _connect(self):
+        """打开数据库，其他实例正在使用时返回None"""
+        if self._connection is not None:
+            return self._connection
+        if self._lock is not None:
+            return None
+        self.database.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = QLockFile(str(self.database) + ".lock")
+        if not self._lock.tryLock(0):
+            print("其他实例正在使用下载队列，本次的任务不会保存")
+            return None
+        self._connection = sqlite3.connect(self.database)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        # WAL模式下NORMAL即可保证崩溃后数据库一致，只可能丢失最后一次提交
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "key TEXT PRIMARY KEY, url TEXT, mode TEXT, spec TEXT, state TEXT, "
+                "attempts INTEGER DEFAULT 0, exit_code INTEGER, output_path TEXT, "
+                "created_at REAL, updated_at REAL)"
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state)")
+            self._connection.execute(
+                "DELETE FROM jobs WHERE state NOT IN (?, ?) AND updated_at < ?",
+                (JobState.QUEUED, JobState.RUNNING, time.time() - self.RETENTION))
+        return self._connection
+
+    def attach(self, queue):
+        """记录下载队列中任务的变化，数据库被其他实例使用时不记录"""
+        if self._connect() is None:
+            return
+        self._queue = queue
+        queue.job_added.connect(self._on_job_added)
+        queue.job_started.connect(self._on_job_started)
+        queue.job_finished.connect(self._on_job_finished)
+
+    def detach(self):
+        """停止记录，之后结束的任务保持未完成状态，下次启动时恢复"""
+        if self._queue is None:
+            return
+        self._queue.job_added.disconnect(self._on_job_added)
+        self._queue.job_started.disconnect(self._on_job_started)
+        self._queue.job_finished.disconnect(self._on_job_finished)
+        self._queue = None
+
+    def unfinished(self):
+        """返回上次未完成的任务 [(key, 模式, 地址, 下载参数)]，按加入队列的顺序"""
+        connection = self._connect()
+        if connection is None:
+            return []
+        self.flush()
+        with connection:
+            # 反复中断的任务不再恢复
+            connection.execute(
+                "UPDATE jobs SET state = ?, updated_at = ? WHERE state IN (?, ?) AND attempts >= ?",
+                (JobState.FAILED, time.time(), JobState.QUEUED, JobState.RUNNING, self.MAX_ATTEMPTS))
+        rows = connection.execute(
+            "SELECT key, mode, url, spec FROM jobs WHERE state IN (?, ?) ORDER BY rowid",
+            (JobState.QUEUED, JobState.RUNNING)).fetchall()
+        jobs = []
+        for key, mode, url, spec in rows:
+            try:
+                jobs.append((key, mode, url, spec_from_dict(mode, json.loads(spec))))
+            except (KeyError, TypeError, ValueError):
+                self.discard(key)
+        return jobs
+
+    def discard(self, key):
+        """放弃恢复某个任务（如已下载过或无法构建命令）"""
+        self._write("UPDATE jobs SET state = ?, updated_at = ? WHERE key = ?", (SKIPPED, time.time(), key))
+
+    def _on_job_added(self, job):
+        # 仅获取视频信息的任务不需要恢复
+        if job.info_only or job.spec is None:
+            return
+        if job.store_key is None:
+            job.store_key = uuid.uuid4().hex
+        now = time.time()
+        # 恢复的任务已有记录，保留尝试次数
+        self._write(
+            "INSERT INTO jobs (key, url, mode, spec, state, output_path, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET state = excluded.state, updated_at = excluded.updated_at",
+            (job.store_key, job.url, job.mode, json.dumps(spec_to_dict(job.spec), ensure_ascii=False),
+             JobState.QUEUED, job.spec.work_dir or None, now, now))
+
+    def _on_job_started(self, job):
+        if job.store_key is not None:
+            self._write("UPDATE jobs SET state = ?, attempts = attempts + 1, updated_at = ? WHERE key = ?",
+                        (JobState.RUNNING, time.time(), job.store_key))
+
+    def _on_job_finished(self, job):
+        if job.store_key is not None:
+            self._write("UPDATE jobs SET state = ?, exit_code = ?, updated_at = ? WHERE key = ?",
+                        (job.state, job.exit_code, time.time(), job.store_key))
+
+    def _write(self, sql, parameters):
+        if self._connection is None:
+            return
+        self._writes.append((sql, parameters))
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def flush(self):
+        """在一个事务中写入所有等待的修改"""
+        self._flush_timer.stop()
+        if not self._writes or self._connection is None:
+            return
+        writes, self._writes = self._writes, []
+        try:
+            with self._connection:
+                for sql, parameters in writes:
+                    self._connection.execute(sql, parameters)
+        except sqlite3.Error as e:
+            print(f"保存下载队列失败: {e}")
+
+    def close(self):
+        """停止记录并写入剩余的修改，未完成的任务下次启动时恢复"""
+        self.detach()
+        self.flush()
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+        if self._lock is not None:
+            self._lock.unlock()
+            self._lock = None
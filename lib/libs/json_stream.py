@@ -0,0 +1,96 @@
+import json
+import re
+
+# 扫描时只关心这几个字符，其余内容整段跳过
+_TOKENS = re.compile(r'[{}"\\]')
+
+
+class JsonStreamExtractor:
+    """从分段到达的文本中增量提取JSON对象
+
+    记录大括号深度和是否处于字符串中，对象闭合时才调用一次 json.loads，
+    不会在每收到一行时重新解析整个缓冲区。可连续提取多个对象，
+    单个对象超过 max_size 个字符时丢弃。
+    """
+
+    # 单个对象最大字符数
+    MAX_SIZE = 8 << 20
+
+    def __init__(self, max_size=MAX_SIZE):
+        self.max_size = max_size
+        self.reset()
+
+    def reset(self):
+        """丢弃未完成的对象"""
+        self._parts = []
+        self._size = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    @property
+    def active(self):
+        """是否正在读取一个未闭合的对象"""
+        return self._depth > 0
+
+    def feed(self, text):
+        """输入一段文本，返回其中已完整的对象列表（解析失败的对象被忽略）"""
+        objects = []
+        pos = 0
+        length = len(text)
+        # 上一段以字符串中的反斜杠结尾，跳过被转义的字符
+        if self._escape and length:
+            self._escape = False
+            pos = 1
+        start = 0 if self._depth else None
+
+        while pos < length:
+            if start is None:
+                # 不在对象中，直接查找下一个对象的开始位置
+                pos = text.find("{", pos)
+                if pos < 0:
+                    break
+                start = pos
+                self._depth = 1
+                pos += 1
+                continue
+
+            match = _TOKENS.search(text, pos)
+            if match is None:
+                break
+            char = match.group()
+            pos = match.end()
+            if self._in_string:
+                if char == "\\":
+                    if pos < length:
+                        pos += 1
+                    else:
+                        self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._parts.append(text[start:pos])
+                    document = "".join(self._parts)
+                    self._parts = []
+                    self._size = 0
+                    start = None
+                    if len(document) > self.max_size:
+                        continue
+                    try:
+                        objects.append(json.loads(document))
+                    except ValueError:
+                        pass
+
+        if start is not None:
+            self._size += length - start
+            if self._size > self.max_size:
+                self.reset()
+            else:
+                self._parts.append(text[start:])
+        return objects
@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+import time
+import zlib
+from lib.libs.app_dirs import cache_path
+from lib.libs.url_classifier import canonical_video_key
+
+
+def video_key(mode, text):
+    """根据地址生成缓存键，无法识别时返回None
+
+    与下载记录使用相同的规范编号（canonical_video_key），av号和BV号对应同一个键；
+    视频信息包含所有分P，缓存键不带分P序号。
+    """
+    key = canonical_video_key(text)
+    if key is None or not key.startswith(f"{mode}:"):
+        return None
+    return ":".join(key.split(":")[:2])
+
+
+def info_key(mode, info):
+    """视频信息对应的缓存键，无法识别时返回None"""
+    if mode == "youtube":
+        video_id = info.get("id")
+        return video_key(mode, f"https://www.youtube.com/watch?v={video_id}") if isinstance(video_id, str) else None
+    data = info.get("data") or {}
+    if data.get("bvid"):
+        return video_key(mode, data["bvid"])
+    if data.get("aid"):
+        return video_key(mode, f"av{data['aid']}")
+    return None
+
+
+class MetadataCache:
+    """视频信息的磁盘缓存
+
+    每个条目一个文件，内容为压缩后的紧凑JSON；超过有效期的条目视为未命中，
+    总大小超过上限时按最近使用时间（文件修改时间）淘汰最旧的条目。
+    """
+
+    # 有效期（秒）
+    TTL = 6 * 3600
+    # 缓存目录最大字节数
+    MAX_SIZE = 64 << 20
+
+    def __init__(self, directory=cache_path / "metadata", ttl=TTL, max_size=MAX_SIZE):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_size = max_size
+        # 文件名 -> (大小, 最近使用时间)，第一次写入时才扫描目录
+        self._index = None
+
+    def _path(self, key):
+        return self.directory / (hashlib.sha1(key.encode()).hexdigest()[:20] + ".z")
+
+    def get(self, key):
+        """读取缓存，不存在、已过期或损坏时返回None"""
+        path = self._path(key)
+        try:
+            entry = json.loads(zlib.decompress(path.read_bytes()))
+        except (OSError, ValueError, zlib.error):
+            return None
+        if entry.get("key") != key or time.time() - entry.get("time", 0) > self.ttl:
+            return None
+        # 更新使用时间，用于LRU淘汰
+        now = time.time()
+        try:
+            os.utime(path, (now, now))
+        except OSError:
+            pass
+        if self._index is not None and path.name in self._index:
+            self._index[path.name] = (self._index[path.name][0], now)
+        return entry.get("value")
+
+    def put(self, key, value):
+        """写入缓存"""
+        data = zlib.compress(json.dumps(
+            {"key": key, "time": time.time(), "value": value},
+            ensure_ascii=False, separators=(",", ":"),
+        ).encode("utf-8"))
+        path = self._path(key)
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            if self._index is None:
+                self._load_index()
+            # 先写临时文件再替换，避免其他实例读到半个文件
+            temp_path = path.with_suffix(".tmp")
+            temp_path.write_bytes(data)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"写入视频信息缓存失败: {e}")
+            return
+        self._index[path.name] = (len(data), time.time())
+        self._evict()
+
+    def lookup(self, mode, text):
+        """根据地址读取视频信息"""
+        key = video_key(mode, text)
+        return self.get(key) if key else None
+
+    def put_info(self, mode, info):
+        """保存视频信息"""
+        key = info_key(mode, info)
+        if key is not None:
+            self.put(key, info)
+
+    def _load_index(self):
+        self._index = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(".z"):
+                    stat = entry.stat()
+                    self._index[entry.name] = (stat.st_size, stat.st_mtime)
+
+    def _evict(self):
+        """总大小超出上限时删除最久未使用的条目"""
+        total = sum(size for size, _ in self._index.values())
+        if total <= self.max_size:
+            return
+        for name, (size, _) in sorted(self._index.items(), key=lambda item: item[1][1]):
+            if total <= self.max_size:
+                break
+            try:
+                (self.directory / name).unlink()
+            except OSError:
+                pass
+            del self._index[name]
+            total -= size
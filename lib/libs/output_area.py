@@ -1,29 +1,84 @@
-from PySide6.QtWidgets import QTextEdit, QGroupBox, QVBoxLayout, QPushButton, QApplication, QMainWindow
-from PySide6.QtGui import QFont
+import json
+import re
+from collections import deque
+from PySide6.QtWidgets import (
+    QPlainTextEdit, QGroupBox, QVBoxLayout, QPushButton, QApplication, QMainWindow, QTabBar, QDialog
+)
+from PySide6.QtGui import QFont, QTextCursor
 from PySide6.QtCore import Qt, QTimer, QRect, QEvent, QObject
 
 
 class OutputArea(QObject):
-    """输出显示区域管理类"""
+    """输出显示区域管理类
 
-    def __init__(self, parent=None):
+    使用纯文本控件并限制最大行数（超出后丢弃最早的行）；输出先缓存，
+    按固定帧率批量写入控件，而不是每收到一段输出就刷新一次。
+
+    每个下载任务有独立的输出通道（环形缓冲），通过标签页切换；
+    只有当前显示的通道会写入控件，其余通道只保存在内存中。
+    """
+
+    # 默认最多保留的行数
+    MAX_LINES = 5000
+    # 刷新间隔（毫秒），约30帧每秒
+    FLUSH_INTERVAL = 33
+    # 最多保留的任务通道数，超出后移除最早的已结束且未显示的通道
+    MAX_CHANNELS = 200
+    # 常规输出（登录等非下载任务）通道
+    GENERAL = None
+    # 折叠的API响应占位文本
+    PLACEHOLDER = "[已折叠 {size} 字符的响应内容 #{payload_id}，双击展开]"
+    _PLACEHOLDER_PATTERN = re.compile(r"\[已折叠 \d+ 字符的响应内容 #(\d+)，双击展开\]")
+
+    def __init__(self, parent=None, max_lines=MAX_LINES):
         super().__init__(parent)
         self.parent = parent
         self.output_text = None
+        # 输出控件的视口，安装事件过滤器时保存，避免控件销毁后再调用 viewport()
+        self._viewport = None
         self.scroll_top_button = None
+        self.max_lines = max_lines
+        self.tab_bar = None
+        # 各通道的输出行，key为任务编号，常规输出为None
+        self._channels = {self.GENERAL: deque(maxlen=max_lines)}
+        # 当前显示的通道
+        self._current = self.GENERAL
+        # 任务正在运行的通道（不会被移除）和任务已结束的通道
+        self._running = set()
+        self._finished = set()
+        # 等待写入控件的文本（仅当前通道）
+        self._pending = []
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(self.FLUSH_INTERVAL)
+        self._flush_timer.timeout.connect(self._flush)
 
     def create_output_area(self, layout):
         """创建输出显示区域"""
         output_group = QGroupBox("输出信息")
         output_group.setLayout(QVBoxLayout())
 
-        self.output_text = QTextEdit()
+        # 通道标签页，切换时只重新填充控件一次
+        self.tab_bar = QTabBar()
+        self.tab_bar.setExpanding(False)
+        self.tab_bar.setUsesScrollButtons(True)
+        self.tab_bar.setTabsClosable(True)
+        self.tab_bar.addTab("常规")
+        self.tab_bar.setTabData(0, self.GENERAL)
+        # 常规通道不允许关闭
+        self.tab_bar.setTabButton(0, QTabBar.ButtonPosition.RightSide, None)
+        self.tab_bar.currentChanged.connect(self._on_tab_changed)
+        self.tab_bar.tabCloseRequested.connect(lambda index: self.remove_channel(self.tab_bar.tabData(index)))
+        output_group.layout().addWidget(self.tab_bar)
+
+        self.output_text = QPlainTextEdit()
         self.output_text.setReadOnly(True)
+        self.output_text.setMaximumBlockCount(self.max_lines)
         self.output_text.setFont(QFont("Monaco", 10))
         self.output_text.verticalScrollBar().valueChanged.connect(self._on_scroll_changed)
         output_group.layout().addWidget(self.output_text)
 
-        # 创建滚动到顶部按钮 - 关键：设置父控件为 QTextEdit
+        # 创建滚动到顶部按钮 - 关键：设置父控件为 QPlainTextEdit
         self.scroll_top_button = QPushButton("↑", self.output_text)
         self.scroll_top_button.setStyleSheet("""
             QPushButton {
@@ -47,21 +102,177 @@ class OutputArea(QObject):
 
         # 安装事件过滤器
         self.output_text.installEventFilter(self)
+        # 双击占位文本时展开响应内容
+        self._viewport = self.output_text.viewport()
+        self._viewport.installEventFilter(self)
 
         layout.addWidget(output_group)
 
-    def append_output(self, text):
-        """添加输出文本"""
+    def set_max_lines(self, max_lines):
+        """修改最多保留的行数"""
+        self.max_lines = max_lines
+        for key, lines in self._channels.items():
+            self._channels[key] = deque(lines, maxlen=max_lines)
         if self.output_text:
-            self.output_text.append(text)
+            self.output_text.setMaximumBlockCount(max_lines)
+
+    def add_channel(self, job_id, title, running=False):
+        """为下载任务添加输出通道，通道已满且没有可移除的通道时返回False
+
+        running为True表示任务已开始运行，此时还可以移除排队中任务的通道
+        （这些任务开始运行时会重新创建通道），运行中任务的通道不会被移除
+        """
+        if job_id in self._channels:
+            if running:
+                self._running.add(job_id)
+            return True
+        # 通道过多时移除最早的通道
+        if len(self._channels) > self.MAX_CHANNELS and not self._evict_channel(running):
+            return False
+        self._channels[job_id] = deque(maxlen=self.max_lines)
+        if running:
+            self._running.add(job_id)
+        if self.tab_bar:
+            index = self.tab_bar.addTab(title)
+            self.tab_bar.setTabData(index, job_id)
+        return True
+
+    def finish_channel(self, job_id):
+        """任务结束后，其通道可以在通道过多时被移除"""
+        self._running.discard(job_id)
+        if job_id in self._channels:
+            self._finished.add(job_id)
+
+    def _evict_channel(self, include_queued):
+        """移除最早的已结束且未显示的通道，include_queued时没有已结束的通道则移除排队中任务的通道"""
+        candidates = [key for key in self._channels
+                      if key is not self.GENERAL and key != self._current and key not in self._running]
+        finished = [key for key in candidates if key in self._finished]
+        victims = finished or (candidates if include_queued else [])
+        if not victims:
+            return False
+        self.remove_channel(victims[0])
+        return True
+
+    def set_channel_title(self, job_id, title):
+        """修改通道标签页的标题"""
+        index = self._tab_index(job_id)
+        if index >= 0:
+            self.tab_bar.setTabText(index, title)
+
+    def remove_channel(self, job_id):
+        """移除下载任务的输出通道"""
+        if job_id is self.GENERAL or job_id not in self._channels:
+            return
+        del self._channels[job_id]
+        self._running.discard(job_id)
+        self._finished.discard(job_id)
+        # 同时释放该任务折叠的响应内容
+        self.parent.payload_store.drop_job(job_id)
+        index = self._tab_index(job_id)
+        if index >= 0:
+            # 移除当前标签页时会触发currentChanged切换到相邻通道
+            self.tab_bar.removeTab(index)
+
+    def show_channel(self, job_id):
+        """切换到指定通道"""
+        index = self._tab_index(job_id)
+        if index >= 0:
+            self.tab_bar.setCurrentIndex(index)
+
+    def _tab_index(self, job_id):
+        if not self.tab_bar:
+            return -1
+        for index in range(self.tab_bar.count()):
+            if self.tab_bar.tabData(index) == job_id:
+                return index
+        return -1
+
+    def _on_tab_changed(self, index):
+        """切换通道时用该通道的缓冲内容重新填充控件"""
+        key = self.tab_bar.tabData(index) if index >= 0 else self.GENERAL
+        self._current = key
+        self._pending.clear()
+        self.output_text.setPlainText("\n".join(self._channels.get(key, ())))
+        scrollbar = self.output_text.verticalScrollBar()
+        scrollbar.setValue(scrollbar.maximum())
+
+    def append_output(self, text, job_id=GENERAL):
+        """添加输出文本到指定通道，只有当前显示的通道会在下一帧写入控件"""
+        channel = self._channels.get(job_id)
+        if channel is None:
+            return
+        channel.extend(text.split("\n"))
+        if job_id != self._current:
+            return
+        self._pending.append(text)
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def _flush(self):
+        """将缓存的文本一次性写入控件"""
+        if not self._pending or not self.output_text:
+            return
+        text = "\n".join(self._pending)
+        self._pending.clear()
+        # 超出最大行数的部分写入后也会被丢弃，直接截掉
+        if text.count("\n") >= self.max_lines:
+            text = "\n".join(text.split("\n")[-self.max_lines:])
+
+        # 只有当前已在底部时才跟随滚动，否则保持用户正在查看的位置
+        scrollbar = self.output_text.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum()
+        position = scrollbar.value()
+
+        cursor = QTextCursor(self.output_text.document())
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        if not self.output_text.document().isEmpty():
+            text = "\n" + text
+        cursor.insertText(text)
+
+        scrollbar.setValue(scrollbar.maximum() if at_bottom else position)
 
     def clear_output(self):
-        """清空输出文本"""
+        """清空当前通道的输出文本"""
+        self._channels[self._current].clear()
+        self._pending.clear()
         if self.output_text:
             self.output_text.clear()
         if self.scroll_top_button:
             self.scroll_top_button.hide()
 
+    @classmethod
+    def payload_placeholder(cls, payload_id, size):
+        """生成折叠内容的占位文本"""
+        return cls.PLACEHOLDER.format(size=size, payload_id=payload_id)
+
+    def _expand_payload(self, pos):
+        """展开双击位置所在行的折叠内容"""
+        block_text = self.output_text.cursorForPosition(pos).block().text()
+        match = self._PLACEHOLDER_PATTERN.search(block_text)
+        if not match:
+            return False
+        payload = self.parent.payload_store.get(int(match.group(1)))
+        if payload is None:
+            return False
+        # 能解析为JSON时格式化显示
+        try:
+            payload = json.dumps(json.loads(payload), ensure_ascii=False, indent=2)
+        except ValueError:
+            pass
+
+        dialog = QDialog(self.parent)
+        dialog.setWindowTitle(f"响应内容 #{match.group(1)}")
+        dialog.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        dialog.resize(800, 600)
+        payload_text = QPlainTextEdit()
+        payload_text.setReadOnly(True)
+        payload_text.setFont(QFont("Monaco", 10))
+        payload_text.setPlainText(payload)
+        QVBoxLayout(dialog).addWidget(payload_text)
+        dialog.show()
+        return True
+
     def _on_scroll_changed(self):
         """滚动条位置改变时的处理"""
         if not self.output_text or not self.scroll_top_button:
@@ -69,7 +280,7 @@ class OutputArea(QObject):
 
         # 检查是否需要显示滚动到顶部按钮
         scrollbar = self.output_text.verticalScrollBar()
-        if scrollbar.value() > 100:  # 滚动超过100像素才显示按钮
+        if scrollbar.value() > 5:  # 滚动超过5行才显示按钮
             if not self.scroll_top_button.isVisible():
                 self.scroll_top_button.show()
                 self._position_scroll_button()
@@ -79,7 +290,7 @@ class OutputArea(QObject):
     def _position_scroll_button(self):
         """定位滚动按钮到右下角"""
         if self.scroll_top_button and self.output_text:
-            # 获取 QTextEdit 的大小（不包括滚动条）
+            # 获取 QPlainTextEdit 的大小（不包括滚动条）
             text_edit_rect = self.output_text.rect()
             button_size = self.scroll_top_button.size()
 
@@ -102,7 +313,10 @@ class OutputArea(QObject):
 
     def eventFilter(self, obj, event):
         """事件过滤器，用于处理按钮的悬浮位置"""
-        if obj == self.output_text:
+        if obj is self._viewport:
+            if event.type() == QEvent.Type.MouseButtonDblClick and self._expand_payload(event.position().toPoint()):
+                return True
+        elif obj is self.output_text:
             if event.type() == QEvent.Type.Resize:
                 # 窗口大小改变时重新定位按钮
                 if self.scroll_top_button and self.scroll_top_button.isVisible():
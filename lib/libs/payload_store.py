@@ -0,0 +1,85 @@
+import shutil
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+
+
+class PayloadStore:
+    """调试输出中大段API响应的旁路存储
+
+    日志中只显示一行占位文本，完整内容按任务保存在这里：
+    先放在内存中，总量超过 memory_limit 后把最早的内容转存到临时目录。
+    """
+
+    # 内存中最多保存的字节数
+    MEMORY_LIMIT = 16 << 20
+
+    def __init__(self, memory_limit=MEMORY_LIMIT):
+        self.memory_limit = memory_limit
+        self._next_id = 1
+        # payload_id -> bytes（内存中）或 Path（已转存到文件）
+        self._payloads = OrderedDict()
+        self._sizes = {}
+        self._jobs = {}
+        self._memory_size = 0
+        self._directory = None
+
+    def add(self, job_id, text):
+        """保存一段内容，返回编号"""
+        payload_id = self._next_id
+        self._next_id += 1
+        data = text.encode("utf-8")
+        self._payloads[payload_id] = data
+        self._sizes[payload_id] = len(data)
+        self._jobs.setdefault(job_id, []).append(payload_id)
+        self._memory_size += len(data)
+        self._spill()
+        return payload_id
+
+    def get(self, payload_id):
+        """读取内容，不存在时返回None"""
+        data = self._payloads.get(payload_id)
+        if data is None:
+            return None
+        if isinstance(data, Path):
+            data = data.read_bytes()
+        return data.decode("utf-8")
+
+    def size(self, payload_id):
+        return self._sizes.get(payload_id, 0)
+
+    def drop_job(self, job_id):
+        """删除某个任务的所有内容"""
+        for payload_id in self._jobs.pop(job_id, []):
+            data = self._payloads.pop(payload_id, None)
+            self._sizes.pop(payload_id, None)
+            if isinstance(data, Path):
+                data.unlink(missing_ok=True)
+            elif data is not None:
+                self._memory_size -= len(data)
+
+    def clear(self):
+        """删除所有内容和临时目录"""
+        self._payloads.clear()
+        self._sizes.clear()
+        self._jobs.clear()
+        self._memory_size = 0
+        if self._directory:
+            shutil.rmtree(self._directory, ignore_errors=True)
+            self._directory = None
+
+    def _spill(self):
+        """内存超出上限时把最早的内容写入临时文件"""
+        if self._memory_size <= self.memory_limit:
+            return
+        if self._directory is None:
+            self._directory = Path(tempfile.mkdtemp(prefix="bbdown-ui-"))
+        for payload_id, data in self._payloads.items():
+            if self._memory_size <= self.memory_limit:
+                break
+            if isinstance(data, Path):
+                continue
+            path = self._directory / f"{payload_id}.json"
+            path.write_bytes(data)
+            self._payloads[payload_id] = path
+            self._memory_size -= len(data)
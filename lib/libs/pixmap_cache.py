@@ -0,0 +1,42 @@
+from collections import OrderedDict
+
+
+class PixmapCache:
+    """按占用字节数限制大小的图片LRU缓存，key一般为图片地址"""
+
+    # 默认最多占用的字节数
+    MAX_BYTES = 32 << 20
+
+    def __init__(self, max_bytes=MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()
+        self._bytes = 0
+
+    @staticmethod
+    def _cost(pixmap):
+        return pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8
+
+    def get(self, key):
+        """读取并标记为最近使用，未命中返回None"""
+        pixmap = self._items.get(key)
+        if pixmap is not None:
+            self._items.move_to_end(key)
+        return pixmap
+
+    def put(self, key, pixmap):
+        """写入缓存，单张超过上限的图片不缓存"""
+        cost = self._cost(pixmap)
+        if cost > self.max_bytes:
+            return
+        old = self._items.pop(key, None)
+        if old is not None:
+            self._bytes -= self._cost(old)
+        self._items[key] = pixmap
+        self._bytes += cost
+        while self._bytes > self.max_bytes:
+            _, evicted = self._items.popitem(last=False)
+            self._bytes -= self._cost(evicted)
+
+    def clear(self):
+        self._items.clear()
+        self._bytes = 0
@@ -1,20 +1,40 @@
-import json
 from PySide6.QtCore import QProcess
+from lib.libs.stream_decoder import StreamDecoder
+from lib.libs.progress_parser import ProgressParser, YTDLP_PROGRESS_PREFIX
+from lib.libs.json_stream import JsonStreamExtractor
+from lib.libs.output_area import OutputArea
 
 
 class ProcessHandler:
+    # 超过该长度的API响应行不直接显示，改为保存到旁路存储
+    PAYLOAD_THRESHOLD = 2048
+
     def __init__(self, parent):
         self.parent = parent
-        # 初始化进程
+        # 初始化进程（登录等一次性命令使用，下载任务由下载队列管理）
         self.process = QProcess(self.parent)
         self.process.readyReadStandardOutput.connect(self.handle_stdout)
         self.process.readyReadStandardError.connect(self.handle_stderr)
         self.process.finished.connect(self.process_finished)
-        # 初始化基本信息json
-        self.if_record_response = False
-        self._base_video_info_json = None
-        # 初始化JSON堆栈
-        self.json_buffer = ""
+        # 每个下载任务独立的解码和JSON捕获状态，key为任务编号
+        self._output_states = {}
+        # 登录进程使用的状态
+        self._default_state = OutputState(self.parent.mode)
+
+    def attach_queue(self, queue):
+        """连接下载队列的输出信号"""
+        queue.job_added.connect(self.job_added)
+        queue.job_started.connect(self.job_started)
+        queue.job_output.connect(self.handle_job_output)
+        queue.job_finished.connect(self.job_finished)
+
+    def job_added(self, job):
+        """为新任务创建独立的输出通道，通道已满时在任务开始运行时再创建"""
+        self.parent.output_area.add_channel(job.job_id, f"#{job.job_id}")
+
+    def job_started(self, job):
+        """任务开始运行时确保有输出通道，运行期间该通道不会被移除"""
+        self.parent.output_area.add_channel(job.job_id, f"#{job.job_id}", running=True)
 
     def handle_stdout(self):
         """处理标准输出"""
@@ -26,71 +46,151 @@ class ProcessHandler:
         data = self.process.readAllStandardError()
         self._handle_process_output(data, is_stderr=True)
 
+    def handle_job_output(self, job, data, is_stderr):
+        """处理下载队列中某个任务的输出"""
+        self._handle_process_output(data, is_stderr=is_stderr, job=job)
+
     def process_finished(self):
         """进程结束处理"""
+        self._flush_output(self._default_state)
+        self._default_state = OutputState(self.parent.mode)
         self.parent.action_buttons.process_finished()
 
-    def _handle_process_output(self, data, is_stderr=False):
+    def job_finished(self, job):
+        """下载任务结束处理"""
+        state = self._output_states.pop(job.job_id, None)
+        if state is not None:
+            self._flush_output(state, job)
+        self.parent.action_buttons.job_finished(job)
+        self.parent.output_area.finish_channel(job.job_id)
+
+    def _flush_output(self, state, job=None):
+        """输出进程结束时解码器中剩余的不完整行"""
+        for decoder in (state.stdout_decoder, state.stderr_decoder):
+            lines = decoder.flush()
+            if lines:
+                self._handle_lines(lines, state, job)
+
+    def _handle_process_output(self, data, is_stderr=False, job=None):
         """处理进程输出的通用方法"""
-        try:
-            output = bytes(data).decode("utf-8")
-        except UnicodeDecodeError:
-            # 如果UTF-8解码失败，尝试使用系统默认编码
-            output = bytes(data).decode("gbk", errors="ignore")
-        self.parent.output_area.append_output(output)
+        if job is None:
+            state = self._default_state
+        else:
+            state = self._output_states.get(job.job_id)
+            if state is None:
+                state = self._output_states[job.job_id] = OutputState(job.mode)
+        decoder = state.stderr_decoder if is_stderr else state.stdout_decoder
+        # 只取出一次字节数据，由增量解码器处理跨块的多字节字符和半行内容
+        lines = decoder.feed(data.data())
+        if lines:
+            self._handle_lines(lines, state, job)
+
+    def _handle_lines(self, lines, state, job=None):
+        """处理若干完整的输出行"""
+        if job is not None:
+            lines = self._parse_progress(lines, state, job)
+            if not lines:
+                return
+            # 写入该任务自己的输出通道
+            self.parent.output_area.append_output(self._divert_payloads(lines, job.job_id), job.job_id)
+            mode = job.mode
+        else:
+            self.parent.output_area.append_output(self._divert_payloads(lines, None))
+            mode = self.parent.mode
+            # 登录时从输出中读取二维码地址
+            qr_dialog = self.parent.action_buttons.qr_dialog
+            if qr_dialog is not None:
+                qr_dialog.handle_output(lines)
 
         # 检测未登录提示
-        if "未登录B站账号" in output:
+        if any("未登录B站账号" in line for line in lines):
             self.parent.action_buttons.handle_not_logged_in()
 
         # 捕捉API响应信息
-        if self.parent.mode == "bilibili":
-            self.capture_api_response(output)
-        if self.parent.mode == "youtube":
-            self.capture_youtube_response(output)
+        if mode == "bilibili":
+            self.capture_api_response(lines, state)
+        if mode == "youtube":
+            self.capture_youtube_response(lines, state)
 
-    def capture_api_response(self, text):
+    def _divert_payloads(self, lines, job_id):
+        """将大段响应内容替换为一行占位文本，返回用于显示的文本"""
+        threshold = self.PAYLOAD_THRESHOLD
+        if all(len(line) <= threshold for line in lines):
+            return "\n".join(lines)
+        keyword = "Response: "
+        display = []
+        for line in lines:
+            if len(line) > threshold:
+                if keyword in line:
+                    prefix, payload = line.split(keyword, 1)
+                    prefix += keyword
+                elif line.startswith("{"):
+                    prefix, payload = "", line
+                else:
+                    display.append(line)
+                    continue
+                payload_id = self.parent.payload_store.add(job_id, payload)
+                display.append(prefix + OutputArea.payload_placeholder(payload_id, len(payload)))
+            else:
+                display.append(line)
+        return "\n".join(display)
+
+    def _parse_progress(self, lines, state, job):
+        """解析进度行并上报给下载队列，返回需要显示在日志中的行"""
+        parse = state.progress_parser.parse
+        event = None
+        for line in lines:
+            event = parse(line) or event
+        if event is not None:
+            # 同一批输出只上报最后一次进度
+            self.parent.download_queue.report_progress(job, event)
+        if job.mode == "youtube":
+            # 进度模板输出的数据行只用于解析，不显示在日志中
+            return [line for line in lines if not line.startswith(YTDLP_PROGRESS_PREFIX)]
+        return lines
+
+    def capture_api_response(self, lines, state):
         """捕获API响应信息"""
-        # 查找包含指定URL的行
-        lines = text.split('\n')
-        for i, line in enumerate(lines):
+        keyword = "Response: "
+        for line in lines:
+            # 查找包含指定URL的行，之后的响应内容即为视频信息
             if "https://api.bilibili.com/x/web-interface/view" in line:
-                self.if_record_response = True
-                # 重置JSON缓冲区
-                self.json_buffer = ""
+                state.if_record_response = True
+                state.json_extractor.reset()
                 continue
-            keyword = "Response: "
-            if self.if_record_response:
-                if keyword in line:
-                    self.json_buffer = ""
-                response_line = line.strip().split(keyword)[-1]
-                self.json_buffer += response_line
-                self.parse_response_json()
-
-    def capture_youtube_response(self, text):
-        lines = text.split('\n')
-        for i, line in enumerate(lines):
-            if line.startswith("{"):
-                self.json_buffer = line
-                self.if_record_response = True
+            if not state.if_record_response:
+                continue
+            if keyword in line:
+                state.json_extractor.reset()
+                line = line.split(keyword, 1)[1]
+            elif not state.json_extractor.active:
                 continue
-            self.json_buffer += line
-            self.parse_response_json()
+            if self._publish_json(state.json_extractor.feed(line), "bilibili"):
+                state.if_record_response = False
 
+    def capture_youtube_response(self, lines, state):
+        """捕获yt-dlp输出的视频信息JSON"""
+        for line in lines:
+            # 只从以{开头的行开始读取对象，其他日志行直接跳过
+            if not state.json_extractor.active and not line.startswith("{"):
+                continue
+            self._publish_json(state.json_extractor.feed(line), "youtube")
 
-    def parse_response_json(self):
-        # 尝试解析JSON
+    def _publish_json(self, objects, mode):
+        """更新视频信息并写入缓存，返回是否得到了完整的对象"""
+        if not objects:
+            return False
+        self.parent.metadata_cache.put_info(mode, objects[-1])
+        self.parent.base_video_info_json = objects[-1]
+        return True
 
-        try:
-            response_json = json.loads(self.json_buffer)
-        except Exception as e:
-            pass
-            # 如果解析失败，可能是JSON不完整，保持缓冲区内容供下次调用使用
-            # print("解析json失败，等待更多数据", str(e))
-            # return "failure"
-        else:
-            # 解析成功，更新视频信息并重置缓冲区
-            # self._base_video_info_json = response_json
-            self.parent.base_video_info_json = response_json
-            self.json_buffer = ""
-            self.if_record_response = False
+
+class OutputState:
+    """单个进程的输出解码、进度解析和API响应捕获状态"""
+
+    def __init__(self, mode):
+        self.stdout_decoder = StreamDecoder()
+        self.stderr_decoder = StreamDecoder()
+        self.progress_parser = ProgressParser(mode)
+        self.if_record_response = False
+        self.json_extractor = JsonStreamExtractor()
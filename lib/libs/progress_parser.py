@@ -0,0 +1,159 @@
+import re
+from typing import NamedTuple
+
+# yt-dlp 进度模板，每次进度刷新输出一行以该前缀开头的机器可读数据
+YTDLP_PROGRESS_PREFIX = "[bbdown-ui-progress]"
+YTDLP_PROGRESS_TEMPLATE = (
+    "download:" + YTDLP_PROGRESS_PREFIX +
+    " %(progress.downloaded_bytes)s"
+    " %(progress.total_bytes,progress.total_bytes_estimate)s"
+    " %(progress.speed)s"
+    " %(progress.eta)s"
+    " %(info.playlist_index)s"
+)
+
+_UNITS = {"": 1, "B": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+_SIZE = r"([\d.]+)\s*([KMGT]?)i?B"
+# BBDown: "████---  45.3% - 12.34MB/27.29MB 5.12MB/s" 之类的进度行
+# 百分号后必须是空白或行尾，避免匹配URL编码中的 "%2C" 等内容
+_BBDOWN_PROGRESS = re.compile(
+    r"(\d{1,3}(?:\.\d+)?)%(?=\s|$)"
+    r"(?:.*?" + _SIZE + r"\s*/\s*" + _SIZE + r")?"
+    r"(?:.*?" + _SIZE + r"/s)?"
+)
+# BBDown 当前分P，如 "[P1] [cid] ..."、"开始解析P1..."、"开始下载P1视频..."
+_BBDOWN_PART = re.compile(r"(?:\[P|解析P|下载P)(\d+)")
+# 未使用进度模板时 yt-dlp 的默认输出: "[download]  45.3% of ~ 12.34MiB at  1.23MiB/s ETA 00:12"
+_YTDLP_DEFAULT = re.compile(
+    r"\[download\]\s+(\d{1,3}(?:\.\d+)?)%\s+of\s+~?\s*" + _SIZE +
+    r"(?:\s+at\s+" + _SIZE + r"/s)?"
+    r"(?:\s+ETA\s+([\d:]+))?"
+)
+
+
+class ProgressEvent(NamedTuple):
+    """一次进度更新，字节数和速度（字节/秒）未知时为None"""
+    downloaded: int | None
+    total: int | None
+    speed: float | None
+    eta: float | None
+    part: int | None
+    percent: float | None
+
+
+def _size(number, unit):
+    return int(float(number) * _UNITS[unit])
+
+
+def _number(text):
+    """解析模板输出的数字，yt-dlp 对缺失字段输出 NA"""
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def _clock(text):
+    """将 HH:MM:SS 或 MM:SS 转换为秒"""
+    seconds = 0
+    for field in text.split(":"):
+        seconds = seconds * 60 + int(field)
+    return seconds
+
+
+class ProgressParser:
+    """从单个任务的输出行中提取进度，每个任务一个实例（需要记录当前分P）"""
+
+    def __init__(self, mode):
+        self.mode = mode
+        self.part = None
+        self.parse = self._parse_youtube if mode == "youtube" else self._parse_bilibili
+
+    def _parse_bilibili(self, line):
+        # 绝大多数日志行不含%，先用成本最低的判断过滤
+        if "%" not in line:
+            if "P" in line:
+                match = _BBDOWN_PART.search(line)
+                if match:
+                    self.part = int(match.group(1))
+            return None
+        match = _BBDOWN_PROGRESS.search(line)
+        if not match:
+            return None
+        percent, done, done_unit, total, total_unit, speed, speed_unit = match.groups()
+        downloaded = _size(done, done_unit) if done else None
+        total_bytes = _size(total, total_unit) if total else None
+        speed_bytes = float(_size(speed, speed_unit)) if speed else None
+        eta = None
+        if speed_bytes and downloaded is not None and total_bytes is not None:
+            eta = max(total_bytes - downloaded, 0) / speed_bytes
+        return ProgressEvent(downloaded, total_bytes, speed_bytes, eta, self.part, float(percent))
+
+    def _parse_youtube(self, line):
+        if line.startswith(YTDLP_PROGRESS_PREFIX):
+            fields = line.split()
+            if len(fields) < 6:
+                return None
+            downloaded, total, speed, eta, index = (_number(field) for field in fields[1:6])
+            if index is not None:
+                self.part = int(index)
+            percent = None
+            if downloaded is not None and total:
+                percent = downloaded * 100 / total
+            return ProgressEvent(
+                int(downloaded) if downloaded is not None else None,
+                int(total) if total is not None else None,
+                speed, eta, self.part, percent,
+            )
+        if line.startswith("[download]") and "%" in line:
+            match = _YTDLP_DEFAULT.search(line)
+            if not match:
+                return None
+            percent, total, total_unit, speed, speed_unit, eta = match.groups()
+            total_bytes = _size(total, total_unit)
+            return ProgressEvent(
+                int(total_bytes * float(percent) / 100), total_bytes,
+                float(_size(speed, speed_unit)) if speed else None,
+                _clock(eta) if eta else None, self.part, float(percent),
+            )
+        return None
+
+
+def format_size(size):
+    """格式化字节数"""
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}TB"
+
+
+if __name__ == "__main__":
+    # 解析性能测试
+    import time
+
+    lines = [
+        "████████████--------  60.2% - 12.34MB/20.50MB 5.12MB/s",
+        "[P1] [123456] [第一集] [00:10:00]",
+        "2024-01-01 00:00:00.000 - 开始下载P1视频...",
+        "普通日志行，不包含进度信息",
+    ] * 25000
+    parser = ProgressParser("bilibili")
+    start = time.perf_counter()
+    for line in lines:
+        parser.parse(line)
+    elapsed = time.perf_counter() - start
+    print(f"BBDown: {len(lines)} 行 {elapsed * 1000:.1f}ms, {len(lines) / elapsed:,.0f} 行/秒")
+
+    lines = [
+        f"{YTDLP_PROGRESS_PREFIX} 1048576 10485760 524288.0 18 NA",
+        "[download]  45.3% of ~ 12.34MiB at  1.23MiB/s ETA 00:12",
+        "[youtube] abc: Downloading webpage",
+    ] * 33000
+    parser = ProgressParser("youtube")
+    start = time.perf_counter()
+    for line in lines:
+        parser.parse(line)
+    elapsed = time.perf_counter() - start
+    print(f"yt-dlp: {len(lines)} 行 {elapsed * 1000:.1f}ms, {len(lines) / elapsed:,.0f} 行/秒")
@@ -0,0 +1,242 @@
+# 二维码生成（字节模式、M级纠错、版本1-10），用于在程序内显示登录二维码，不依赖第三方模块
+
+# 版本 -> (每块纠错码字数, [(块数, 每块数据码字数)])
+_EC_BLOCKS = {
+    1: (10, [(1, 16)]),
+    2: (16, [(1, 28)]),
+    3: (26, [(1, 44)]),
+    4: (18, [(2, 32)]),
+    5: (24, [(2, 43)]),
+    6: (16, [(4, 27)]),
+    7: (18, [(4, 31)]),
+    8: (22, [(2, 38), (2, 39)]),
+    9: (22, [(3, 36), (2, 37)]),
+    10: (26, [(4, 43), (1, 44)]),
+}
+# 校正图形的中心坐标
+_ALIGNMENT = {
+    1: [], 2: [6, 18], 3: [6, 22], 4: [6, 26], 5: [6, 30],
+    6: [6, 34], 7: [6, 22, 38], 8: [6, 24, 42], 9: [6, 26, 46], 10: [6, 28, 50],
+}
+# M级纠错的格式信息标识
+_EC_LEVEL_M = 0b00
+
+# GF(256) 指数表和对数表（本原多项式 0x11D）
+_EXP = [0] * 512
+_LOG = [0] * 256
+_value = 1
+for _i in range(255):
+    _EXP[_i] = _value
+    _LOG[_value] = _i
+    _value <<= 1
+    if _value & 0x100:
+        _value ^= 0x11D
+for _i in range(255, 512):
+    _EXP[_i] = _EXP[_i - 255]
+
+
+def _rs_remainder(data, degree):
+    """Reed-Solomon纠错码字"""
+    generator = [1]
+    for i in range(degree):
+        product = [0] * (len(generator) + 1)
+        for j, coefficient in enumerate(generator):
+            product[j] ^= coefficient
+            if coefficient:
+                product[j + 1] ^= _EXP[_LOG[coefficient] + i]
+        generator = product
+    remainder = list(data) + [0] * degree
+    for i in range(len(data)):
+        factor = remainder[i]
+        if factor:
+            for j in range(1, len(generator)):
+                if generator[j]:
+                    remainder[i + j] ^= _EXP[_LOG[generator[j]] + _LOG[factor]]
+    return remainder[len(data):]
+
+
+def _bch(value, generator, bits):
+    """BCH校验位（格式信息和版本信息）"""
+    remainder = value << bits
+    length = generator.bit_length()
+    while remainder.bit_length() >= length:
+        remainder ^= generator << (remainder.bit_length() - length)
+    return (value << bits) | remainder
+
+
+def _codewords(data, version):
+    """数据码字加上纠错码字，按块交错排列"""
+    ec_count, groups = _EC_BLOCKS[version]
+    capacity = sum(count * size for count, size in groups)
+    bits = [0, 1, 0, 0]
+    count_bits = 8 if version < 10 else 16
+    bits += [(len(data) >> i) & 1 for i in reversed(range(count_bits))]
+    for byte in data:
+        bits += [(byte >> i) & 1 for i in reversed(range(8))]
+    bits += [0] * min(4, capacity * 8 - len(bits))
+    bits += [0] * (-len(bits) % 8)
+    payload = [int("".join(map(str, bits[i:i + 8])), 2) for i in range(0, len(bits), 8)]
+    pad = [0xEC, 0x11]
+    payload += [pad[i % 2] for i in range(capacity - len(payload))]
+
+    blocks = []
+    offset = 0
+    for count, size in groups:
+        for _ in range(count):
+            blocks.append(payload[offset:offset + size])
+            offset += size
+    result = []
+    for i in range(max(len(block) for block in blocks)):
+        result += [block[i] for block in blocks if i < len(block)]
+    ec_blocks = [_rs_remainder(block, ec_count) for block in blocks]
+    for i in range(ec_count):
+        result += [block[i] for block in ec_blocks]
+    return result
+
+
+_MASKS = [
+    lambda r, c: (r + c) % 2 == 0,
+    lambda r, c: r % 2 == 0,
+    lambda r, c: c % 3 == 0,
+    lambda r, c: (r + c) % 3 == 0,
+    lambda r, c: (r // 2 + c // 3) % 2 == 0,
+    lambda r, c: r * c % 2 + r * c % 3 == 0,
+    lambda r, c: (r * c % 2 + r * c % 3) % 2 == 0,
+    lambda r, c: ((r + c) % 2 + r * c % 3) % 2 == 0,
+]
+
+
+def _function_patterns(version):
+    """定位、分隔、校正、时序图形，返回 (模块, 是否为功能区域)"""
+    size = version * 4 + 17
+    modules = [[False] * size for _ in range(size)]
+    reserved = [[False] * size for _ in range(size)]
+
+    def put(row, column, dark):
+        modules[row][column] = dark
+        reserved[row][column] = True
+
+    for row, column in ((0, 0), (0, size - 7), (size - 7, 0)):
+        for r in range(-1, 8):
+            for c in range(-1, 8):
+                if 0 <= row + r < size and 0 <= column + c < size:
+                    dark = 0 <= r <= 6 and 0 <= c <= 6 and (
+                        r in (0, 6) or c in (0, 6) or (2 <= r <= 4 and 2 <= c <= 4))
+                    put(row + r, column + c, dark)
+    positions = _ALIGNMENT[version]
+    for row in positions:
+        for column in positions:
+            # 与定位图形重叠的位置不放置
+            if reserved[row][column]:
+                continue
+            for r in range(-2, 3):
+                for c in range(-2, 3):
+                    put(row + r, column + c, max(abs(r), abs(c)) != 1)
+    for i in range(8, size - 8):
+        put(6, i, i % 2 == 0)
+        put(i, 6, i % 2 == 0)
+    # 固定的深色模块，以及格式信息、版本信息的位置
+    put(size - 8, 8, True)
+    for i in range(9):
+        reserved[8][i] = reserved[i][8] = True
+    for i in range(8):
+        reserved[8][size - 1 - i] = reserved[size - 1 - i][8] = True
+    if version >= 7:
+        for i in range(18):
+            reserved[i // 3][size - 11 + i % 3] = reserved[size - 11 + i % 3][i // 3] = True
+    return modules, reserved
+
+
+def _place_info(modules, version, mask):
+    size = len(modules)
+    info = _bch((_EC_LEVEL_M << 3) | mask, 0x537, 10) ^ 0x5412
+    for i in range(15):
+        dark = (info >> i) & 1 == 1
+        # 左上角
+        if i < 6:
+            modules[i][8] = dark
+        elif i < 8:
+            modules[i + 1][8] = dark
+        else:
+            modules[size - 15 + i][8] = dark
+        # 右上角和左下角
+        if i < 8:
+            modules[8][size - 1 - i] = dark
+        elif i < 9:
+            modules[8][15 - i] = dark
+        else:
+            modules[8][14 - i] = dark
+    if version >= 7:
+        info = _bch(version, 0x1F25, 12)
+        for i in range(18):
+            dark = (info >> i) & 1 == 1
+            modules[i // 3][size - 11 + i % 3] = dark
+            modules[size - 11 + i % 3][i // 3] = dark
+
+
+def _penalty(modules):
+    """遮罩评分，分数越低越容易识别"""
+    size = len(modules)
+    score = 0
+    lines = modules + [list(column) for column in zip(*modules)]
+    for line in lines:
+        run = 1
+        for i in range(1, size + 1):
+            if i < size and line[i] == line[i - 1]:
+                run += 1
+                continue
+            if run >= 5:
+                score += run - 2
+            run = 1
+        text = "".join("1" if dark else "0" for dark in line)
+        score += 40 * (text.count("10111010000") + text.count("00001011101"))
+    for r in range(size - 1):
+        for c in range(size - 1):
+            if modules[r][c] == modules[r][c + 1] == modules[r + 1][c] == modules[r + 1][c + 1]:
+                score += 3
+    dark = sum(map(sum, modules))
+    score += abs(dark * 20 - size * size * 10) // (size * size) * 10
+    return score
+
+
+def qr_matrix(text):
+    """生成二维码，返回模块矩阵（True为深色，不含空白边框），内容过长时抛出ValueError"""
+    data = text.encode("utf-8")
+    for version, (ec_count, groups) in _EC_BLOCKS.items():
+        capacity = sum(count * size for count, size in groups)
+        if len(data) + (2 if version < 10 else 3) <= capacity:
+            break
+    else:
+        raise ValueError(f"二维码内容过长: {len(data)} 字节")
+
+    codewords = _codewords(data, version)
+    base, reserved = _function_patterns(version)
+    size = len(base)
+    bits = [(byte >> i) & 1 for byte in codewords for i in reversed(range(8))]
+
+    # 数据模块从右下角开始，每两列为一组上下交替填充
+    positions = []
+    column = size - 1
+    upward = True
+    while column > 0:
+        if column == 6:
+            column -= 1
+        rows = range(size - 1, -1, -1) if upward else range(size)
+        for row in rows:
+            for c in (column, column - 1):
+                if not reserved[row][c]:
+                    positions.append((row, c))
+        upward = not upward
+        column -= 2
+
+    best = None
+    for mask, condition in enumerate(_MASKS):
+        modules = [list(row) for row in base]
+        for index, (row, c) in enumerate(positions):
+            dark = index < len(bits) and bits[index] == 1
+            modules[row][c] = dark != condition(row, c)
+        _place_info(modules, version, mask)
+        score = _penalty(modules)
+        if best is None or score < best[0]:
+            best = (score, modules)
+    return best[1]
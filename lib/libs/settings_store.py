@@ -0,0 +1,134 @@
+import os
+from pathlib import Path
+import yaml
+from PySide6.QtCore import QObject, QTimer, QLockFile
+
+try:
+    # libyaml 提供的C实现，解析和写入都快得多
+    from yaml import CSafeLoader as _YamlLoader, CSafeDumper as _YamlDumper
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader, SafeDumper as _YamlDumper
+
+CONFIG_FILE = Path.home() / ".BBDown.yaml"
+
+
+def read_config(path=CONFIG_FILE):
+    """读取整个配置文件，不存在或损坏时返回空字典"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = yaml.load(f, Loader=_YamlLoader)
+    except FileNotFoundError:
+        return {}
+    except (OSError, yaml.YAMLError) as e:
+        print(f"加载配置文件失败: {e}")
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _coerce(value, default):
+    """按默认值的类型转换配置值，无法转换时返回默认值"""
+    if default is None or isinstance(value, type(default)):
+        return value
+    try:
+        if isinstance(default, bool):
+            return str(value).strip().lower() in ("1", "true", "yes", "on")
+        return type(default)(value)
+    except (TypeError, ValueError):
+        return default
+
+
+class SettingsSection:
+    """配置文件中的一段（如 bilibili、youtube、ui）"""
+
+    def __init__(self, store, name):
+        self.store = store
+        self.name = name
+
+    def _values(self):
+        values = self.store.data.get(self.name)
+        return values if isinstance(values, dict) else {}
+
+    def get(self, key, default=None):
+        """读取配置，指定默认值时按默认值的类型返回"""
+        value = self._values().get(key)
+        if value is None:
+            return default
+        return _coerce(value, default)
+
+    def __contains__(self, key):
+        return self._values().get(key) is not None
+
+    def as_dict(self):
+        return dict(self._values())
+
+    def update(self, values):
+        """修改配置，稍后自动写入文件"""
+        self.store.update_section(self.name, values)
+
+
+class SettingsStore(QObject):
+    """统一的配置存储
+
+    启动时只解析一次配置文件；修改后延迟合并写入，写入时持有锁文件，
+    先写临时文件再原子替换，并以磁盘上的最新内容为基础只覆盖本程序修改过的段，
+    避免程序崩溃或同时运行多个实例时损坏配置文件。
+    """
+
+    # 修改后延迟写入的时间（毫秒）
+    SAVE_DELAY = 1000
+    # 等待其他实例释放锁文件的时间（毫秒）
+    LOCK_TIMEOUT = 3000
+
+    def __init__(self, path=CONFIG_FILE, parent=None):
+        super().__init__(parent)
+        self.path = Path(path)
+        self.data = read_config(self.path)
+        # 修改过、需要写入的段
+        self._dirty = set()
+        self._save_timer = QTimer(self)
+        self._save_timer.setSingleShot(True)
+        self._save_timer.setInterval(self.SAVE_DELAY)
+        self._save_timer.timeout.connect(self.flush)
+
+    def section(self, name):
+        return SettingsSection(self, name)
+
+    def update_section(self, name, values):
+        """合并修改到指定段，内容有变化时安排写入"""
+        current = self.data.get(name)
+        current = dict(current) if isinstance(current, dict) else {}
+        merged = dict(current)
+        merged.update(values)
+        if merged == current:
+            return
+        self.data[name] = merged
+        self._dirty.add(name)
+        self._save_timer.start()
+
+    def flush(self):
+        """立即写入修改过的段"""
+        self._save_timer.stop()
+        if not self._dirty:
+            return
+        lock = QLockFile(str(self.path) + ".lock")
+        if not lock.tryLock(self.LOCK_TIMEOUT):
+            print("保存配置文件失败: 配置文件被其他程序锁定")
+            self._save_timer.start()
+            return
+        try:
+            # 以磁盘上的最新内容为基础，保留其他实例修改的段
+            data = read_config(self.path)
+            for name in self._dirty:
+                data[name] = self.data[name]
+            temp_path = self.path.with_name(self.path.name + ".tmp")
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                yaml.dump(data, f, Dumper=_YamlDumper, allow_unicode=True, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+            self.data = data
+            self._dirty.clear()
+        except OSError as e:
+            print(f"保存配置文件失败: {e}")
+        finally:
+            lock.unlock()
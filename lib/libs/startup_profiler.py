@@ -0,0 +1,28 @@
+import sys
+import time
+
+
+class StartupProfiler:
+    """记录启动各阶段的耗时，使用 --profile-startup 启动时在首次绘制后输出"""
+
+    def __init__(self, start=None, enabled=False):
+        self.enabled = enabled
+        self.start = start if start is not None else time.perf_counter()
+        self._last = self.start
+        # [(阶段名称, 耗时秒数)]
+        self.phases = []
+
+    def checkpoint(self, name):
+        """记录从上一个检查点到现在的耗时"""
+        now = time.perf_counter()
+        self.phases.append((name, now - self._last))
+        self._last = now
+
+    def report(self, file=sys.stderr):
+        if not self.enabled:
+            return
+        total = self._last - self.start
+        print("启动耗时:", file=file)
+        for name, elapsed in self.phases:
+            print(f"  {name:<12}{elapsed * 1000:8.1f}ms", file=file)
+        print(f"  {'合计':<12}{total * 1000:8.1f}ms", file=file)
@@ -0,0 +1,72 @@
+import codecs
+import re
+
+# 换行符：\r\n、\n，以及进度条刷新时单独使用的\r
+_LINE_BREAK = re.compile(r"\r\n|\r|\n")
+
+
+class StreamDecoder:
+    """进程输出的增量解码器
+
+    每个进程（的每个输出流）使用一个实例：多字节字符被拆到两次readyRead中时
+    由增量解码器拼接；未以换行结尾的内容保留到下一次，按完整行返回。
+    编码在第一次出现非ASCII内容时确定（UTF-8失败则改用GBK），之后不再切换。
+    """
+
+    # 未换行内容最多保留的字符数，超过后强制作为一行输出
+    MAX_CARRY = 1 << 20
+
+    def __init__(self, max_carry=MAX_CARRY):
+        self.max_carry = max_carry
+        self.encoding = None
+        self._decoder = codecs.getincrementaldecoder("utf-8")("strict")
+        self._carry = ""
+
+    def feed(self, data):
+        """输入一段原始字节，返回其中已完整的行（不含换行符）"""
+        return self._split(self._decode(data))
+
+    def flush(self):
+        """进程结束时调用，返回剩余未换行的内容"""
+        text = self._carry + self._decoder.decode(b"", final=True)
+        self._carry = ""
+        if not text:
+            return []
+        parts = _LINE_BREAK.split(text)
+        # 保留到最后的\r也是换行，不作为内容输出，也不产生空行
+        if not parts[-1]:
+            parts.pop()
+        return parts
+
+    def _decode(self, data):
+        if self.encoding is not None:
+            return self._decoder.decode(data)
+        try:
+            text = self._decoder.decode(data)
+        except UnicodeDecodeError:
+            # 不是UTF-8，连同解码器中残留的半个字符一起改用GBK重新解码
+            buffered, _ = self._decoder.getstate()
+            self.encoding = "gbk"
+            self._decoder = codecs.getincrementaldecoder("gbk")("replace")
+            return self._decoder.decode(buffered + bytes(data))
+        if not text.isascii():
+            # 已出现合法的非ASCII字符，确定为UTF-8，之后的错误字节替换处理
+            self.encoding = "utf-8"
+            self._decoder.errors = "replace"
+        return text
+
+    def _split(self, text):
+        if not text:
+            return []
+        text = self._carry + text
+        # 以\r结尾时可能是被拆开的\r\n，留到下一次判断
+        hold = ""
+        if text.endswith("\r"):
+            text, hold = text[:-1], "\r"
+        parts = _LINE_BREAK.split(text)
+        carry = parts.pop()
+        if len(carry) > self.max_carry:
+            parts.append(carry)
+            carry = ""
+        self._carry = carry + hold
+        return parts
@@ -0,0 +1,172 @@
+import json
+import os
+import time
+from PySide6.QtCore import QObject, Signal
+from lib.libs.app_dirs import data_path
+from lib.libs.url_classifier import classify_url, canonical_video_key
+from lib.bilibili.collection_expander import CollectionExpander
+from lib.youtube.channel_lister import YouTubeChannelLister
+
+# 可以订阅的地址类型：列表需按从新到旧排列，才能在遇到已见过的视频时停止
+SUBSCRIBABLE = {("bilibili", "space"), ("bilibili", "favorites"), ("youtube", "space")}
+
+
+def subscription_url(url):
+    """规范化的订阅地址，不支持订阅时返回None"""
+    match = classify_url(url)
+    if match is None or (match.site, match.kind) not in SUBSCRIBABLE:
+        return None
+    if match.kind == "space":
+        # 去掉 spm_id_from 等参数
+        return match.url.split("?")[0].rstrip("/")
+    return match.url
+
+
+class SubscriptionStore:
+    """订阅列表及每个订阅已见过的最新视频（高水位标记），保存在JSON文件中"""
+
+    # 每个订阅保存的最新视频数，最新的视频被删除后仍能找到标记
+    MARK_SIZE = 5
+
+    def __init__(self, path=data_path / "subscriptions.json"):
+        self.path = path
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.sources = json.load(f)
+        except (OSError, ValueError):
+            self.sources = {}
+
+    def urls(self):
+        return list(self.sources)
+
+    def add(self, url):
+        """添加订阅，地址不支持订阅时返回False"""
+        url = subscription_url(url)
+        if url is None:
+            return False
+        self.sources.setdefault(url, {"mark": None, "synced_at": None})
+        return True
+
+    def remove(self, url):
+        return self.sources.pop(subscription_url(url) or url.strip(), None) is not None
+
+    def mark(self, url):
+        """已见过的最新视频的规范编号，从未同步过时返回None"""
+        return self.sources.get(url, {}).get("mark")
+
+    def update_mark(self, url, new_urls):
+        """同步完成后记录最新的视频，new_urls为本次新发现的视频（从新到旧）"""
+        entry = self.sources.setdefault(url, {})
+        keys = [key for key in map(canonical_video_key, new_urls[:self.MARK_SIZE]) if key]
+        entry["mark"] = (keys + (entry.get("mark") or []))[:self.MARK_SIZE]
+        entry["synced_at"] = time.time()
+
+    def retry(self, url):
+        """上次同步时下载失败、需要重新下载的视频地址"""
+        return list(self.sources.get(url, {}).get("retry") or [])
+
+    def set_retry(self, url, urls):
+        if url in self.sources:
+            self.sources[url]["retry"] = list(dict.fromkeys(urls))
+
+    def save(self):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # 先写临时文件再替换，避免写入中断时损坏订阅列表
+            temp_path = self.path.with_suffix(".tmp")
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.sources, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"保存订阅列表失败: {e}")
+
+
+class SubscriptionSync(QObject):
+    """增量同步所有订阅：逐页列出视频，遇到上次同步时最新的视频即停止，只返回新视频
+
+    新视频下载结束后调用 commit() 更新标记，并记录下载失败的视频，
+    标记之前的视频不会再被列出，因此失败的视频在下次同步开始时直接重新加入。
+    """
+
+    # (订阅地址, 新视频地址列表)
+    new_items = Signal(str, list)
+    # (订阅地址, 错误信息)
+    failed = Signal(str, str)
+    # 新视频总数
+    finished = Signal(int)
+
+    def __init__(self, store, net_manager, yt_dlp_path=None, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.expander = CollectionExpander(net_manager, self)
+        self.lister = YouTubeChannelLister(yt_dlp_path, self)
+        for source in (self.expander, self.lister):
+            source.items_found.connect(self._on_items_found)
+            source.finished.connect(self._on_finished)
+            source.failed.connect(self._on_failed)
+        # 订阅地址 -> 本次发现的新视频
+        self._found = {}
+        # 列出完成、等待 commit() 更新标记的订阅地址 -> 新视频（从新到旧）
+        self._listed = {}
+        # 订阅地址 -> 本次重新加入的上次下载失败的视频
+        self._retrying = {}
+        self.total = 0
+
+    @property
+    def pending(self):
+        return bool(self._found)
+
+    def start(self):
+        """开始同步全部订阅"""
+        for url in self.store.urls():
+            # 从未同步过的订阅使用空集合，逐页列出全部视频
+            stop_at = self.store.mark(url) or []
+            retry = self.store.retry(url)
+            if retry:
+                self._retrying[url] = retry
+                self.new_items.emit(url, retry)
+            self._found[url] = []
+            if not (self.expander.expand(url, stop_at) or self.lister.expand(url, stop_at)):
+                self._found.pop(url)
+                self.failed.emit(url, "无法同步该地址")
+        if not self._found:
+            self.finished.emit(0)
+
+    def _on_items_found(self, url, urls):
+        if url in self._found:
+            self._found[url].extend(urls)
+            self.new_items.emit(url, urls)
+
+    def _on_finished(self, url, count):
+        found = self._found.pop(url, None)
+        if found is None:
+            return
+        self._listed[url] = found
+        self.total += len(found)
+        self._check_finished()
+
+    def _on_failed(self, url, message):
+        # 失败时不更新标记，下次同步时重新列出
+        if self._found.pop(url, None) is not None:
+            self.failed.emit(url, message)
+            self._check_finished()
+
+    def _check_finished(self):
+        if not self._found:
+            self.finished.emit(self.total)
+
+    def commit(self, failed_keys):
+        """新视频下载结束后更新标记，failed_keys为下载失败的视频的规范编号
+
+        下载失败的视频（包括重新加入后再次失败的）保存下来，下次同步时重新加入；
+        列出失败的订阅不更新标记
+        """
+        for url in set(self._listed) | set(self._retrying):
+            found = self._listed.get(url, [])
+            if url in self._listed:
+                self.store.update_mark(url, found)
+            self.store.set_retry(url, [video_url for video_url in self._retrying.get(url, []) + found
+                                       if canonical_video_key(video_url) in failed_keys])
+        self._listed.clear()
+        self._retrying.clear()
+        self.store.save()
@@ -0,0 +1,168 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+from lib.libs.app_dirs import data_path
+
+# 名称 -> (版本参数, {功能: (参数, 输出中包含的文字)})
+TOOLS = {
+    "BBDown": (["--version"], {"serve": (["--help"], "serve"), "mp4box": (["--help"], "--use-mp4box")}),
+    "yt-dlp": (["--version"], {}),
+    "ffmpeg": (["-version"], {}),
+    "aria2c": (["--version"], {}),
+    "MP4Box": (["-version"], {}),
+}
+
+# 单次探测的超时时间（秒）
+PROBE_TIMEOUT = 5
+
+
+def _run(path, arguments):
+    """运行工具并返回输出，失败时返回空字符串"""
+    try:
+        result = subprocess.run(
+            [path, *arguments], capture_output=True, text=True, errors="replace", timeout=PROBE_TIMEOUT,
+            # 打包后的Windows程序没有控制台，避免每次探测弹出黑窗口
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0) if sys.platform == "win32" else 0)
+    except (OSError, subprocess.SubprocessError):
+        return ""
+    return result.stdout + result.stderr
+
+
+def probe_tool(name, cached=None):
+    """查找工具并探测版本和功能，可执行文件未变化（路径、修改时间、大小相同）时直接返回缓存"""
+    version_arguments, features = TOOLS[name]
+    path = shutil.which(name)
+    if path is None:
+        return {"path": None}
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return {"path": None}
+    if cached and (cached.get("path"), cached.get("mtime"), cached.get("size")) == (path, stat.st_mtime, stat.st_size):
+        return cached
+    output = _run(path, version_arguments).strip()
+    # 多个功能使用相同参数（如 --help）时只运行一次
+    outputs = {}
+    for arguments, _ in features.values():
+        if tuple(arguments) not in outputs:
+            outputs[tuple(arguments)] = _run(path, arguments)
+    return {
+        "path": path,
+        "mtime": stat.st_mtime,
+        "size": stat.st_size,
+        "version": output.splitlines()[0].strip() if output else None,
+        "features": [feature for feature, (arguments, marker) in features.items()
+                     if marker in outputs[tuple(arguments)]],
+    }
+
+
+class _ProbeTask(QRunnable):
+    def __init__(self, registry, cached):
+        super().__init__()
+        self.registry = registry
+        self.cached = cached
+
+    def run(self):
+        for name in TOOLS:
+            self.registry._probed.emit(name, probe_tool(name, self.cached.get(name)))
+        self.registry._probe_finished.emit()
+
+
+class ToolRegistry(QObject):
+    """外部工具（BBDown、yt-dlp、ffmpeg、aria2c、MP4Box）的路径、版本和功能
+
+    结果缓存在JSON文件中，启动时直接读取，不扫描PATH、不启动进程；
+    start() 在后台线程中重新查找并探测，只有可执行文件变化时才重新运行 --version。
+    还没有探测结果时，path() 同步查找一次路径。
+    """
+
+    # 工具名称，探测结果更新后发出
+    probed = Signal(str)
+    # 全部工具探测完成
+    finished = Signal()
+    # 后台线程 -> 界面线程
+    _probed = Signal(str, dict)
+    _probe_finished = Signal()
+
+    def __init__(self, cache_file=data_path / "tools.json", parent=None):
+        super().__init__(parent)
+        self.cache_file = cache_file
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                self._tools = json.load(f)
+        except (OSError, ValueError):
+            self._tools = {}
+        self.probing = False
+        # 本次运行中已确认过的工具
+        self._checked = set()
+        self._probed.connect(self._on_probed)
+        self._probe_finished.connect(self._on_probe_finished)
+
+    def path(self, name):
+        """工具的路径，未找到时返回None"""
+        entry = self._tools.get(name)
+        if name in self._checked:
+            return entry.get("path")
+        self._checked.add(name)
+        if entry is not None and entry.get("path") and os.path.isfile(entry["path"]):
+            return entry["path"]
+        # 还没有探测结果、缓存的文件已被删除，或上次未找到（可能已安装）
+        path = shutil.which(name)
+        if entry is None or entry.get("path") != path:
+            self._tools[name] = {"path": path}
+        return path
+
+    def available(self, name):
+        return self.path(name) is not None
+
+    def version(self, name):
+        return self._tools.get(name, {}).get("version")
+
+    def has_feature(self, name, feature):
+        return feature in self._tools.get(name, {}).get("features", ())
+
+    def start(self):
+        """在后台线程中查找并探测所有工具"""
+        if self.probing:
+            return
+        self.probing = True
+        cached = {name: dict(entry) for name, entry in self._tools.items()}
+        QThreadPool.globalInstance().start(_ProbeTask(self, cached))
+
+    def _on_probed(self, name, entry):
+        self._checked.add(name)
+        if entry != self._tools.get(name):
+            self._tools[name] = entry
+            self.probed.emit(name)
+
+    def _on_probe_finished(self):
+        self.probing = False
+        self.save()
+        self.finished.emit()
+
+    def save(self):
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            temp_file = self.cache_file.with_suffix(".tmp")
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(self._tools, f, ensure_ascii=False, indent=2)
+            os.replace(temp_file, self.cache_file)
+        except OSError as e:
+            print(f"保存工具信息失败: {e}")
+
+
+if __name__ == "__main__":
+    # 对比直接探测和使用缓存的耗时
+    import time
+
+    cached = {}
+    for label in ("探测", "缓存"):
+        start = time.perf_counter()
+        for name in TOOLS:
+            cached[name] = probe_tool(name, cached.get(name))
+        print(f"{label} {(time.perf_counter() - start) * 1000:.1f}ms")
+    for name, entry in cached.items():
+        print(f"{name:<8}{entry.get('path') or '未找到'}  {entry.get('version') or ''}  {entry.get('features') or ''}")
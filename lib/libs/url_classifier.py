@@ -0,0 +1,180 @@
+import re
+from typing import NamedTuple
+
+
+class UrlMatch(NamedTuple):
+    """地址分类结果"""
+    # 站点: bilibili / youtube
+    site: str
+    # 类型: video / episode / season / collection / favorites / space / playlist / short
+    kind: str
+    # 提取出的编号，如 BV号、av123、ep123、合集sid、用户UID、YouTube视频ID
+    id: str
+    # 匹配到的原始文本
+    url: str
+
+
+# 地址中允许出现的字符（遇到空白、引号、尖括号和中文标点时结束）
+_URL_TAIL = r'[^\s"\'<>()\[\]{}，。！？；、（）【】「」]*'
+_BILIBILI = r"(?:(?:www|m)\.)?bilibili\.com/"
+_SPACE = r"space\.bilibili\.com/\d+/"
+_YOUTUBE = r"(?:(?:www|m|music)\.)?youtube\.com/"
+_QUERY = r"\?(?:[^\s#\"'<>&]*&)*"
+
+# (站点, 类型, 正则, 编号的正则, 是否为完整地址)；正则中的 {id} 为编号所在位置
+# 同一地址可能被多个规则匹配时，先出现的规则优先（如合集要排在个人空间之前）
+SITE_MATCHERS = [
+    ("bilibili", "video", _BILIBILI + r"video/{id}", r"BV[0-9A-Za-z]{10}|av\d+", True),
+    ("bilibili", "episode", _BILIBILI + r"bangumi/play/{id}", r"ep\d+", True),
+    ("bilibili", "season", _BILIBILI + r"bangumi/(?:play|media)/{id}", r"(?:ss|md)\d+", True),
+    ("bilibili", "collection", _SPACE + r"(?:lists/|channel/(?:collection|series)detail" + _QUERY + r"sid=){id}",
+     r"\d+", True),
+    ("bilibili", "favorites", _SPACE + r"favlist" + _QUERY + r"fid={id}", r"\d+", True),
+    ("bilibili", "space", r"space\.bilibili\.com/{id}", r"\d+", True),
+    ("bilibili", "short", r"b23\.tv/{id}", r"[0-9A-Za-z]+", True),
+    ("youtube", "video", r"(?:" + _YOUTUBE + r"(?:watch" + _QUERY + r"v=|shorts/|live/|embed/)|youtu\.be/){id}",
+     r"[\w-]{11}", True),
+    ("youtube", "playlist", _YOUTUBE + r"playlist" + _QUERY + r"list={id}", r"[\w-]+", True),
+    ("youtube", "space", _YOUTUBE + r"{id}", r"@[\w.-]+|channel/UC[\w-]{22}|c/[\w-]+", True),
+    # 单独的BV号/av号
+    ("bilibili", "video", r"{id}", r"BV[0-9A-Za-z]{10}|av\d+", False),
+]
+
+
+def _compile(matchers):
+    """将所有规则合并为一个带命名分组的正则，第i条规则的分组为 m{i}，编号分组为 m{i}_id"""
+    alternatives = []
+    for index, (_, _, pattern, id_pattern, full_url) in enumerate(matchers):
+        pattern = pattern.replace("{id}", f"(?P<m{index}_id>{id_pattern})")
+        if full_url:
+            pattern = r"(?:https?://)?" + pattern + _URL_TAIL
+        else:
+            pattern = pattern + r"(?![0-9A-Za-z])"
+        alternatives.append(f"(?P<m{index}>{pattern})")
+    # 前面是英文字母数字、点、斜杠、等号时不是地址的开头（允许紧跟在中文后面）
+    return re.compile(r"(?<![0-9A-Za-z_./=@-])(?:" + "|".join(alternatives) + ")")
+
+
+_PATTERN = _compile(SITE_MATCHERS)
+
+
+def _to_match(match):
+    name = match.lastgroup
+    site, kind = SITE_MATCHERS[int(name[1:])][:2]
+    # 去掉句末标点
+    return UrlMatch(site, kind, match.group(name + "_id"), match.group(name).rstrip(".,;:!?'"))
+
+
+def classify_url(text):
+    """识别以地址或编号开头的文本，无法识别时返回None"""
+    match = _PATTERN.match(text.strip())
+    return _to_match(match) if match else None
+
+
+def find_urls(text):
+    """一次扫描找出文本中所有可识别的地址和编号，按出现顺序返回 [UrlMatch]"""
+    return [_to_match(match) for match in _PATTERN.finditer(text)]
+
+
+def search_url(text, site=None, kind=None):
+    """返回文本中第一个符合站点和类型的地址，没有时返回None"""
+    for match in _PATTERN.finditer(text):
+        result = _to_match(match)
+        if (site is None or result.site == site) and (kind is None or result.kind == kind):
+            return result
+    return None
+
+
+# 多P视频的分P参数
+_PAGE_PATTERN = re.compile(r"[?&]p=(\d+)")
+
+# B站av号与BV号互相转换使用的常量
+_BV_ALPHABET = "FcwAPNKTMug3GV5Lj7EJnHpWsx4tb8haYeviqBz6rkCy12mUSDQX9RdoZf"
+_BV_XOR = 23442827791579
+_BV_MAX_AID = 1 << 51
+
+
+def av_to_bv(aid):
+    """av号（整数）转换为BV号"""
+    chars = list("BV1000000000")
+    index = len(chars) - 1
+    value = (_BV_MAX_AID | int(aid)) ^ _BV_XOR
+    while value:
+        chars[index] = _BV_ALPHABET[value % 58]
+        value //= 58
+        index -= 1
+    chars[3], chars[9] = chars[9], chars[3]
+    chars[4], chars[7] = chars[7], chars[4]
+    return "".join(chars)
+
+
+def bv_to_av(bvid):
+    """BV号转换为av号（整数）"""
+    chars = list(bvid)
+    chars[3], chars[9] = chars[9], chars[3]
+    chars[4], chars[7] = chars[7], chars[4]
+    value = 0
+    for char in chars[3:]:
+        value = value * 58 + _BV_ALPHABET.index(char)
+    return (value & (_BV_MAX_AID - 1)) ^ _BV_XOR
+
+
+def canonical_video_key(text):
+    """视频的规范编号，如 "bilibili:BV17x411w7KC"（av号统一转换为BV号）、"youtube:dQw4w9WgXcQ"
+
+    指定了第1P以外的分P时带上分P序号，如 "bilibili:BV17x411w7KC:p2"，
+    下载过其中一P不会导致其他分P被跳过。
+    合集、个人空间、短链接等不是单个视频的地址返回None
+    """
+    for match in find_urls(text):
+        if match.site == "bilibili" and match.kind == "video":
+            video_id = match.id if match.id.startswith("BV") else av_to_bv(match.id[2:])
+            page = _PAGE_PATTERN.search(match.url)
+            if page and int(page.group(1)) > 1:
+                return f"bilibili:{video_id}:p{int(page.group(1))}"
+            return f"bilibili:{video_id}"
+        if match.site == "bilibili" and match.kind == "episode":
+            return f"bilibili:{match.id}"
+        if match.site == "youtube" and match.kind == "video":
+            return f"youtube:{match.id}"
+    return None
+
+
+if __name__ == "__main__":
+    # 分类性能测试
+    import time
+
+    samples = [
+        "https://www.bilibili.com/video/BV1xx411c7mu?p=2",
+        "https://m.bilibili.com/video/av170001",
+        "https://www.bilibili.com/bangumi/play/ep123456",
+        "https://www.bilibili.com/bangumi/play/ss12345",
+        "https://space.bilibili.com/392959666/lists/1560264?type=season",
+        "https://space.bilibili.com/392959666/channel/collectiondetail?sid=1560264",
+        "https://space.bilibili.com/392959666/favlist?fid=123456",
+        "https://space.bilibili.com/392959666",
+        "https://b23.tv/abc123",
+        "BV1xx411c7mu",
+        "https://www.youtube.com/watch?v=dQw4w9WgXcQ&list=PL123",
+        "https://youtu.be/dQw4w9WgXcQ",
+        "https://www.youtube.com/shorts/dQw4w9WgXcQ",
+        "https://www.youtube.com/playlist?list=PLabcdefghijklmnop",
+        "https://www.youtube.com/@channel",
+        "https://example.com/not-a-video",
+    ]
+    for sample in samples:
+        print(f"{sample}\n    {classify_url(sample)}")
+
+    urls = samples * 625
+    start = time.perf_counter()
+    for url in urls:
+        classify_url(url)
+    elapsed = time.perf_counter() - start
+    print(f"classify_url: {len(urls)} 个地址 {elapsed * 1000:.2f}ms, 每个 {elapsed / len(urls) * 1e6:.2f}µs")
+
+    # 粘贴的聊天记录
+    text = "\n".join(f"{index}楼: 看看这个 {url}，挺好的" for index, url in enumerate(urls))
+    start = time.perf_counter()
+    found = find_urls(text)
+    elapsed = time.perf_counter() - start
+    print(f"find_urls: {len(text)} 字符找到 {len(found)} 个地址 {elapsed * 1000:.2f}ms")
@@ -1,21 +1,63 @@
+import html
 import re
-from PySide6.QtCore import QTimer
+import sys
+from PySide6.QtCore import Qt, QTimer
 from PySide6.QtWidgets import QApplication
+from lib.libs.url_classifier import classify_url, find_urls, canonical_video_key
 
 
 from PySide6.QtWidgets import QGroupBox, QVBoxLayout, QLineEdit
 
+def extract_urls(text):
+    """提取文本（聊天记录、HTML等）中的所有B站/YouTube地址，按出现顺序返回 [(模式, 地址)]
+
+    同一视频的多个地址（如完整链接和BV号、av号和BV号）只保留第一个，不同分P分别保留。
+    """
+    if "&" in text:
+        # HTML中的 &amp; 等转义
+        text = html.unescape(text)
+    results = []
+    seen = set()
+    for match in find_urls(text):
+        # 与下载记录使用相同的规范编号，合集、个人空间等不是单个视频的地址按编号去重
+        key = canonical_video_key(match.url) or (match.site, match.kind, match.id)
+        if key in seen:
+            continue
+        seen.add(key)
+        results.append((match.site, match.url))
+    return results
+
 
 class URLHandler:
+    # 这些平台上其他程序修改剪贴板时，只有本程序被激活才会发出dataChanged，
+    # 因此在程序处于后台时仍需轮询
+    POLL_PLATFORMS = ("darwin",)
+    # 后台轮询间隔（毫秒）
+    POLL_INTERVAL = 1000
+
     def __init__(self, parent):
         self.parent = parent
         self.last_clipboard_text = ""
         
-        # 初始化剪贴板监听
+        # 监听剪贴板变化
         self.clipboard = QApplication.clipboard()
-        self.clipboard_timer = QTimer(self.parent)
-        self.clipboard_timer.timeout.connect(self.check_clipboard)
-        self.clipboard_timer.start(1000)  # 每秒检查一次剪贴板
+        self.clipboard.dataChanged.connect(self.check_clipboard)
+        self.clipboard_timer = None
+        if sys.platform in self.POLL_PLATFORMS:
+            self.clipboard_timer = QTimer(self.parent)
+            self.clipboard_timer.setInterval(self.POLL_INTERVAL)
+            self.clipboard_timer.timeout.connect(self.check_clipboard)
+            QApplication.instance().applicationStateChanged.connect(self.on_application_state_changed)
+        # 启动后检查一次已有的剪贴板内容
+        QTimer.singleShot(0, self.check_clipboard)
+
+    def on_application_state_changed(self, state):
+        """程序在前台时依靠dataChanged，切到后台后才轮询"""
+        if state == Qt.ApplicationState.ApplicationActive:
+            self.clipboard_timer.stop()
+            self.check_clipboard()
+        else:
+            self.clipboard_timer.start()
         
     def create_url_input_area(self, layout):
         """创建URL输入区域"""
@@ -29,37 +71,16 @@ class URLHandler:
         url_layout.addWidget(self.parent.url_input)
         layout.addWidget(url_group, 1)
 
-    def is_bilibili_url(self, text):
+    @staticmethod
+    def is_bilibili_url(text):
         """判断文本是否为B站链接或BV号"""
-        if not text:
-            return False
-            
-        # B站链接的正则表达式（包括多种可能的URL格式）
-        bilibili_patterns = [
-            r'https?://(www\.)?bilibili\.com/video/BV\w+',
-            r'https://space.bilibili.com/\w+',
-            r'https?://b23\.tv/\w+',
-            r'^BV\w+$'
-        ]
-        
-        # 检查是否匹配B站链接或BV号格式
-        for pattern in bilibili_patterns:
-            if re.match(pattern, text):
-                return True
-        return False
-
-    def is_youtube_url(self, text):
-        if not text:
-            return False
-        youtube_patterns = [
-            r'https?://(?:www\.)?youtube\.com/watch\?v=[\w-]+',
-            r'https?://(?:www\.)?youtube\.com/shorts/[\w-]+',
-        ]
-        # 检查是否匹配
-        for pattern in youtube_patterns:
-            if re.match(pattern, text):
-                return True
-        return False
+        match = classify_url(text) if text else None
+        return match is not None and match.site == "bilibili"
+
+    @staticmethod
+    def is_youtube_url(text):
+        match = classify_url(text) if text else None
+        return match is not None and match.site == "youtube"
 
     @staticmethod
     def convert_space_url(url):
@@ -85,31 +106,59 @@ class URLHandler:
         return url
 
     def check_clipboard(self):
-        """检查剪贴板内容，如果是B站链接则自动填充"""
-        clipboard_text = self.clipboard.text()
-        
+        """检查剪贴板内容，提取其中所有B站/YouTube链接并填入输入框"""
+        mime_data = self.clipboard.mimeData()
+        if mime_data is None:
+            return
+        clipboard_text = mime_data.text() or (mime_data.html() if mime_data.hasHtml() else "")
+
         # 如果剪贴板内容没有变化，则不处理
         if clipboard_text == self.last_clipboard_text:
             return
-            
+
         # 更新上次剪贴板内容
         self.last_clipboard_text = clipboard_text
-        
-        # 检查是否为B站链接或BV号
-        if self.is_bilibili_url(clipboard_text):
-            # 转换新版个人空间合集链接为旧版格式
-            converted_url = self.convert_space_url(clipboard_text)
-
-            self.parent.mode = "bilibili"
-            self.parent.url_input.setText(converted_url)
-            self.activate_windows()
-
-        # 检查是否是youtube视频
-        if self.is_youtube_url(clipboard_text):
-            self.parent.mode = "youtube"
-            self.parent.url_input.setText(clipboard_text)
-            self.activate_windows()
 
+        found = extract_urls(clipboard_text)
+        if not found:
+            return
+        # 转换新版个人空间合集链接为旧版格式
+        urls = [self.convert_space_url(url) if mode == "bilibili" else url for mode, url in found]
+        urls = self.resolve_short_links(urls)
+
+        # 按第一个地址切换模式，下载时每个地址各自按类型构建命令
+        self.parent.mode = found[0][0]
+        self.parent.url_input.setText(" ".join(urls))
+        # 复制链接后立即获取第一个视频的信息
+        self.parent.load_video_info(urls[0])
+        self.activate_windows()
+
+    def resolve_short_links(self, urls):
+        """将已解析过的短链接替换为跳转目标，其余短链接在后台解析"""
+        resolver = self.parent.short_link_resolver
+        result = []
+        for url in urls:
+            match = classify_url(url)
+            if match is not None and match.kind == "short":
+                target = resolver.cached(url)
+                if target is None:
+                    resolver.resolve(url)
+                else:
+                    url = target
+            result.append(url)
+        # 不同短链接可能指向同一视频
+        return list(dict.fromkeys(result))
+
+    def on_short_link_resolved(self, url, target):
+        """短链接解析完成后替换输入框中的地址"""
+        urls = self.parent.url_input.text().split()
+        if url not in urls:
+            return
+        is_first = urls[0] == url
+        urls = list(dict.fromkeys(target if item == url else item for item in urls))
+        self.parent.url_input.setText(" ".join(urls))
+        if is_first:
+            self.parent.load_video_info(target)
 
     def activate_windows(self):
         self.parent.show()
@@ -1,8 +1,9 @@
 from PySide6.QtWidgets import QGroupBox, QHBoxLayout, QVBoxLayout, QLabel, QSizePolicy, QLayout
-from PySide6.QtCore import Qt, QUrl
-from PySide6.QtNetwork import QNetworkRequest
+from PySide6.QtCore import Qt, QUrl, QSize
+from PySide6.QtNetwork import QNetworkRequest, QNetworkReply
 from PySide6.QtGui import QPixmap
-from lib.libs.image_viewer import ImageViewerDialog
+from lib.libs.image_decoder import ImageDecoder
+from lib.libs.pixmap_cache import PixmapCache
 
 
 class ElidedLabel(QLabel):
@@ -43,6 +44,9 @@ class ElidedLabel(QLabel):
 
 class VideoInfoBanner:
     """视频信息横幅管理类"""
+
+    # 完整分辨率解码任务的key后缀
+    FULL_SUFFIX = "#full"
     
     def __init__(self, parent):
         self.parent = parent
@@ -51,7 +55,16 @@ class VideoInfoBanner:
         self.video_title_label = None
         self.video_author_label = None
         self.video_desc_label = None
-        self.original_pixmap = None
+        # 当前封面的原始数据，打开大图时才解码
+        self.cover_data = None
+        # 已缩放的封面的内存缓存，磁盘缓存由 parent.net_manager 上的 QNetworkDiskCache 负责
+        self.pixmap_cache = PixmapCache()
+        # 当前应显示的封面地址，用于丢弃过期的下载结果
+        self._cover_url = None
+        # 在线程池中解码封面，避免大图阻塞界面
+        self.image_decoder = ImageDecoder(parent)
+        self.image_decoder.decoded.connect(self.on_image_decoded, Qt.ConnectionType.QueuedConnection)
+        self.image_decoder.failed.connect(self.on_image_decode_failed, Qt.ConnectionType.QueuedConnection)
         
     def create_video_info_banner(self, layout):
         """创建视频信息横幅区域"""
@@ -109,38 +122,88 @@ class VideoInfoBanner:
         self.set_cover_image(pic)
         
     def set_cover_image(self, image_url: str):
-        """设置封面图片"""
+        """设置封面图片，优先使用内存缓存"""
+        self._cover_url = image_url
+        self.cover_data = None
+        pixmap = self.pixmap_cache.get(image_url)
+        if pixmap is not None:
+            self.show_cover(pixmap)
+            return
+        self._request_image(image_url, self.on_image_downloaded)
+
+    def _request_image(self, image_url, callback):
+        """下载图片，完成后调用 callback(reply, image_url)"""
         request = QNetworkRequest(QUrl(image_url))
+        # 磁盘缓存未过期时直接使用，过期后携带ETag/Last-Modified重新验证
+        request.setAttribute(QNetworkRequest.Attribute.CacheLoadControlAttribute,
+                             QNetworkRequest.CacheLoadControl.PreferNetwork)
         reply = self.parent.net_manager.get(request)
-        reply.finished.connect(lambda: self.on_image_downloaded(reply))
-        
-    def on_image_downloaded(self, reply):
-        """图片下载完成回调"""
+        reply.finished.connect(lambda: callback(reply, image_url))
+
+    def _read_reply(self, reply, image_url):
+        """读取下载结果，已切换到其他视频或下载失败时返回None"""
         data = reply.readAll()
-        pixmap = QPixmap()
-        if pixmap.loadFromData(data):
-            # 保存原始图片数据
-            self.original_pixmap = pixmap
-            
-            # 使用KeepAspectRatioByExpanding模式更好地填充标签区域
-            pixmap = pixmap.scaled(self.video_cover_label.size(), Qt.AspectRatioMode.KeepAspectRatioByExpanding, Qt.TransformationMode.SmoothTransformation)
-            # 如果图片尺寸大于标签尺寸，则居中裁剪
-            if pixmap.width() > self.video_cover_label.width() or pixmap.height() > self.video_cover_label.height():
-                x = max(0, (pixmap.width() - self.video_cover_label.width()) // 2)
-                y = max(0, (pixmap.height() - self.video_cover_label.height()) // 2)
-                pixmap = pixmap.copy(x, y, self.video_cover_label.width(), self.video_cover_label.height())
-            self.video_cover_label.setPixmap(pixmap)
-            self.video_cover_label.setText("")
-            
-            # 为封面标签添加点击事件
-            self.video_cover_label.mousePressEvent = self.show_full_image
-        else:
-            self.video_cover_label.setText("加载失败")
         reply.deleteLater()
-        
+        if image_url != self._cover_url:
+            return None
+        if reply.error() != QNetworkReply.NetworkError.NoError or data.isEmpty():
+            self.video_cover_label.setText("加载失败")
+            return None
+        # 保存原始数据，打开大图时再按原始分辨率解码
+        self.cover_data = data
+        return data
+
+    def on_image_downloaded(self, reply, image_url):
+        """图片下载完成回调，在线程池中直接解码为封面尺寸"""
+        data = self._read_reply(reply, image_url)
+        if data is None:
+            return
+        ratio = self.video_cover_label.devicePixelRatioF()
+        size = self.video_cover_label.size()
+        self.image_decoder.decode(image_url, data, QSize(round(size.width() * ratio), round(size.height() * ratio)))
+
+    def on_image_decoded(self, key, image):
+        """解码完成（界面线程）"""
+        if key.endswith(self.FULL_SUFFIX):
+            if key[:-len(self.FULL_SUFFIX)] == self._cover_url:
+                self.open_image_viewer(image)
+            return
+        pixmap = QPixmap.fromImage(image)
+        pixmap.setDevicePixelRatio(self.video_cover_label.devicePixelRatioF())
+        self.pixmap_cache.put(key, pixmap)
+        if key == self._cover_url:
+            self.show_cover(pixmap)
+
+    def on_image_decode_failed(self, key):
+        if key == self._cover_url:
+            self.video_cover_label.setText("加载失败")
+
+    def show_cover(self, pixmap):
+        """显示已缩放裁剪好的封面"""
+        self.video_cover_label.setPixmap(pixmap)
+        self.video_cover_label.setText("")
+
+        # 为封面标签添加点击事件
+        self.video_cover_label.mousePressEvent = self.show_full_image
+
     def show_full_image(self, event):
-        """显示原始分辨率的图片"""
-        if self.original_pixmap:
-            # 创建图片查看对话框并显示
-            dialog = ImageViewerDialog(self.original_pixmap, self.parent)
-            dialog.show()
\ No newline at end of file
+        """显示原始分辨率的图片，此时才解码完整图片"""
+        if not self._cover_url:
+            return
+        if self.cover_data is not None:
+            self.image_decoder.decode(self._cover_url + self.FULL_SUFFIX, self.cover_data)
+        else:
+            # 封面来自内存缓存，从磁盘缓存重新读取原始数据
+            self._request_image(self._cover_url, self._on_full_image_downloaded)
+
+    def _on_full_image_downloaded(self, reply, image_url):
+        data = self._read_reply(reply, image_url)
+        if data is not None:
+            self.image_decoder.decode(image_url + self.FULL_SUFFIX, data)
+
+    def open_image_viewer(self, image):
+        """创建图片查看对话框并显示"""
+        # 第一次查看大图时才导入
+        from lib.libs.image_viewer import ImageViewerDialog
+        dialog = ImageViewerDialog(image, self.parent)
+        dialog.show()
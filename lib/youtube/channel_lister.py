@@ -0,0 +1,138 @@
+import shutil
+from PySide6.QtCore import QObject, QProcess, Signal
+from lib.libs.url_classifier import classify_url, canonical_video_key
+
+
+class _Listing:
+    """一次列出的状态"""
+
+    def __init__(self, url, target, stop_at):
+        self.url = url
+        # 实际传给yt-dlp的地址（频道主页换成视频页）
+        self.target = target
+        self.stop_at = set(stop_at) if stop_at is not None else None
+        self.start = 1
+        self.count = 0
+        self.process = None
+
+
+class YouTubeChannelLister(QObject):
+    """用 yt-dlp --flat-playlist 列出频道或播放列表中的视频，不下载任何内容
+
+    与B站的 CollectionExpander 接口相同。增量同步时（指定stop_at）每次只列出一页，
+    遇到已见过的视频即停止，通常一次请求即可完成。
+    """
+
+    # 增量同步时每页的视频数
+    PAGE_SIZE = 30
+    MAX_PAGES = 100
+    # 同时运行的yt-dlp进程数
+    MAX_PROCESSES = 2
+
+    # (原地址, 本页的视频地址列表)
+    items_found = Signal(str, list)
+    # (原地址, 视频总数)
+    finished = Signal(str, int)
+    # (原地址, 错误信息)
+    failed = Signal(str, str)
+
+    def __init__(self, yt_dlp_path=None, parent=None):
+        super().__init__(parent)
+        self.yt_dlp_path = yt_dlp_path or shutil.which("yt-dlp")
+        self._listings = {}
+        self._waiting = []
+
+    @staticmethod
+    def target_for(url):
+        """返回需要列出的地址，不是频道或播放列表时返回None"""
+        match = classify_url(url)
+        if match is None or match.site != "youtube":
+            return None
+        if match.kind == "playlist":
+            return match.url
+        if match.kind == "space":
+            # 频道主页列出的是"视频"、"Shorts"等标签页，需要指定视频页
+            base = match.url.split("?")[0].rstrip("/")
+            return base if base.endswith(("/videos", "/shorts", "/streams")) else base + "/videos"
+        return None
+
+    @property
+    def pending(self):
+        return bool(self._listings)
+
+    def expand(self, url, stop_at=None):
+        """开始列出，地址不可列出或未安装yt-dlp时返回False"""
+        target = self.target_for(url)
+        if target is None or not self.yt_dlp_path:
+            return False
+        if url in self._listings:
+            return True
+        listing = self._listings[url] = _Listing(url, target, stop_at)
+        self._waiting.append(listing)
+        self._start_waiting()
+        return True
+
+    def _start_waiting(self):
+        running = sum(1 for listing in self._listings.values() if listing.process is not None)
+        while self._waiting and running < self.MAX_PROCESSES:
+            self._run(self._waiting.pop(0))
+            running += 1
+
+    def _run(self, listing):
+        arguments = ["--flat-playlist", "--print", "id", "--no-warnings", "--ignore-errors"]
+        if listing.stop_at is not None:
+            arguments += ["--playlist-items", f"{listing.start}:{listing.start + self.PAGE_SIZE - 1}"]
+        arguments.append(listing.target)
+        process = QProcess(self)
+        listing.process = process
+        process.finished.connect(lambda code, status: self._on_finished(listing, code, status))
+        process.errorOccurred.connect(lambda error: self._on_error(listing, error))
+        process.start(self.yt_dlp_path, arguments)
+
+    def _on_error(self, listing, error):
+        # 启动失败时不会触发finished信号
+        if error == QProcess.ProcessError.FailedToStart:
+            self._fail(listing, "无法启动yt-dlp")
+
+    def _on_finished(self, listing, exit_code, exit_status):
+        process = listing.process
+        if process is None:
+            return
+        output = process.readAllStandardOutput().data().decode("utf-8", errors="replace")
+        error = process.readAllStandardError().data().decode("utf-8", errors="replace").strip()
+        ids = [line.strip() for line in output.splitlines() if line.strip()]
+        if exit_code != 0 and not ids:
+            self._fail(listing, error.splitlines()[-1] if error else f"yt-dlp 返回 {exit_code}")
+            return
+
+        urls = [f"https://www.youtube.com/watch?v={video_id}" for video_id in ids]
+        reached = False
+        if listing.stop_at is not None:
+            for index, url in enumerate(urls):
+                if canonical_video_key(url) in listing.stop_at:
+                    urls = urls[:index]
+                    reached = True
+                    break
+        listing.count += len(urls)
+        if urls:
+            self.items_found.emit(listing.url, urls)
+
+        process.deleteLater()
+        listing.process = None
+        page = (listing.start - 1) // self.PAGE_SIZE + 1
+        if listing.stop_at is not None and not reached and len(ids) == self.PAGE_SIZE and page < self.MAX_PAGES:
+            # 增量同步：还没遇到已见过的视频，继续列出下一页
+            listing.start += self.PAGE_SIZE
+            self._run(listing)
+            return
+        self._listings.pop(listing.url, None)
+        self.finished.emit(listing.url, listing.count)
+        self._start_waiting()
+
+    def _fail(self, listing, message):
+        if listing.process is not None:
+            listing.process.deleteLater()
+            listing.process = None
+        self._listings.pop(listing.url, None)
+        self.failed.emit(listing.url, message)
+        self._start_waiting()
@@ -1,32 +1,52 @@
-import shutil
 import subprocess
 from PySide6.QtWidgets import QMessageBox
+from lib.libs.download_spec import DEFAULT_YOUTUBE_FILE_PATTERN
+from lib.libs.progress_parser import YTDLP_PROGRESS_TEMPLATE
+from lib.libs.tool_registry import ToolRegistry
 
 
 class YouTubeCommandBuilder:
-    def __init__(self, parent):
+    def __init__(self, parent=None, tools=None):
+        # parent为None时用于无界面的批量模式
         self.parent = parent
-        self.YT_DLP_PATH = shutil.which("yt-dlp")
-        if not self.YT_DLP_PATH:
-            QMessageBox.warning(self.parent, "警告", "未找到yt-dlp程序，请确保已安装yt-dlp")
+        self.tools = tools or ToolRegistry()
+        self._yt_dlp_path = None
+
+    @property
+    def YT_DLP_PATH(self):
+        """yt-dlp路径，第一次使用时才从工具注册表中读取，未找到时在构建命令时提示"""
+        return self._yt_dlp_path or self.tools.path("yt-dlp")
 
-    def build_command(self, info_only=False):
-        """构建yt-dlp命令"""
-        url = self.parent.url_input.text().strip()
+    @YT_DLP_PATH.setter
+    def YT_DLP_PATH(self, path):
+        self._yt_dlp_path = path or None
+
+    def build_command(self, info_only=False, url=None):
+        """根据界面选项构建yt-dlp命令，未指定url时读取输入框"""
+        if url is None:
+            url = self.parent.url_input.text().strip()
         if not url:
             QMessageBox.warning(self.parent, "警告", "请输入视频地址")
             return None
-            
+
         if not self.YT_DLP_PATH:
             QMessageBox.warning(self.parent, "警告", "未找到yt-dlp程序，请确保已安装yt-dlp")
             return None
-            
-        command = [self.YT_DLP_PATH, url]
-        
+
+        spec = self.parent.youtube_options.to_spec(url)
+        return self.build_command_from_spec(spec, info_only)
+
+    def build_command_from_spec(self, spec, info_only=False):
+        """根据下载参数构建yt-dlp命令"""
+        if not self.YT_DLP_PATH:
+            return None
+
+        command = [self.YT_DLP_PATH, spec.url]
+
         # 添加格式参数
-        format_choice = self.parent.youtube_options.format_combo.currentText()
-        quality_choice = self.parent.youtube_options.quality_combo.currentText()
-        
+        format_choice = spec.format
+        quality_choice = spec.quality
+
         # 构建格式字符串
         if format_choice != "默认":
             format_str = f"[ext={format_choice}]"
@@ -43,41 +63,49 @@ class YouTubeCommandBuilder:
                 if quality_choice in quality_map:
                     format_str += f"[height<={quality_map[quality_choice]}]"
             command.extend(["-f", f'bestvideo{format_str}+bestaudio/best'])
-        
+
         # 添加音频格式参数
-        # audio_format = self.parent.youtube_options.audio_format_combo.currentText()
+        # audio_format = spec.audio_format
         # if audio_format != "最佳":
         #     command.extend(["--extract-audio", "--audio-format", audio_format])
-            
+
         # 添加选项参数
-        if self.parent.youtube_options.subtitle_checkbox.isChecked():
+        if spec.subtitle:
             command.append("--write-sub")
-        if self.parent.youtube_options.video_only.isChecked():
+        if spec.video_only:
             command.append("--no-audio")
-        if self.parent.youtube_options.audio_only.isChecked():
+        if spec.audio_only:
             command.extend(["--extract-audio", "--audio-format", "best"])
-        if self.parent.youtube_options.debug.isChecked():
+        if spec.debug:
             command.append("--verbose")
-        if self.parent.youtube_options.embed_subtitle.isChecked():
+        if spec.embed_subtitle:
             command.append("--embed-subs")
-        if self.parent.youtube_options.embed_thumbnail.isChecked():
+        if spec.embed_thumbnail:
             command.append("--embed-thumbnail")
-        if self.parent.youtube_options.split_chapters.isChecked():
+        if spec.split_chapters:
             command.append("--split-chapters")
         if info_only:
             command.append("--print-json")
             command.append("-F")
-            
+        else:
+            # 每次进度刷新单独输出一行机器可读的进度数据
+            command.extend(["--newline", "--progress-template", YTDLP_PROGRESS_TEMPLATE])
+
         # 添加文件命名模式
-        file_pattern = self.parent.youtube_options.file_pattern.text().strip()
+        file_pattern = spec.file_pattern.strip()
         if file_pattern:
             command.extend(["-o", file_pattern])
         else:
-            command.extend(["-o", self.parent.default_youtube_file_pattern])
-            
+            command.extend(["-o", DEFAULT_YOUTUBE_FILE_PATTERN])
+
         # 添加工作目录
-        work_dir = self.parent.youtube_options.work_dir.text().strip()
+        work_dir = spec.work_dir.strip()
         if work_dir:
             command.extend(["--paths", work_dir])
-            
-        return command
\ No newline at end of file
+
+        # 使用工具注册表中找到的ffmpeg（合并音视频、嵌入字幕和封面时需要）
+        ffmpeg_path = self.tools.path("ffmpeg")
+        if ffmpeg_path:
+            command.extend(["--ffmpeg-location", ffmpeg_path])
+
+        return command
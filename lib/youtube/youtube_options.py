@@ -1,14 +1,15 @@
-import os
-import yaml
 from PySide6.QtWidgets import (
-    QGroupBox, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QLineEdit, QCheckBox, QPushButton, QLayout
+    QGroupBox, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QLineEdit, QCheckBox, QPushButton, QLayout, QSpinBox
 )
 from lib.libs.download_dir import downloads_path
 from lib.libs.base import OptionsBase
+from lib.libs.download_spec import YouTubeSpec
 
 class YouTubeOptionsArea(OptionsBase):
     def __init__(self, parent):
         self.options_group = None
+        # 配置文件中的 youtube 段（SettingsSection）
+        self.settings = None
         self.parent = parent
         # 初始化所有需要的控件属性
         self.format_combo = None
@@ -24,6 +25,7 @@ class YouTubeOptionsArea(OptionsBase):
         self.file_pattern = None
         self.work_dir = None
         self.browse_button = None
+        self.max_workers = None
 
     def create_youtube_options_area(self, layout):
         """创建YouTube下载选项区域"""
@@ -38,6 +40,15 @@ class YouTubeOptionsArea(OptionsBase):
         self.format_combo = QComboBox()
         self.format_combo.addItems(["默认", "mp4", "webm", "mkv", "flv", "avi"])
         format_layout.addWidget(self.format_combo)
+
+        # 同时运行的yt-dlp进程数
+        format_layout.addWidget(QLabel("同时下载数:"))
+        self.max_workers = QSpinBox()
+        self.max_workers.setRange(1, 16)
+        self.max_workers.setValue(self.parent.download_queue.limits["youtube"])
+        self.max_workers.valueChanged.connect(
+            lambda value: self.parent.download_queue.set_limit("youtube", value))
+        format_layout.addWidget(self.max_workers)
         format_layout.addStretch()
         options_layout.addLayout(format_layout)
         
@@ -115,65 +126,44 @@ class YouTubeOptionsArea(OptionsBase):
         layout.addWidget(self.options_group)
 
             
-    def load_config(self, config_file):
-        """加载配置文件"""
-        if os.path.exists(config_file):
-            try:
-                with open(config_file, 'r', encoding='utf-8') as f:
-                    all_config = yaml.safe_load(f) or {}
-                config = all_config.get('youtube', {})
-                # 加载URL输入
-                if 'url' in config:
-                    self.parent.url_input.setText(config['url'])
-                
-                # 加载格式和画质
-                if 'youtube_format' in config:
-                    index = self.format_combo.findText(config['youtube_format'])
-                    if index >= 0:
-                        self.format_combo.setCurrentIndex(index)
-                
-                if 'youtube_quality' in config:
-                    index = self.quality_combo.findText(config['youtube_quality'])
-                    if index >= 0:
-                        self.quality_combo.setCurrentIndex(index)
-                
-                if 'youtube_audio_format' in config:
-                    index = self.audio_format_combo.findText(config['youtube_audio_format'])
-                    if index >= 0:
-                        self.audio_format_combo.setCurrentIndex(index)
-                
-                # 加载复选框状态
-                if 'youtube_subtitle' in config:
-                    self.subtitle_checkbox.setChecked(config['youtube_subtitle'])
-                if 'youtube_video_only' in config:
-                    self.video_only.setChecked(config['youtube_video_only'])
-                if 'youtube_audio_only' in config:
-                    self.audio_only.setChecked(config['youtube_audio_only'])
-                if 'youtube_debug' in config:
-                    self.debug.setChecked(config['youtube_debug'])
-                if 'youtube_embed_subtitle' in config:
-                    self.embed_subtitle.setChecked(config['youtube_embed_subtitle'])
-                if 'youtube_embed_thumbnail' in config:
-                    self.embed_thumbnail.setChecked(config['youtube_embed_thumbnail'])
-                if 'youtube_split_chapters' in config:
-                    self.split_chapters.setChecked(config['youtube_split_chapters'])
-                
-                # 加载文件命名模式
-                if 'youtube_file_pattern' in config:
-                    self.file_pattern.setText(config['youtube_file_pattern'])
-                
-                # 加载工作目录
-                if config.get("youtube_work_dir"):
-                    self.work_dir.setText(config['youtube_work_dir'])
-                else:
-                    self.work_dir.setText(str(downloads_path))
-                    
-            except Exception as e:
-                print(f"加载配置文件失败: {e}")
+    def load_config(self, settings):
+        """从配置中加载选项，settings为配置文件中的 youtube 段"""
+        self.settings = settings
+        # 加载URL输入（选项区域在第一次使用时才创建，不能覆盖已输入的地址）
+        if 'url' in settings and not self.parent.url_input.text():
+            self.parent.url_input.setText(settings.get('url', ''))
+
+        # 加载格式和画质
+        for key, combo in (('youtube_format', self.format_combo),
+                           ('youtube_quality', self.quality_combo),
+                           ('youtube_audio_format', self.audio_format_combo)):
+            index = combo.findText(settings.get(key, ''))
+            if index >= 0:
+                combo.setCurrentIndex(index)
+
+        # 加载复选框状态
+        for key, checkbox in (('youtube_subtitle', self.subtitle_checkbox),
+                              ('youtube_video_only', self.video_only),
+                              ('youtube_audio_only', self.audio_only),
+                              ('youtube_debug', self.debug),
+                              ('youtube_embed_subtitle', self.embed_subtitle),
+                              ('youtube_embed_thumbnail', self.embed_thumbnail),
+                              ('youtube_split_chapters', self.split_chapters)):
+            checkbox.setChecked(settings.get(key, checkbox.isChecked()))
+        self.max_workers.setValue(settings.get('youtube_max_workers', self.max_workers.value()))
+
+        # 加载文件命名模式
+        self.file_pattern.setText(settings.get('youtube_file_pattern', self.file_pattern.text()))
+
+        # 加载工作目录，默认为当前用户的下载文件夹
+        self.work_dir.setText(settings.get('youtube_work_dir') or str(downloads_path))
+
+        # 选项修改后自动保存
+        self.connect_changes(self.save_config)
     
-    def save_config(self, config_file):
-        """保存配置到文件"""
-        config = {
+    def get_config(self):
+        """读取当前界面选项为配置字典"""
+        return {
             # 'url': self.parent.url_input.text(),
             'youtube_format': self.format_combo.currentText(),
             'youtube_quality': self.quality_combo.currentText(),
@@ -185,18 +175,16 @@ class YouTubeOptionsArea(OptionsBase):
             'youtube_embed_subtitle': self.embed_subtitle.isChecked(),
             'youtube_embed_thumbnail': self.embed_thumbnail.isChecked(),
             'youtube_split_chapters': self.split_chapters.isChecked(),
+            'youtube_max_workers': self.max_workers.value(),
             'youtube_file_pattern': self.file_pattern.text(),
             'youtube_work_dir': self.work_dir.text(),
         }
-        
-        try:
-            try:
-                with open(config_file, 'r', encoding='utf-8') as f:
-                    all_config = yaml.safe_load(f) or {}
-            except Exception as e:
-                all_config = {}
-            all_config['youtube'] = config
-            with open(config_file, 'w', encoding='utf-8') as f:
-                yaml.dump(all_config, f, allow_unicode=True, indent=2)
-        except Exception as e:
-            print(f"保存配置文件失败: {e}")
\ No newline at end of file
+
+    def to_spec(self, url):
+        """根据当前界面选项生成不依赖控件的下载参数"""
+        return YouTubeSpec.from_config(url, self.get_config())
+
+    def save_config(self):
+        """保存配置（延迟写入文件）"""
+        if self.settings is not None:
+            self.settings.update(self.get_config())
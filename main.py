@@ -1,5 +1,8 @@
 import sys
-import pathlib
+import time
+# 记录导入模块的耗时（--profile-startup）
+_IMPORT_START = time.perf_counter()
+import argparse
 from PySide6.QtWidgets import (
     QApplication,
     QMainWindow,
@@ -8,11 +11,11 @@ from PySide6.QtWidgets import (
     QHBoxLayout,
     QSplitter,
     QGroupBox,
-    QScrollArea, QLayout,
+    QScrollArea, QLayout, QProgressBar,
 )
 from PySide6.QtGui import QIcon
-from PySide6.QtCore import Qt
-from PySide6.QtNetwork import QNetworkAccessManager
+from PySide6.QtCore import Qt, QTimer
+from PySide6.QtNetwork import QNetworkAccessManager, QNetworkDiskCache
 
 # 导入视频信息横幅相关类
 from lib.libs.video_info_banner import VideoInfoBanner
@@ -20,18 +23,33 @@ from lib.libs.video_info_banner import VideoInfoBanner
 from lib.libs.output_area import OutputArea
 # 导入下载选项区域管理类
 from lib.bilibili.download_options import DownloadOptionsArea
-# 导入YouTube选项区域管理类
-from lib.youtube.youtube_options import YouTubeOptionsArea
 # 导入命令构建器
 from lib.bilibili.command_builder import CommandBuilder
-# 导入YouTube命令构建器
-from lib.youtube.youtube_command_builder import YouTubeCommandBuilder
 # 导入URL处理器
 from lib.libs.url_handler import URLHandler
 # 导入执行按钮区域管理类
 from lib.libs.action_buttons import ActionButtons
 # 导入进程处理器
 from lib.libs.process_handler import ProcessHandler
+# 导入下载队列
+from lib.libs.download_queue import DownloadQueue
+# 导入调试响应内容的旁路存储
+from lib.libs.payload_store import PayloadStore
+# 导入默认文件命名规则
+from lib.libs.download_spec import DEFAULT_BILIBILI_FILE_PATTERN, DEFAULT_YOUTUBE_FILE_PATTERN
+# 导入B站视频信息获取器
+from lib.bilibili.metadata_fetcher import BilibiliMetadataFetcher
+from lib.bilibili.short_link_resolver import ShortLinkResolver
+from lib.bilibili.collection_expander import CollectionExpander
+# 导入视频信息缓存
+from lib.libs.metadata_cache import MetadataCache
+from lib.libs.download_history import DownloadHistory
+from lib.libs.app_dirs import cache_path
+from lib.libs.settings_store import SettingsStore, CONFIG_FILE
+from lib.libs.startup_profiler import StartupProfiler
+from lib.libs.resources import load_resources
+from lib.libs.tool_registry import ToolRegistry, TOOLS
+from lib.libs.job_store import JobStore
 # 导入检查器
 from lib.bilibili.checker import check_bbdown_path, setup_system_paths
 
@@ -39,10 +57,17 @@ from lib.bilibili.checker import check_bbdown_path, setup_system_paths
 from lib.libs.shortcut import ShortcutMixin
 
 class BBDownUI(QMainWindow, ShortcutMixin):
-    def __init__(self):
+    def __init__(self, profiler=None):
         super().__init__()
+        self.profiler = profiler or StartupProfiler()
         # 配置系统路径
         setup_system_paths()
+        # 外部工具的路径和版本，启动时只读取缓存，首次绘制后在后台重新探测
+        self.tools = ToolRegistry(parent=self)
+        self.tools.finished.connect(self.show_tool_versions)
+        # 初始化命令构建器
+        self.command_builder = CommandBuilder(self, self.tools)
+        self.profiler.checkpoint("查找工具")
         self.setWindowTitle("BBDown UI - 哔哩哔哩下载工具")
         self.setGeometry(100, 100, 1200, 800)
         self.setWindowIcon(QIcon(":/bilibili.ico"))
@@ -54,8 +79,8 @@ class BBDownUI(QMainWindow, ShortcutMixin):
         # 视频基础信息存储
         self._base_video_info_json = None
         # 初始化一些自定义默认值
-        self.default_bilibili_file_pattern = "<ownerName>/<ownerName>-<videoTitle>-<bvid>"
-        self.default_youtube_file_pattern = "%(uploader)s/%(title)s [%(id)s].%(ext)s"
+        self.default_bilibili_file_pattern = DEFAULT_BILIBILI_FILE_PATTERN
+        self.default_youtube_file_pattern = DEFAULT_YOUTUBE_FILE_PATTERN
 
         # 创建中心部件
         central_widget = QWidget()
@@ -113,6 +138,12 @@ class BBDownUI(QMainWindow, ShortcutMixin):
         right_layout.setSpacing(8)
         right_layout.setContentsMargins(6, 6, 6, 6)
 
+        # 初始化下载队列（选项区域需要读取默认并发数）
+        self.download_queue = DownloadQueue(self)
+
+        # 初始化调试响应内容存储（日志中只显示折叠的占位行）
+        self.payload_store = PayloadStore()
+
         # 初始化视频信息横幅管理器
         self.video_info_banner = VideoInfoBanner(self)
 
@@ -121,13 +152,9 @@ class BBDownUI(QMainWindow, ShortcutMixin):
 
         # 初始化下载选项区域管理器
         self.download_options = DownloadOptionsArea(self)
-        # 初始化YouTube选项区域管理器
-        self.youtube_options = YouTubeOptionsArea(self)
-
-        # 初始化命令构建器
-        self.command_builder = CommandBuilder(self)
-        # 初始化YouTube命令构建器
-        self.youtube_command_builder = YouTubeCommandBuilder(self)
+        # YouTube选项区域和命令构建器在第一次使用时才创建
+        self._youtube_options = None
+        self._youtube_command_builder = None
 
         # 初始化URL处理器
         self.url_handler = URLHandler(self)
@@ -137,6 +164,9 @@ class BBDownUI(QMainWindow, ShortcutMixin):
 
         # 初始化进程处理器
         self.process_handler = ProcessHandler(self)
+        self.process_handler.attach_queue(self.download_queue)
+        # 下载队列的持久化存储，首次绘制后恢复上次未完成的任务
+        self.job_store = JobStore(parent=self)
 
         # 创建URL输入区域和按钮区域
         url_layout = QHBoxLayout()
@@ -152,11 +182,34 @@ class BBDownUI(QMainWindow, ShortcutMixin):
 
         # 用于下载封面图片
         self.net_manager = QNetworkAccessManager(self)  # 必须保存为成员变量，防止被回收
-
-        # 创建下载选项区域
-        self.download_options.create_download_options_area(left_layout)
-        # 创建YouTube选项区域
-        self.youtube_options.create_youtube_options_area(left_layout)
+        # 封面等网络请求的磁盘缓存，按服务器返回的ETag/Last-Modified验证
+        network_cache = QNetworkDiskCache(self)
+        network_cache.setCacheDirectory(str(cache_path / "network"))
+        network_cache.setMaximumCacheSize(128 << 20)
+        self.net_manager.setCache(network_cache)
+        # 直接请求B站接口获取视频信息，不需要等待BBDown输出
+        self.metadata_fetcher = BilibiliMetadataFetcher(self.net_manager, self)
+        self.metadata_fetcher.fetched.connect(self.on_metadata_fetched)
+        # 视频信息磁盘缓存
+        self.metadata_cache = MetadataCache()
+        # 已下载视频的记录，下载前跳过已下载的视频
+        self.download_history = DownloadHistory()
+        # 将合集、收藏夹、个人空间和番剧展开为单个视频，分别加入下载队列
+        self.collection_expander = CollectionExpander(self.net_manager, self)
+        self.collection_expander.items_found.connect(self.action_buttons.collection_items_found)
+        self.collection_expander.finished.connect(self.action_buttons.collection_expanded)
+        self.collection_expander.failed.connect(self.action_buttons.collection_expand_failed)
+        # 解析b23.tv短链接，便于按真实视频编号去重和读取缓存
+        self.short_link_resolver = ShortLinkResolver(self.net_manager, self)
+        self.short_link_resolver.resolved.connect(self.url_handler.on_short_link_resolved)
+        self.short_link_resolver.failed.connect(lambda url, message: self.output_area.append_output(f"解析短链接失败 {url}: {message}"))
+
+        # 创建下载选项区域，YouTube选项区域之后加入同一布局
+        self.options_layout = QVBoxLayout()
+        self.options_layout.setSpacing(8)
+        self.options_layout.setContentsMargins(0, 0, 0, 0)
+        left_layout.addLayout(self.options_layout)
+        self.download_options.create_download_options_area(self.options_layout)
         left_layout.addStretch()
 
         # 创建输出显示区域（使用QGroupBox包装）
@@ -174,14 +227,29 @@ class BBDownUI(QMainWindow, ShortcutMixin):
         
         # 创建状态栏
         self.statusBar().showMessage("就绪")
-
-        # 初始化配置文件路径
-        self.config_file = str(pathlib.Path.home() / ".BBDown.yaml")
-
-        # 加载配置
-        self.download_options.load_config(self.config_file)
-        # 加载YouTube配置
-        self.youtube_options.load_config(self.config_file)
+        # 创建下载进度条，显示所有运行中任务的总进度和速度
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setMaximumWidth(300)
+        self.progress_bar.setVisible(False)
+        self.statusBar().addPermanentWidget(self.progress_bar)
+        self.download_queue.job_progress.connect(self.action_buttons.update_progress)
+
+        self.profiler.checkpoint("创建界面")
+
+        # 配置文件只解析一次，修改后延迟写入
+        self.settings = SettingsStore(parent=self)
+
+        # 加载配置（YouTube配置在创建选项区域时加载）
+        self.download_options.load_config(self.settings.section("bilibili"))
+        # PATH中找不到BBDown时使用配置文件中记录的路径
+        self.command_builder.fallback_path = self.download_options.BBDown_PATH or None
+        # YouTube选项区域在第一次使用时才创建，先按配置设置并发数，恢复的YouTube任务同样受限制
+        self.download_queue.set_limit("youtube", self.settings.section("youtube").get(
+            "youtube_max_workers", self.download_queue.limits["youtube"]))
+        # 界面设置
+        ui_settings = self.settings.section("ui")
+        self.output_area.set_max_lines(ui_settings.get("output_max_lines", self.output_area.max_lines))
+        self.profiler.checkpoint("加载配置")
 
         # 连接窗口关闭事件
         self.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
@@ -189,6 +257,24 @@ class BBDownUI(QMainWindow, ShortcutMixin):
         # 设置快捷键
         self.setup_shortcuts()
 
+    @property
+    def youtube_options(self):
+        """YouTube选项区域，第一次切换到YouTube模式时才创建"""
+        if self._youtube_options is None:
+            from lib.youtube.youtube_options import YouTubeOptionsArea
+            self._youtube_options = YouTubeOptionsArea(self)
+            self._youtube_options.create_youtube_options_area(self.options_layout)
+            self._youtube_options.load_config(self.settings.section("youtube"))
+        return self._youtube_options
+
+    @property
+    def youtube_command_builder(self):
+        """YouTube命令构建器，第一次下载YouTube视频时才创建"""
+        if self._youtube_command_builder is None:
+            from lib.youtube.youtube_command_builder import YouTubeCommandBuilder
+            self._youtube_command_builder = YouTubeCommandBuilder(self, self.tools)
+        return self._youtube_command_builder
+
     @property
     def mode(self):
         return self._mode
@@ -203,9 +289,9 @@ class BBDownUI(QMainWindow, ShortcutMixin):
     def update_download_options_layout(self):
         """根据模式更新下载选项布局"""
         # 先隐藏所有下载选项卡
-        if hasattr(self, 'download_options') and self.download_options:
-            self.download_options.options_group.setVisible(self._mode == "bilibili")
-        if hasattr(self, 'youtube_options') and self.youtube_options:
+        self.download_options.options_group.setVisible(self._mode == "bilibili")
+        # 还未创建的YouTube选项区域只在切换到YouTube模式时创建
+        if self._youtube_options is not None or self._mode == "youtube":
             self.youtube_options.options_group.setVisible(self._mode == "youtube")
 
     @property
@@ -219,21 +305,122 @@ class BBDownUI(QMainWindow, ShortcutMixin):
         self._base_video_info_json = value
         self.video_info_banner.update_video_info(value)
 
+    def load_video_info(self, url):
+        """显示视频信息：缓存命中时立即显示，否则B站视频直接请求接口"""
+        info = self.metadata_cache.lookup(self._mode, url)
+        if info is not None:
+            self.base_video_info_json = info
+            return
+        if self._mode == "bilibili":
+            self.metadata_fetcher.fetch(url)
+
+    def on_metadata_fetched(self, video_id, response):
+        """视频信息接口返回后保存到缓存并更新横幅"""
+        self.metadata_cache.put_info("bilibili", response)
+        if self._mode == "bilibili":
+            self.base_video_info_json = response
+
+    def show_tool_versions(self):
+        """后台探测完成后，在常规输出中显示找到的外部工具及版本"""
+        for name in TOOLS:
+            if self.tools.path(name):
+                self.output_area.append_output(f"{name}: {self.tools.version(name) or self.tools.path(name)}")
+            else:
+                self.output_area.append_output(f"{name}: 未找到")
+
     def closeEvent(self, event):
         """窗口关闭事件，保存配置"""
-        self.download_options.save_config(self.config_file)
-        self.youtube_options.save_config(self.config_file)
+        self.download_options.save_config()
+        if self._youtube_options is not None:
+            self._youtube_options.save_config()
+        self.settings.flush()
+        # 保存下载队列，未完成的任务下次启动时恢复
+        self.job_store.close()
+        # 结束所有下载任务
+        self.download_queue.stop_all()
+        # 删除转存到临时目录的响应内容
+        self.payload_store.clear()
+        self.short_link_resolver.save()
+        self.download_history.close()
         event.accept()
 
 
+def parse_args(argv):
+    """解析命令行参数，未识别的参数留给Qt处理"""
+    parser = argparse.ArgumentParser(prog="bbdown-ui", description="BBDown UI - 哔哩哔哩下载工具")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="无界面批量下载，FILE为每行一个地址的文本文件，使用 - 从标准输入读取")
+    parser.add_argument("--subscribe", metavar="URL", action="append",
+                        help="订阅B站个人空间、收藏夹或YouTube频道，可重复指定")
+    parser.add_argument("--unsubscribe", metavar="URL", action="append", help="取消订阅")
+    parser.add_argument("--list-subscriptions", action="store_true", help="列出所有订阅")
+    parser.add_argument("--sync", action="store_true",
+                        help="无界面增量同步所有订阅，只下载上次同步之后的新视频")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="输出启动各阶段（导入模块、创建界面、加载配置、查找工具）的耗时")
+    parser.add_argument("--resume", action="store_true",
+                        help="无界面继续上次关闭或中断时未完成的下载任务")
+    parser.add_argument("--import-archive", metavar="FILE", action="append",
+                        help="导入BBDown --save-archives-to-file 或 yt-dlp --download-archive 的下载记录，可重复指定")
+    return parser.parse_known_args(argv[1:])
+
+
 def main():
-    app = QApplication(sys.argv)
+    args, qt_args = parse_args(sys.argv)
+    if args.import_archive:
+        history = DownloadHistory()
+        for archive in args.import_archive:
+            try:
+                print(f"{archive}: 新增 {history.import_archive(archive)} 条下载记录")
+            except OSError as e:
+                print(f"导入下载记录失败: {e}", file=sys.stderr)
+        history.close()
+        if not args.batch and not args.sync and not args.resume:
+            sys.exit(0)
+    if args.subscribe or args.unsubscribe or args.list_subscriptions:
+        from lib.libs.subscriptions import SubscriptionStore
+        store = SubscriptionStore()
+        for url in args.subscribe or []:
+            if not store.add(url):
+                print(f"不支持订阅该地址: {url}", file=sys.stderr)
+        for url in args.unsubscribe or []:
+            if not store.remove(url):
+                print(f"没有该订阅: {url}", file=sys.stderr)
+        store.save()
+        for url in store.urls():
+            print(url)
+        if not args.batch and not args.sync and not args.resume:
+            sys.exit(0)
+    if args.batch or args.sync or args.resume:
+        # 批量模式不创建任何窗口
+        from lib.libs.batch_runner import run_batch
+        sys.exit(run_batch(args.batch, CONFIG_FILE, sync=args.sync, resume=args.resume))
+
+    profiler = StartupProfiler(_IMPORT_START, enabled=args.profile_startup)
+    profiler.checkpoint("导入模块")
+    # 注册窗口图标等资源
+    load_resources()
+    profiler.checkpoint("加载资源")
+    app = QApplication(sys.argv[:1] + qt_args)
     app.setApplicationName("BBDown")
     app.setWindowIcon(QIcon(":/bilibili.ico"))
-    window = BBDownUI()
-    # 检查BBDown路径
-    check_bbdown_path(window)
+    profiler.checkpoint("创建应用")
+    window = BBDownUI(profiler)
     window.show()
+    profiler.checkpoint("显示窗口")
+
+    def after_first_paint():
+        profiler.checkpoint("首次绘制")
+        profiler.report()
+        # 在后台线程中探测外部工具的版本和功能
+        window.tools.start()
+        # 检查BBDown路径，弹窗不再阻塞主窗口的显示
+        if not check_bbdown_path(window):
+            app.exit(1)
+            return
+        window.action_buttons.resume_jobs()
+
+    QTimer.singleShot(0, after_first_paint)
     sys.exit(app.exec())
 
 